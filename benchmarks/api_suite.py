@@ -0,0 +1,382 @@
+"""
+Latency, throughput and query counts of the API and HTML endpoints.
+
+Seeds a database with ``manage.py seed_benchmark`` (or reuses the one given
+with --database, seeding it on first use), serves OMDB from the local stub in
+reviews/omdb_stub.py with the seeded catalog, and requests every endpoint of
+the router and the HTML pages through Django's test client. For each one:
+p50/p95/p99 latency, requests per second of one worker and, with --workers,
+of several forked workers together, the SQL queries of one request and the
+OMDB calls made. A scenario stops early when it runs out of its --seconds. Reads run first, then the write scenarios. Throttling is off.
+
+The API has no authentication classes configured, so the endpoints that need
+a user (recommendations, profiles, likes and comments writes) only answer 401
+or 403 and are left out.
+
+Results are written as JSON (--output) and can be compared with an earlier
+run (--baseline):
+
+    python benchmarks/api_suite.py --reviews 20000 --output bench-before.json
+    python benchmarks/api_suite.py --database /tmp/big.sqlite3 --users 100000 --reviews 2000000 \\
+        --likes 5000000 --comments 1000000 --requests 100 --baseline bench-before.json
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviereviewapi.settings')
+
+SEED_OPTIONS = ('users', 'movies', 'reviews', 'likes', 'comments', 'seed')
+
+
+def setup_django(path):
+    import django
+    from django.conf import settings
+
+    from moviereviewapi.db import sqlite_database
+
+    settings.DATABASES = {'default': sqlite_database(path)}
+    settings.DATABASE_REPLICAS = []
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    settings.OMDB_API_KEY = 'benchmark'
+    django.setup()
+
+
+def prepare(args):
+    """Migrate and seed unless the database holds reviews already, returns the seeding time"""
+    from django.core.management import call_command
+
+    from reviews.models import Review
+
+    call_command('migrate', verbosity=0)
+    if Review.objects.exists():
+        return None
+    started = time.monotonic()
+    call_command('seed_benchmark', verbosity=0, **{name: getattr(args, name) for name in SEED_OPTIONS})
+    return round(time.monotonic() - started, 1)
+
+
+def fixtures():
+    """Ids and titles the scenarios point at: the busiest review, user and film, and a quiet film"""
+    from django.db.models import Count
+
+    from reviews.models import MovieRatingStats, Review
+
+    stats = MovieRatingStats.objects.select_related('movie').order_by('-review_count')
+    busy_user = (
+        Review.objects.filter(user__isnull=False).values('user').annotate(total=Count('id')).order_by('-total').first()
+    )
+    popular, quiet = stats.first().movie, stats.last().movie
+    return {
+        'review': Review.objects.order_by('-likes_count', 'id').values_list('id', flat=True).first(),
+        'user': busy_user['user'],
+        'movie': popular.title,
+        'imdb_id': popular.imdb_id,
+        'quiet_movie': quiet.title,
+        'pages': Review.objects.count() // 12,
+    }
+
+
+def scenarios(fix):
+    """(name, method, path, body) of every scenario; bodies of writes are functions of the iteration"""
+    from django.urls import reverse
+
+    movie, review, user = fix['movie'], fix['review'], fix['user']
+    word = movie.split()[0]
+    reads = [
+        ('page:home', reverse('home')),
+        ('page:movie_search', reverse('movie_search')),
+        ('page:reviews_list', reverse('reviews_list')),
+        ('page:reviews_list_deep', f"{reverse('reviews_list')}?page={max(1, min(fix['pages'], 200))}"),
+        ('page:reviews_list_cursor', f"{reverse('reviews_list')}?paging=cursor"),
+        ('page:review_detail', reverse('review_detail', args=[review])),
+        ('api:reviews', reverse('review-list')),
+        ('api:reviews_100', f"{reverse('review-list')}?page_size=100"),
+        ('api:reviews_top_rated', f"{reverse('review-list')}?ordering=-rating&rating=5"),
+        ('api:reviews_by_title', f"{reverse('review-list')}?movie_title={movie}"),
+        ('api:reviews_fulltext', f"{reverse('review-list')}?search=brilliant twist"),
+        ('api:review_detail', reverse('review-detail', args=[review])),
+        ('api:review_comments', reverse('review-comments', args=[review])),
+        ('api:review_search', f"{reverse('review-search')}?q=clever ending"),
+        ('api:reviews_by_movie', reverse('review-reviews-by-movie', args=[movie])),
+        ('api:reviews_by_quiet_movie', reverse('review-reviews-by-movie', args=[fix['quiet_movie']])),
+        ('api:movie_stats', reverse('review-movie-stats', args=[movie])),
+        ('api:most_liked', reverse('review-most-liked-reviews', args=[movie])),
+        ('api:reviews_export', f"{reverse('reviews-export')}?movie={movie}"),
+        ('api:users', reverse('user-list')),
+        ('api:user_detail', reverse('user-detail', args=[user])),
+        ('api:user_profile', reverse('user-profile', args=[user])),
+        ('api:user_reviews', reverse('user-reviews', args=[user])),
+        ('api:likes', reverse('like-list')),
+        ('api:comments', reverse('comment-list')),
+        ('api:search_movies', f"{reverse('search-movies-public')}?search={word}"),
+        ('api:search_movies_auth', f"{reverse('search-movies')}?q={word}"),
+        ('api:movie_details', reverse('movie-details', args=[fix['imdb_id']])),
+        ('api:movie_info', f"{reverse('movie-info')}?title={movie}"),
+        ('api:omdb_status', reverse('omdb-status')),
+        ('async:search_movies', f"{reverse('async-search-movies-public')}?search={word}"),
+        ('async:movie_details', reverse('async-movie-details', args=[fix['imdb_id']])),
+        ('async:movie_info', f"{reverse('async-movie-info')}?title={movie}"),
+        ('async:review_detail', reverse('async-review-detail', args=[review])),
+        ('async:reviews_by_movie', reverse('async-reviews-by-movie', args=[movie])),
+    ]
+    writes = [
+        ('write:create_review', reverse('review-list'), lambda i: {
+            'movie_title': movie, 'review_content': f'Benchmark review {i}.', 'rating': i % 5 + 1,
+        }),
+        ('write:bulk_reviews_50', reverse('review-bulk-create'), lambda i: [
+            {'movie_title': movie, 'review_content': f'Bulk review {i}-{row}.', 'rating': row % 5 + 1} for row in range(50)
+        ]),
+        ('write:register', reverse('register'), lambda i: {
+            'username': f'suite-{os.getpid()}-{i}-{time.time_ns()}', 'email': 'suite@example.com', 'password': 'benchmark-pw',
+        }),
+    ]
+    return [(name, 'GET', path, None) for name, path in reads] + [(name, 'POST', path, body) for name, path, body in writes]
+
+
+def request(client, method, path, body, index):
+    if method == 'GET':
+        response = client.get(path)
+    else:
+        response = client.post(path, data=json.dumps(body(index)), content_type='application/json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def timed_requests(method, path, body, count, offset=0, seconds=None):
+    """``count`` requests, fewer when they take longer than ``seconds`` in all"""
+    from django.test import Client
+
+    client = Client()
+    latencies, statuses = [], set()
+    deadline = time.perf_counter() + seconds if seconds else None
+    for index in range(offset, offset + count):
+        started = time.perf_counter()
+        response = request(client, method, path, body, index)
+        latencies.append(time.perf_counter() - started)
+        statuses.add(response.status_code)
+        if deadline and started + latencies[-1] > deadline:
+            break
+    return latencies, statuses
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def concurrent_throughput(method, path, body, count, workers, seconds):
+    """Requests per second of ``workers`` forked processes running the scenario at once"""
+    from django.db import connections
+
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    start = context.Event()
+    done = context.Queue()
+
+    def work(number):
+        start.wait()
+        latencies, _ = timed_requests(method, path, body, count, offset=(number + 1) * 1_000_000, seconds=seconds)
+        done.put((len(latencies), time.perf_counter()))
+
+    processes = [context.Process(target=work, args=(number,)) for number in range(workers)]
+    for process in processes:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    reports = [done.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return round(sum(served for served, _ in reports) / (max(finished for _, finished in reports) - began), 1)
+
+
+def measure(scenario, stub, count, warmup, workers, seconds):
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    name, method, path, body = scenario
+    timed_requests(method, path, body, warmup, offset=-warmup, seconds=seconds)
+    # Requests reset the query log: start from an empty one and count before the next request
+    reset_queries()
+    with CaptureQueriesContext(connection) as captured:
+        request(Client(), method, path, body, -warmup - 1)
+    queries = len(captured.captured_queries)
+    calls = stub.requests
+    latencies, statuses = timed_requests(method, path, body, count, seconds=seconds)
+    result = {
+        'method': method,
+        'path': path,
+        'status': sorted(statuses),
+        'queries': queries,
+        'omdb_calls': stub.requests - calls,
+        'samples': len(latencies),
+        'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'requests_per_second': None,
+    }
+    if latencies:
+        ordered = sorted(latencies)
+        result.update({
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+            'requests_per_second': round(len(ordered) / sum(ordered), 1),
+        })
+    if workers > 1:
+        result[f'requests_per_second_{workers}_workers'] = concurrent_throughput(method, path, body, count, workers, seconds)
+    return result
+
+
+def metadata(args, seeding):
+    import django
+    from django.contrib.auth.models import User
+
+    from reviews.models import Movie, Review, ReviewComment, ReviewLike
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'seconds': args.seconds,
+        'workers': args.workers,
+        'seeding_seconds': seeding,
+        'data': {
+            'users': User.objects.count(),
+            'movies': Movie.objects.count(),
+            'reviews': Review.objects.count(),
+            'likes': ReviewLike.objects.count(),
+            'comments': ReviewComment.objects.count(),
+        },
+    }
+
+
+def run(args, path):
+    setup_django(path)
+    seeding = prepare(args)
+
+    from django.conf import settings
+
+    from reviews import metrics
+    from reviews.models import Movie
+    from reviews.omdb_stub import OMDBStubServer
+
+    selected = [scenario for scenario in scenarios(fixtures()) if re.search(args.only or '', scenario[0])]
+    meta = metadata(args, seeding)
+    catalog = list(Movie.objects.exclude(omdb_data=None).values_list('omdb_data', flat=True))
+    results = {}
+    with OMDBStubServer(movies=catalog) as stub:
+        settings.OMDB_API_URL = stub.url
+        for scenario in selected:
+            results[scenario[0]] = measure(scenario, stub, args.requests, args.warmup, args.workers, args.seconds)
+            if args.verbose:
+                print(scenario[0], results[scenario[0]], file=sys.stderr)
+    # Written while the temporary directory still exists, not at exit
+    metrics.stop()
+    return {'meta': meta, 'results': results}
+
+
+def compare(report, baseline):
+    """Relative change of p50 latency and throughput against an earlier report"""
+    changes = {}
+    for name, result in report['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        change = {}
+        for key in ('p50_ms', 'p99_ms', 'requests_per_second'):
+            if result.get(key) and before.get(key):
+                change[key] = round((result[key] - before[key]) / before[key] * 100, 1)
+        change['queries'] = result['queries'] - before['queries']
+        changes[name] = change
+    return changes
+
+
+def print_table(report, changes):
+    workers = report['meta']['workers']
+    parallel = f'requests_per_second_{workers}_workers'
+    header = f"{'scenario':<30}{'status':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>8}{'omdb':>6}{'samples':>8}"
+    if workers > 1:
+        header += f"{f'req/s x{workers}':>11}"
+    if changes:
+        header += f"{'p50 Δ%':>9}{'req/s Δ%':>10}{'queries Δ':>10}"
+    print(header)
+    for name, result in report['results'].items():
+        status = ','.join(map(str, result['status']))
+        line = (
+            f"{name:<30}{status:>8}{result['p50_ms']!s:>9}{result['p95_ms']!s:>9}{result['p99_ms']!s:>9}"
+            f"{result['requests_per_second']!s:>9}{result['queries']:>8}{result['omdb_calls']:>6}{result['samples']:>8}"
+        )
+        if workers > 1:
+            line += f"{result[parallel]!s:>11}"
+        if changes:
+            change = changes.get(name, {})
+            line += f"{change.get('p50_ms', '')!s:>9}{change.get('requests_per_second', '')!s:>10}{change.get('queries', '')!s:>10}"
+        print(line)
+    data = report['meta']['data']
+    print('\n' + ', '.join(f'{count} {name}' for name, count in data.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help="SQLite file to use, seeded when it has no reviews (default: a temporary one)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movies', type=int, default=500)
+    parser.add_argument('--reviews', type=int, default=20000)
+    parser.add_argument('--likes', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=200, help="Timed requests per scenario")
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per scenario")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Time limit of each phase of a scenario, slow ones get fewer samples")
+    parser.add_argument('--workers', type=int, default=1, help="Also measure the throughput of this many processes")
+    parser.add_argument('--only', help="Regular expression selecting scenarios by name, e.g. '^api:'")
+    parser.add_argument('--output', help="Write the report to this JSON file")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare with")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--verbose', action='store_true', help="Print each result as it comes")
+    args = parser.parse_args()
+
+    if args.database:
+        report = run(args, os.path.abspath(args.database))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            report = run(args, os.path.join(directory, 'bench.sqlite3'))
+
+    changes = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            changes = compare(report, json.load(baseline))
+        report['baseline'] = {'path': args.baseline, 'changes_percent': changes}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report, changes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+JSON encoding and decoding cost of API responses.
+
+Serializes real review list pages (ReviewSerializer with the latest comments
+embedded, as ``/api/reviews/`` returns them) from a throwaway database, then
+times DRF's JSONRenderer against reviews.renderers.ORJSONRenderer on the
+same data, and DRF's JSONParser against reviews.parsers.ORJSONParser on the
+rendered bytes. Both renderers must produce identical bytes.
+
+    python benchmarks/json_renderer.py --page-sizes 10 100 --rounds 200
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviereviewapi.settings')
+
+TITLES = ['Inception', 'Amélie', 'Léon', 'Heat', 'Alien', 'Spirited Away', 'Oldboy', 'Fargo']
+WORDS = 'a bold slow tender film cast score plot twist ending «great» überzeugend 映画 ★'.split()
+
+
+def setup_django(path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    settings.OMDB_API_KEY = ''
+    django.setup()
+
+
+def text(words):
+    return ' '.join(random.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def seed(reviews):
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from reviews.models import Review, ReviewComment
+
+    call_command('migrate', verbosity=0)
+    users = User.objects.bulk_create(User(username=f'critic{i}') for i in range(20))
+    created = Review.objects.bulk_create(
+        Review(movie_title=random.choice(TITLES), review_content=text(60), rating=random.randint(1, 5), user=random.choice(users))
+        for _ in range(reviews)
+    )
+    ReviewComment.objects.bulk_create(
+        ReviewComment(review=review, user=random.choice(users), content=text(15))
+        for review in created for _ in range(random.randint(0, 5))
+    )
+
+
+def page(size):
+    from reviews.models import Review
+    from reviews.serializers import ReviewSerializer
+
+    reviews = Review.objects.select_related('user').with_latest_comments().order_by('-created_date', '-id')[:size]
+    return {'next': 'http://testserver/api/reviews/?cursor=cD0yMDI0', 'previous': None, 'results': ReviewSerializer(reviews, many=True).data}
+
+
+def timed(function, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1e6, 1)
+
+
+def measure(size, rounds):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from reviews.parsers import ORJSONParser
+    from reviews.renderers import ORJSONRenderer
+
+    data = page(size)
+    content = JSONRenderer().render(data)
+    assert ORJSONRenderer().render(data) == content, 'renderers disagree'
+    context = {'encoding': 'utf-8'}
+    results = {'page_size': size, 'bytes': len(content)}
+    for name, renderer, parser in (('drf', JSONRenderer(), JSONParser()), ('orjson', ORJSONRenderer(), ORJSONParser())):
+        results[name] = {
+            'render_us': timed(lambda: renderer.render(data), rounds),
+            'parse_us': timed(lambda: parser.parse(io.BytesIO(content), parser_context=context), rounds),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'))
+        seed(max(args.page_sizes))
+        results = [measure(size, args.rounds) for size in args.page_sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'page':>6}{'bytes':>9}{'renderer':>10}{'render us':>11}{'parse us':>10}")
+    for result in results:
+        for name in ('drf', 'orjson'):
+            timing = result[name]
+            print(f"{result['page_size']:>6}{result['bytes']:>9}{name:>10}{timing['render_us']:>11}{timing['parse_us']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Per-request cost of reviews.metrics.MetricsMiddleware.
+
+Times a trivial view called through the middleware against the bare view,
+with and without SQL queries in the view (the middleware counts them through
+an execute wrapper), then the cost of one flush of a busy process's counts
+to the shared SQLite file.
+
+    python benchmarks/metrics_overhead.py --requests 20000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviereviewapi.settings')
+
+
+def setup_django(directory):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'bench.sqlite3')}
+    settings.METRICS_STORE = os.path.join(directory, 'metrics.sqlite3')
+    # Flushes are timed on their own
+    settings.METRICS_FLUSH_INTERVAL = 3600
+    django.setup()
+
+
+def view(queries):
+    from django.db import connection
+    from django.http import HttpResponse
+
+    def respond(request):
+        with connection.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+        return HttpResponse('ok')
+
+    return respond
+
+
+def timed(handler, request, count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        handler(request)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1e6, 2)
+
+
+def measure(count):
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from reviews import metrics
+
+    request = RequestFactory().get('/api/reviews/')
+    request.resolver_match = resolve('/api/reviews/')
+    results = []
+    for queries in (0, 10):
+        bare = view(queries)
+        plain = timed(bare, request, count)
+        instrumented = timed(metrics.MetricsMiddleware(bare), request, count)
+        results.append({'queries': queries, 'bare_us': plain, 'metrics_us': instrumented, 'overhead_us': round(instrumented - plain, 2)})
+
+    # A worker's counts over a flush interval: every route, method and status seen
+    for index in range(200):
+        metrics.increment('http_requests_total', route=f'route-{index}', method='GET', status=200)
+    started = time.perf_counter()
+    metrics.flush()
+    return {'requests': results, 'flush_200_series_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        results = measure(args.requests)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'queries':>8}{'bare us':>10}{'metrics us':>12}{'overhead us':>13}")
+    for result in results['requests']:
+        print(f"{result['queries']:>8}{result['bare_us']:>10}{result['metrics_us']:>12}{result['overhead_us']:>13}")
+    print(f"flush of 200 series: {results['flush_200_series_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
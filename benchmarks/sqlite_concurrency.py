@@ -0,0 +1,162 @@
+"""
+Concurrent write benchmark for the SQLite connection profiles.
+
+Several worker processes share one SQLite file and, for a fixed time, run the
+app's write paths the way the API views do (a review with its rating stats, a
+comment with the review's counter, each in ``transaction.atomic()``) mixed with
+list reads. Reports committed writes per second, "database is locked" errors
+and write latency for the SQLite defaults and for the tuned profile of
+moviereviewapi/db.py.
+
+    python benchmarks/sqlite_concurrency.py --workers 8 --seconds 5
+    python benchmarks/sqlite_concurrency.py --profile tuned --json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviereviewapi.settings')
+
+PROFILES = ('default', 'tuned')
+TITLES = ['Inception', 'Dunkirk', 'Heat', 'Alien', 'Up', 'Jaws', 'Rocky', 'Fargo']
+
+
+def setup_django(path, profile):
+    import django
+    from django.conf import settings
+
+    from moviereviewapi.db import sqlite_database
+
+    settings.DATABASES['default'] = sqlite_database(path, tuned=profile == 'tuned')
+    # Keep OMDB out of the measurement
+    settings.OMDB_API_KEY = ''
+    django.setup()
+
+
+def prepare(workers):
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+
+    from reviews.models import Review
+
+    call_command('migrate', verbosity=0)
+    for index in range(workers):
+        user = User.objects.create(username=f'bench{index}')
+        Review.objects.create(movie_title=random.choice(TITLES), review_content='seed', rating=3, user=user)
+    # Workers are forked, they must not share the parent's connection
+    connections.close_all()
+
+
+def worker(index, seconds, results):
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, transaction
+
+    from reviews.models import MovieRatingStats, Review, ReviewComment
+
+    user = User.objects.get(username=f'bench{index}')
+    review_ids = list(Review.objects.values_list('id', flat=True))
+    stats = {'writes': 0, 'reads': 0, 'locked': 0, 'latencies': []}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        operation = random.random()
+        started = time.perf_counter()
+        try:
+            if operation < 0.4:
+                list(Review.objects.select_related('user').order_by('-created_date')[:20])
+                stats['reads'] += 1
+                continue
+            if operation < 0.7:
+                with transaction.atomic():
+                    review = Review.objects.create(
+                        movie_title=random.choice(TITLES), review_content='bench', rating=random.randint(1, 5), user=user
+                    )
+                    MovieRatingStats.record(review.movie_id, review.rating, 1)
+            else:
+                review_id = random.choice(review_ids)
+                with transaction.atomic():
+                    ReviewComment.objects.create(user=user, review_id=review_id, content='bench')
+                    Review.adjust_counters(review_id, comments=1)
+            stats['writes'] += 1
+            stats['latencies'].append(time.perf_counter() - started)
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            stats['locked'] += 1
+    results.put(stats)
+
+
+def run(profile, workers, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        setup_django(path, profile)
+        prepare(workers)
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(index, seconds, results)) for index in range(workers)]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    latencies = sorted(latency for stats in collected for latency in stats['latencies'])
+    writes = sum(stats['writes'] for stats in collected)
+    attempted = writes + sum(stats['locked'] for stats in collected)
+    return {
+        'profile': profile,
+        'workers': workers,
+        'seconds': seconds,
+        'writes_per_second': round(writes / seconds, 1),
+        'reads_per_second': round(sum(stats['reads'] for stats in collected) / seconds, 1),
+        'locked_errors': attempted - writes,
+        'locked_ratio': round((attempted - writes) / attempted, 4) if attempted else 0.0,
+        'write_p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'write_p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=PROFILES + ('both',), default='both')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    parser.add_argument('--_child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._child:
+        # One profile per interpreter: Django's database settings are fixed at setup
+        print(json.dumps(run(args._child, args.workers, args.seconds)))
+        return
+
+    results = []
+    for profile in PROFILES if args.profile == 'both' else (args.profile,):
+        output = subprocess.run(
+            [sys.executable, __file__, '--_child', profile, '--workers', str(args.workers), '--seconds', str(args.seconds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'profile':<10}{'writes/s':>10}{'reads/s':>10}{'locked':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for result in results:
+        print(
+            f"{result['profile']:<10}{result['writes_per_second']:>10}{result['reads_per_second']:>10}"
+            f"{result['locked_errors']:>8}{result['write_p50_ms'] or '-':>9}{result['write_p99_ms'] or '-':>9}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Per-request cost and cross-process accuracy of the API throttles.
+
+Compares DRF's stock AnonRateThrottle (timestamp history in the Django cache,
+per-process LocMem here) with reviews.throttling.SharedAnonRateThrottle (GCRA
+buckets in a shared SQLite file):
+
+- overhead: microseconds per ``allow_request()`` for one client with a long
+  history (a high rate, the stock history grows with it) and for many clients;
+- accuracy: requests let through when several processes serve one client,
+  against a limit they should share.
+
+    python benchmarks/throttle_overhead.py --checks 20000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviereviewapi.settings')
+
+
+def setup_django(store):
+    import django
+    from django.conf import settings
+
+    settings.RATE_LIMIT_STORE = store
+    django.setup()
+
+
+def throttles(rate):
+    from rest_framework.throttling import AnonRateThrottle
+
+    from reviews.throttling import SharedAnonRateThrottle
+
+    classes = {'stock': AnonRateThrottle, 'shared': SharedAnonRateThrottle}
+    return {name: type(name, (cls,), {'rate': rate}) for name, cls in classes.items()}
+
+
+def request_from(address):
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+
+    return Request(RequestFactory().get('/api/reviews/', REMOTE_ADDR=address))
+
+
+def measure(throttle_class, requests):
+    timings = []
+    for request in requests:
+        started = time.perf_counter()
+        throttle_class().allow_request(request, None)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        'mean_us': round(statistics.fmean(timings) * 1e6, 1),
+        'p50_us': round(timings[len(timings) // 2] * 1e6, 1),
+        'p99_us': round(timings[int(len(timings) * 0.99)] * 1e6, 1),
+    }
+
+
+def overhead(checks):
+    from django.core.cache import cache
+
+    results = {}
+    for name, throttle_class in throttles(f'{checks}/hour').items():
+        cache.clear()
+        # One busy client: the stock history holds every request of the hour
+        hot = measure(throttle_class, [request_from('10.0.0.1')] * checks)
+        # Many clients, one request each
+        spread = measure(throttle_class, [request_from(f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}') for i in range(checks)])
+        results[name] = {'one_client': hot, 'many_clients': spread}
+    return results
+
+
+def hammer(name, rate, attempts, results):
+    throttle_class = throttles(rate)[name]
+    request = request_from('10.9.9.9')
+    results.put(sum(throttle_class().allow_request(request, None) for _ in range(attempts)))
+
+
+def accuracy(workers, limit):
+    from django.db import connections
+
+    from reviews.throttling import reset_store
+
+    connections.close_all()
+    reset_store()
+    context = multiprocessing.get_context('fork')
+    results = {}
+    for name in ('stock', 'shared'):
+        queue = context.Queue()
+        processes = [context.Process(target=hammer, args=(name, f'{limit}/hour', limit, queue)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        allowed = sum(queue.get() for _ in processes)
+        for process in processes:
+            process.join()
+        results[name] = {'limit': limit, 'workers': workers, 'allowed': allowed}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'ratelimit.sqlite3'))
+        results = {'overhead': overhead(args.checks), 'accuracy': accuracy(args.workers, args.limit)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'throttle':<10}{'scenario':<14}{'mean us':>9}{'p50 us':>9}{'p99 us':>9}")
+    for name, scenarios in results['overhead'].items():
+        for scenario, timing in scenarios.items():
+            print(f"{name:<10}{scenario:<14}{timing['mean_us']:>9}{timing['p50_us']:>9}{timing['p99_us']:>9}")
+    print()
+    for name, result in results['accuracy'].items():
+        print(f"{name:<10}{result['workers']} workers let {result['allowed']} requests through a limit of {result['limit']}")
+
+
+if __name__ == '__main__':
+    main()
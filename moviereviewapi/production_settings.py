@@ -3,7 +3,9 @@ Production settings for PythonAnywhere deployment
 """
 from .settings import *
 import os
-from decouple import config
+from decouple import Csv, config
+
+from .db import replica_databases, sqlite_database
 
 # Production settings
 DEBUG = False
@@ -29,13 +31,17 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/home/Kalanzaa/Movie-Review-API-/media'
 
-# Database configuration (SQLite is fine for small projects)
+# Database configuration (SQLite is fine for small projects), tuned for
+# several workers writing concurrently, see moviereviewapi/db.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': '/home/Kalanzaa/Movie-Review-API-/db.sqlite3',
-    }
+    'default': sqlite_database(
+        '/home/Kalanzaa/Movie-Review-API-/db.sqlite3',
+        busy_timeout=config('SQLITE_BUSY_TIMEOUT', default=5.0, cast=float),
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+    )
 }
+DATABASES.update(replica_databases(DATABASES['default'], config('SQLITE_REPLICAS', default='', cast=Csv())))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 
 # Secret key from environment variable (REQUIRED - no fallback for security)
 SECRET_KEY = config('SECRET_KEY')
@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
+
+from .db import replica_databases, sqlite_database
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,11 +48,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "reviews.metrics.MetricsMiddleware",
+    "reviews.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "reviews.replicas.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -78,13 +83,27 @@ WSGI_APPLICATION = "moviereviewapi.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_TUNED=True switches to the multi-worker profile of moviereviewapi.db
+# (WAL, busy timeout, BEGIN IMMEDIATE, persistent connections)
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": sqlite_database(
+        BASE_DIR / "db.sqlite3",
+        tuned=config('SQLITE_TUNED', default=False, cast=bool),
+        busy_timeout=config('SQLITE_BUSY_TIMEOUT', default=5.0, cast=float),
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+    ),
 }
 
+# Read replicas, SQLite files kept in sync with the primary (e.g. by Litestream,
+# or a copy for local testing), comma separated. GET requests read from them,
+# writes and the requests after a client's write go to "default", see
+# reviews/replicas.py. Other engines can be added to DATABASES by hand.
+DATABASES.update(replica_databases(DATABASES["default"], config('SQLITE_REPLICAS', default='', cast=Csv())))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["reviews.replicas.ReplicaRouter"]
+# Seconds a client reads from the primary after a write, so it sees its writes
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,18 +164,101 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Changed from IsAuthenticatedOrReadOnly
     ],
+    # Limits shared by all workers, see reviews/throttling.py
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'reviews.throttling.SharedAnonRateThrottle',
+        'reviews.throttling.SharedUserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
     },
+    # orjson drop-ins for DRF's JSON renderer and parser, see reviews/renderers.py
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'reviews.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'reviews.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
 # OMDB API Configuration
 OMDB_API_KEY = config('OMDB_API_KEY', default='')
+
+# OMDB response cache (seconds). "Not found" answers are cached briefly so a
+# mistyped title does not hit OMDB on every page view.
+OMDB_CACHE_ALIAS = 'default'
+OMDB_CACHE_TTL = config('OMDB_CACHE_TTL', default=60 * 60 * 24, cast=int)
+OMDB_SEARCH_CACHE_TTL = config('OMDB_SEARCH_CACHE_TTL', default=60 * 60, cast=int)
+OMDB_NEGATIVE_CACHE_TTL = config('OMDB_NEGATIVE_CACHE_TTL', default=5 * 60, cast=int)
+OMDB_CACHE_LOCK_TIMEOUT = 10
+
+# OMDB HTTP client: pooled keep-alive connections, timeouts (seconds), retries
+# with jittered backoff and a circuit breaker that fails fast while OMDB is down
+OMDB_CONNECT_TIMEOUT = config('OMDB_CONNECT_TIMEOUT', default=2.0, cast=float)
+OMDB_READ_TIMEOUT = config('OMDB_READ_TIMEOUT', default=4.0, cast=float)
+OMDB_MAX_RETRIES = config('OMDB_MAX_RETRIES', default=1, cast=int)
+OMDB_RETRY_BACKOFF = 0.25
+OMDB_POOL_MAXSIZE = 10
+OMDB_BREAKER_FAILURE_THRESHOLD = 5
+OMDB_BREAKER_RESET_TIMEOUT = 30.0
+
+# Item-to-item recommender: neighbours kept per movie, and how many new
+# reviews make "build_recommendations --if-stale" (run it from cron) rebuild
+RECOMMENDER_TOP_K = 20
+RECOMMENDER_REBUILD_EVERY = config('RECOMMENDER_REBUILD_EVERY', default=1000, cast=int)
+
+# Review full-text search engine, a dotted path to a reviews.search.SearchBackend.
+# Unset picks SQLite FTS5 on SQLite and plain icontains matching elsewhere.
+REVIEW_SEARCH_BACKEND = config('REVIEW_SEARCH_BACKEND', default='') or None
+
+# Comments embedded in each review of a listing; whole threads are paginated
+# at /api/reviews/<id>/comments/
+REVIEW_LATEST_COMMENTS = 3
+
+# Largest body accepted by POST /api/reviews/bulk/, use import_reviews beyond
+REVIEW_BULK_MAX_ROWS = 5000
+
+# Cache shared by the OMDB responses and the cached page fragments. The default
+# is per process: deployments with several workers need a shared backend (e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache) or a worker keeps
+# serving pages another worker's writes have invalidated.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# HTML fragments of the home, reviews list and review pages. Writes invalidate
+# them through model signals; the timeout only evicts superseded entries.
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Per-request SQL, OMDB and serializer timings as Server-Timing headers and log
+# lines on "reviews.instrumentation", for a sampled share (0..1) of requests.
+# Statements run this many times in one request are logged as likely N+1s.
+REQUEST_INSTRUMENTATION = config('REQUEST_INSTRUMENTATION', default=False, cast=bool)
+INSTRUMENTATION_SAMPLE_RATE = config('INSTRUMENTATION_SAMPLE_RATE', default=1.0, cast=float)
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=True, cast=bool)
+INSTRUMENTATION_REPEATED_QUERY_THRESHOLD = 5
+
+# Prometheus metrics at /metrics, counted by every worker and added up in a
+# SQLite file (next to the main database, or in BASE_DIR when it is not SQLite,
+# unless METRICS_STORE names one) every METRICS_FLUSH_INTERVAL seconds, see
+# reviews/metrics.py. When METRICS_TOKEN is set, scrapes must send
+# "Authorization: Bearer <token>".
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_STORE = config('METRICS_STORE', default='') or None
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# SQLite file holding the rate limit buckets of all workers; unset keeps it
+# next to the main database (db.ratelimit.sqlite3), or in BASE_DIR
+# (ratelimit.sqlite3) when the database is not SQLite
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default='') or None
+
+# Empties the rate limit buckets before every test
+TEST_RUNNER = 'moviereviewapi.test_runner.TestRunner'
@@ -0,0 +1,45 @@
+"""
+Test runner giving every test empty rate limit buckets.
+
+The shared throttles keep their state outside the test database (see
+reviews/throttling.py), so neither transactions nor flushes undo it: without
+this, requests of earlier tests count against the limits of later ones.
+"""
+import unittest
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Never touch a deployment's store file: with no RATE_LIMIT_STORE the
+        # in-memory test database gets an in-memory store. Changing the
+        # setting resets the store through throttling's setting_changed hook.
+        self.rate_limit_override = override_settings(RATE_LIMIT_STORE=None)
+        self.rate_limit_override.enable()
+
+    def setup_databases(self, **kwargs):
+        from reviews import throttling
+
+        old_config = super().setup_databases(**kwargs)
+        # A store opened before now would follow the real database, not the test one
+        throttling.reset_store()
+        return old_config
+
+    def teardown_test_environment(self, **kwargs):
+        self.rate_limit_override.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        from reviews import throttling
+
+        base = super().get_resultclass() or unittest.TextTestResult
+
+        class ThrottleResettingResult(base):
+            def startTest(self, test):
+                throttling.get_store().reset()
+                super().startTest(test)
+
+        return ThrottleResettingResult
@@ -1,9 +1,16 @@
 from django.contrib import admin
-from .models import Review, UserProfile, ReviewLike, ReviewComment
+from .models import Movie, Review, UserProfile, ReviewLike, ReviewComment
+
+@admin.register(Movie)
+class MovieAdmin(admin.ModelAdmin):
+    list_display = ('title', 'year', 'imdb_id', 'fetched_at')
+    search_fields = ('title', 'normalized_title', 'imdb_id')
+    readonly_fields = ('fetched_at',)
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('movie_title', 'rating', 'user', 'created_date')
+    list_select_related = ('user',)
     list_filter = ('rating', 'created_date', 'user')
     search_fields = ('movie_title', 'review_content', 'user__username')
     ordering = ('-created_date',)
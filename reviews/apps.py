@@ -1,6 +1,31 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def _ensure_search_index(using, **kwargs):
+    from .search import ensure_fts_index
+
+    ensure_fts_index(using)
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reviews"
+
+    def ready(self):
+        # Table rebuilds during migrate drop the FTS triggers, put them back
+        post_migrate.connect(_ensure_search_index, sender=self)
+
+        # Per-request query counts, see reviews/instrumentation.py
+        from .instrumentation import install
+
+        connection_created.connect(install)
+
+        # Cached page fragments follow every write made through the models
+        from . import page_cache
+
+        for signal in (post_save, post_delete):
+            signal.connect(page_cache.review_saved, sender=self.get_model('Review'))
+            signal.connect(page_cache.review_activity, sender=self.get_model('ReviewLike'))
+            signal.connect(page_cache.review_activity, sender=self.get_model('ReviewComment'))
@@ -0,0 +1,139 @@
+"""
+Async variants of the OMDB-bound endpoints for ASGI deployments.
+
+They are served under ``/api/async/`` and return the same JSON as their sync
+counterparts, but wait on OMDB through the httpx client without holding a
+worker thread, and run the database work and the OMDB call concurrently where
+the request allows it. DRF does not support async views, so these are plain
+Django views: authentication, throttling and content negotiation of the DRF
+stack do not apply to them.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.request import Request
+
+from .models import Review
+from .omdb_utils import afetch_movie_by_imdb_id, afetch_movie_info, asearch_movies
+from .renderers import ORJSONRenderer
+from .views import ReviewViewSet
+
+
+def _json(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def _review_viewset(request, action):
+    view = ReviewViewSet(action=action, format_kwarg=None, args=(), kwargs={})
+    view.request = Request(request)
+    return view
+
+
+@require_GET
+async def search_movies_async(request):
+    """
+    Async version of search_movies_view
+    Example: /api/async/search-movies-auth/?q=inception
+    """
+    query = request.GET.get('q', '')
+    if not query:
+        return _json({'error': 'Query parameter q is required'}, status=400)
+    movies = await asearch_movies(query)
+    if movies is not None:
+        return _json({'movies': movies})
+    return _json({'error': 'No movies found or API error'}, status=404)
+
+
+@require_GET
+async def search_movies_public_async(request):
+    """
+    Async version of search_movies_public
+    Example: /api/async/search-movies/?search=inception
+    """
+    query = request.GET.get('search', '')
+    if not query:
+        return _json({'error': 'Search parameter is required'}, status=400)
+    movies = await asearch_movies(query)
+    if movies is not None:
+        return _json(movies)
+    return _json({'error': 'No movies found or API error'}, status=404)
+
+
+@require_GET
+async def movie_details_async(request, imdb_id):
+    """
+    Async version of movie_details_view
+    Example: /api/async/movie-details/tt3896198/
+    """
+    movie_info = await afetch_movie_by_imdb_id(imdb_id)
+    if movie_info:
+        return _json(movie_info)
+    return _json({'error': 'Movie not found'}, status=404)
+
+
+@require_GET
+async def movie_info_async(request):
+    """
+    Async version of movie_info_view
+    Example: /api/async/movie-info/?title=inception
+    """
+    title = request.GET.get('title', '')
+    if not title:
+        return _json({'error': 'Title parameter is required'}, status=400)
+    movie_info = await afetch_movie_info(title)
+    if movie_info:
+        return _json(movie_info)
+    return _json({'error': 'Movie not found'}, status=404)
+
+
+@require_GET
+async def review_detail_async(request, pk):
+    """
+    Async version of ReviewViewSet.retrieve; films missing from the local
+    catalog are looked up on OMDB while the review is serialized
+    Example: /api/async/reviews/1/
+    """
+    view = _review_viewset(request, 'retrieve')
+    try:
+        instance = await view.get_queryset().aget(pk=pk)
+    except Review.DoesNotExist:
+        return _json({'detail': 'No Review matches the given query.'}, status=404)
+    serialize = sync_to_async(lambda: view.get_serializer(instance).data)
+    movie = instance.movie
+    if movie is not None and movie.omdb_data:
+        data, movie_info = await serialize(), movie.omdb_data
+    else:
+        data, movie_info = await asyncio.gather(serialize(), afetch_movie_info(instance.movie_title))
+        if movie is not None and movie_info:
+            await sync_to_async(movie.store_omdb)(movie_info)
+    data['movie_info'] = movie_info
+    return _json(data)
+
+
+@require_GET
+async def reviews_by_movie_async(request, title):
+    """
+    Async version of ReviewViewSet.reviews_by_movie; films missing from the
+    local catalog are looked up on OMDB while the review page is loaded
+    Example: /api/async/reviews/movie/inception/
+    """
+    view = _review_viewset(request, 'reviews_by_movie')
+    movie = await sync_to_async(view.get_movie)(title)
+    if movie is not None and movie.omdb_data:
+        paginator, reviews = await sync_to_async(view.movie_reviews_page)(movie)
+        movie_info = movie.omdb_data
+    else:
+        (paginator, reviews), movie_info = await asyncio.gather(
+            sync_to_async(view.movie_reviews_page)(movie),
+            afetch_movie_info(title),
+        )
+        if movie is not None and movie_info:
+            await sync_to_async(movie.store_omdb)(movie_info)
+    response = paginator.get_paginated_response({
+        'movie_info': movie_info,
+        'stats': view.stats_for(movie),
+        'reviews': reviews,
+    })
+    return _json(response.data)
@@ -0,0 +1,58 @@
+"""
+Conditional GET helpers.
+
+Views compute cheap validators (an ETag from a few narrow columns, optionally
+a Last-Modified time) before doing the expensive part of a request, and answer
+``If-None-Match`` / ``If-Modified-Since`` with a 304 without serializing
+anything or calling OMDB.
+"""
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """A strong ETag value from JSON-serializable parts, datetimes included"""
+    raw = json.dumps(parts, default=str, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """
+    The 304 response when the request's validators match ``etag`` /
+    ``last_modified`` (an aware datetime), else None
+    """
+    if request.method not in ('GET', 'HEAD') or not (etag or last_modified):
+        return None
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag) if etag else None,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(response, etag=None, last_modified=None):
+    """
+    Send the validators of a 200/304 response, with ``Cache-Control: no-cache``
+    so clients and CDNs store the body but revalidate before reusing it
+    """
+    if response.status_code in (200, 304):
+        if etag:
+            response['ETag'] = quote_etag(etag)
+        if last_modified:
+            response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional(request, build, etag=None, last_modified=None):
+    """``not_modified()`` or else the response ``build()`` makes, with its validators"""
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = add_validators(build(), etag, last_modified)
+    return response
@@ -0,0 +1,76 @@
+"""
+Streaming review export, shared by ``GET /api/reviews/export/`` and the
+``export_reviews`` management command.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` in primary key
+order and encoded one at a time, so memory stays flat whatever the size of
+the export. Like and comment counts come from the denormalized counters and
+the author's username from a join, no per-review queries.
+"""
+import csv
+import datetime
+import json
+
+from .filters import filter_reviews
+from .models import Review
+from .omdb_utils import normalize_title
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+COLUMNS = [
+    ('id', 'id'),
+    ('movie_title', 'movie_title'),
+    ('imdb_id', 'movie__imdb_id'),
+    ('review_content', 'review_content'),
+    ('rating', 'rating'),
+    ('user', 'user__username'),
+    ('created_date', 'created_date'),
+    ('likes_count', 'likes_count'),
+    ('comments_count', 'comments_count'),
+]
+CHUNK_SIZE = 2000
+
+
+def export_queryset(params):
+    """
+    Reviews to export, filtered by ``movie`` (title, case-insensitive),
+    ``user`` (username) and the shared rating/date filters of filter_reviews
+    """
+    queryset = Review.objects.all()
+    if params.get('movie'):
+        queryset = queryset.filter(movie__normalized_title=normalize_title(params['movie']))
+    if params.get('user'):
+        queryset = queryset.filter(user__username=params['user'])
+    queryset = filter_reviews(queryset, params)
+    return queryset.order_by('id').values_list(*(lookup for _, lookup in COLUMNS))
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+
+
+def ndjson_lines(queryset):
+    names = [name for name, _ in COLUMNS]
+    for row in iter_rows(queryset):
+        yield json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like sink that hands back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in COLUMNS])
+    for row in iter_rows(queryset):
+        yield writer.writerow(row)
+
+
+def export_lines(queryset, format):
+    return ndjson_lines(queryset) if format == 'ndjson' else csv_lines(queryset)
@@ -0,0 +1,83 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .search import get_search_backend
+
+
+def _parse_bound(name, value, end=False):
+    """
+    ``(moment, exclusive)`` for a range bound, ``moment`` an aware datetime. A
+    bare date stands for the whole day, so as an upper bound (``end``) it
+    becomes midnight of the following day and ``exclusive`` is True.
+    """
+    try:
+        # Dates first: parse_datetime() also accepts a bare date, as midnight
+        day = parse_date(value)
+        if day is not None:
+            exclusive = end
+            moment = datetime.datetime.combine(day + datetime.timedelta(days=int(end)), datetime.time())
+        else:
+            exclusive = False
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError
+    except ValueError:
+        raise ValidationError({name: 'Use an ISO 8601 date or datetime.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, exclusive
+
+
+def filter_reviews(queryset, params):
+    """
+    The filters shared by the review listings: ``?rating=`` (repeatable) and
+    the ``?created_after=`` / ``?created_before=`` range, both ends inclusive
+    """
+    ratings = params.getlist('rating')
+    if ratings:
+        try:
+            ratings = [int(rating) for rating in ratings]
+        except ValueError:
+            ratings = None
+        if ratings is None or not all(1 <= rating <= 5 for rating in ratings):
+            raise ValidationError({'rating': 'Ratings are whole numbers from 1 to 5.'})
+        queryset = queryset.filter(rating__in=ratings)
+    if params.get('created_after'):
+        start, _ = _parse_bound('created_after', params['created_after'])
+        queryset = queryset.filter(created_date__gte=start)
+    if params.get('created_before'):
+        end, exclusive = _parse_bound('created_before', params['created_before'], end=True)
+        queryset = queryset.filter(**{'created_date__lt' if exclusive else 'created_date__lte': end})
+    return queryset
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for ``SearchFilter`` backed by the full-text index in
+    reviews.search. Matches are ranked by relevance unless the request asks
+    for an explicit ``?ordering=``, which OrderingFilter then applies.
+    """
+    search_param = 'search'
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_terms(request)
+        if not query:
+            return queryset
+        queryset = get_search_backend(queryset.db).filter(queryset, query)
+        return queryset.order_by('search_rank', '-id')
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search over movie titles and review text.',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,69 @@
+"""
+Bulk review ingestion, shared by ``POST /api/reviews/bulk/`` and the
+``import_reviews`` management command.
+
+Rows are validated with the same ReviewSerializer as single creates, then
+written in transactional batches: one query resolves the batch's titles to
+catalog movies (creating the new ones in bulk), one ``bulk_create`` inserts the
+reviews, and the per-movie rating aggregates get one UPDATE per movie. The FTS
+index follows through its triggers. Rows are consumed lazily, so an import of
+any size holds a single batch in memory.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import page_cache
+from .models import Movie, MovieRatingStats, Review
+from .omdb_utils import normalize_title
+from .serializers import ReviewSerializer
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def ingest_reviews(rows, user=None, batch_size=DEFAULT_BATCH_SIZE, on_error=None, on_batch=None, context=None):
+    """
+    Validate and insert ``rows``, an iterable of ``(row_number, data)`` pairs.
+
+    Invalid rows are skipped and reported as ``{'row': row_number, 'errors': ...}``,
+    to ``on_error`` when given (so nothing accumulates) or in the returned list.
+    ``on_batch(created)`` is called after every committed batch.
+    Returns ``(created, errors)``.
+    """
+    serializer = ReviewSerializer(context=context or {})
+    errors = []
+    report = on_error or errors.append
+    created = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        valid = []
+        for row_number, data in batch:
+            try:
+                valid.append(serializer.run_validation(data))
+            except ValidationError as exc:
+                report({'row': row_number, 'errors': exc.detail})
+        if valid:
+            created += _insert(valid, user)
+            if on_batch is not None:
+                on_batch(created)
+    if created:
+        # bulk_create sends no post_save, refresh the cached listings here
+        page_cache.bump('reviews')
+    return created, errors
+
+
+def _insert(valid, user):
+    with transaction.atomic():
+        movie_ids = Movie.objects.ids_for_titles(data['movie_title'] for data in valid)
+        reviews = [
+            Review(user=user, movie_id=movie_ids[normalize_title(data['movie_title'])], **data)
+            for data in valid
+        ]
+        Review.objects.bulk_create(reviews)
+        deltas = defaultdict(lambda: defaultdict(int))
+        for review in reviews:
+            deltas[review.movie_id][review.rating] += 1
+        MovieRatingStats.record_batch(deltas)
+    return len(reviews)
@@ -0,0 +1,265 @@
+"""
+Per-request instrumentation: SQL queries, OMDB calls and serializer time.
+
+InstrumentationMiddleware (``REQUEST_INSTRUMENTATION``) collects, for a
+sampled share of requests (``INSTRUMENTATION_SAMPLE_RATE``):
+
+- the number of SQL queries and the time spent in the database, through an
+  execute wrapper installed on every connection;
+- the number and duration of OMDB lookups (``timed('omdb')`` in omdb_utils);
+- the time spent turning models into response data (``timed('serializer')``
+  in the serializers and the list projections);
+- queries whose SQL ran ``INSTRUMENTATION_REPEATED_QUERY_THRESHOLD`` times or
+  more in the request, the signature of an N+1 lookup.
+
+Each request then gets a ``Server-Timing`` header (browser devtools show it
+next to the request) and one ``key=value`` line on the
+``reviews.instrumentation`` logger, with the same figures as a dict in the
+record's ``instrumentation`` attribute for JSON formatters. Repeated queries
+are logged as warnings with their SQL.
+
+``query_budget()`` applies the same collection to a block of code, so tests
+can bound the queries an endpoint makes without pinning their exact number.
+"""
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+# Collectors recording the current request or block, innermost last
+_collectors = ContextVar('instrumentation_collectors', default=())
+# Kinds timed by an enclosing timed() block, whose inner blocks are not counted again
+_open = ContextVar('instrumentation_open', default=frozenset())
+
+
+def sampled():
+    """Whether to instrument the request starting now"""
+    if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+        return False
+    rate = getattr(settings, 'INSTRUMENTATION_SAMPLE_RATE', 1.0)
+    return rate >= 1 or random.random() < rate
+
+
+def repeated_query_threshold():
+    return getattr(settings, 'INSTRUMENTATION_REPEATED_QUERY_THRESHOLD', 5)
+
+
+class Collector:
+    """What the code run under ``collect()`` did"""
+    # Created for every request the metrics count, kept cheap
+    __slots__ = ('queries', 'db_time', 'statements', 'counts', 'durations')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = {}
+        self.counts = {}
+        self.durations = {}
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def add(self, kind, duration):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.durations[kind] = self.durations.get(kind, 0.0) + duration
+
+    def most_common(self):
+        """[(sql, times)] of every statement, most frequent first"""
+        return Counter(self.statements).most_common()
+
+    def repeated(self, threshold=None):
+        """[(sql, times)] of the statements run at least ``threshold`` times, most frequent first"""
+        if threshold is None:
+            threshold = repeated_query_threshold()
+        return [(sql, count) for sql, count in self.most_common() if count >= threshold]
+
+    def summary(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'repeated_queries': sum(count for _, count in self.repeated()),
+            'omdb_calls': self.counts.get('omdb', 0),
+            'omdb_ms': round(self.durations.get('omdb', 0.0) * 1000, 2),
+            'serializer_ms': round(self.durations.get('serializer', 0.0) * 1000, 2),
+        }
+
+
+def _record_query(execute, sql, params, many, context):
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for collector in collectors:
+            collector.add_query(sql, duration)
+
+
+def install(connection, **kwargs):
+    """
+    Put the query recorder on ``connection``; a connection_created receiver,
+    so every connection opened once the app is ready is covered
+    """
+    # First in line: connection.execute_wrapper() blocks pop the last wrapper
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+@contextmanager
+def collect():
+    """Record the queries and timed blocks run inside the block into the yielded Collector"""
+    collector = Collector()
+    token = _collectors.set((*_collectors.get(), collector))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def timed(kind):
+    """
+    Count the block as one ``kind`` operation and add its duration, unless an
+    enclosing block already times ``kind`` (a serializer nested in another)
+    """
+    open_kinds = _open.get()
+    collectors = _collectors.get()
+    if not collectors or kind in open_kinds:
+        yield
+        return
+    token = _open.set(open_kinds | {kind})
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        _open.reset(token)
+        for collector in collectors:
+            collector.add(kind, duration)
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time a serializer spends representing instances to the request's
+    serializer time; a list counts once per item, nested serializers not at all
+    """
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+def server_timing(collector, total):
+    """A Server-Timing header value for ``collector`` over a request of ``total`` seconds"""
+    summary = collector.summary()
+    db = f'{summary["queries"]} queries'
+    if summary['repeated_queries']:
+        db += f', {summary["repeated_queries"]} repeated'
+    metrics = [
+        f'db;dur={summary["db_ms"]};desc="{db}"',
+        f'serializer;dur={summary["serializer_ms"]}',
+    ]
+    if summary['omdb_calls']:
+        metrics.append(f'omdb;dur={summary["omdb_ms"]};desc="{summary["omdb_calls"]} calls"')
+    metrics.append(f'total;dur={round(total * 1000, 2)}')
+    return ', '.join(metrics)
+
+
+@contextmanager
+def query_budget(max_queries, max_repeated=None):
+    """
+    Fail with AssertionError when the block runs more than ``max_queries``
+    queries, or any statement more than ``max_repeated`` times:
+
+        with query_budget(4, max_repeated=1):
+            self.client.get('/api/reviews/')
+    """
+    with collect() as collector:
+        yield collector
+    problems = []
+    if collector.queries > max_queries:
+        problems.append(f'{collector.queries} queries, over the budget of {max_queries}')
+    if max_repeated is not None and collector.repeated(max_repeated + 1):
+        problems.append(f'statements run more than {max_repeated} time(s)')
+    if problems:
+        statements = '\n'.join(f'{count}x {sql}' for sql, count in collector.most_common())
+        raise AssertionError(f"{' and '.join(problems)}:\n{statements}")
+
+
+class QueryBudgetMixin:
+    """TestCase helpers on top of query_budget()"""
+
+    def assertQueryBudget(self, max_queries, max_repeated=None):
+        return query_budget(max_queries, max_repeated)
+
+    def assertEndpointQueryBudget(self, path, max_queries, max_repeated=None, method='get', **kwargs):
+        """Request ``path`` with the test client and check its queries, returns the response"""
+        with query_budget(max_queries, max_repeated):
+            response = getattr(self.client, method)(path, **kwargs)
+        return response
+
+
+class InstrumentationMiddleware:
+    """
+    Instruments a sampled share of requests, see the module docstring. Put it
+    first in MIDDLEWARE so the total covers the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not sampled():
+            return self.get_response(request)
+        started = time.perf_counter()
+        with collect() as collector:
+            response = self.get_response(request)
+        return self.process_response(request, response, collector, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not sampled():
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with collect() as collector:
+            response = await self.get_response(request)
+        return self.process_response(request, response, collector, time.perf_counter() - started)
+
+    def process_response(self, request, response, collector, total):
+        # Streamed bodies are produced after this point and not covered
+        if getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', True):
+            response[SERVER_TIMING_HEADER] = server_timing(collector, total)
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            **collector.summary(),
+        }
+        logger.info(' '.join(f'{key}={value}' for key, value in record.items()), extra={'instrumentation': record})
+        for sql, count in collector.repeated():
+            logger.warning(
+                "Query ran %d times in %s %s, likely an N+1 lookup: %s",
+                count, request.method, request.path, sql, extra={'instrumentation': record},
+            )
+        return response
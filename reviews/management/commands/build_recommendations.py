@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import recommender
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed item-to-item movie similarity table used by /api/reviews/recommendations/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help="Neighbours to keep per movie")
+        parser.add_argument(
+            '--if-stale', action='store_true',
+            help="Only rebuild once RECOMMENDER_REBUILD_EVERY reviews have arrived since the last build (for cron)",
+        )
+
+    def handle(self, *args, **options):
+        if options['if_stale'] and not recommender.is_stale():
+            self.stdout.write(f"Up to date, {recommender.pending_reviews()} new review(s) since the last build")
+            return
+        started = time.monotonic()
+        written = recommender.rebuild(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} similarity row(s) in {time.monotonic() - started:.2f}s"
+        ))
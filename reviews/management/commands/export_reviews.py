@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from reviews.export import FORMATS, export_lines, export_queryset
+
+
+class Command(BaseCommand):
+    help = "Stream reviews to a file or standard output as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', default='-', help="File to write, '-' for standard output")
+        parser.add_argument('--movie', help="Only reviews of this title (case-insensitive)")
+        parser.add_argument('--user', help="Only reviews by this username")
+        parser.add_argument('--rating', type=int, action='append', help="Only this rating, repeatable")
+        parser.add_argument('--created-after', help="ISO date or datetime, inclusive")
+        parser.add_argument('--created-before', help="ISO date or datetime, inclusive")
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for name in ('movie', 'user', 'created_after', 'created_before'):
+            if options[name]:
+                params[name] = options[name]
+        params.setlist('rating', [str(rating) for rating in options['rating'] or []])
+        try:
+            queryset = export_queryset(params)
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        if options['output'] == '-':
+            self.export(queryset, options['format'], lambda line: self.stdout.write(line, ending=''))
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+            rows = self.export(queryset, options['format'], handle.write)
+        self.stdout.write(self.style.SUCCESS(f"Exported {rows} review(s) to {options['output']}"))
+
+    def export(self, queryset, format, write):
+        lines = 0
+        for line in export_lines(queryset, format):
+            write(line)
+            lines += 1
+        # Minus the CSV header
+        return lines - (format == 'csv')
@@ -0,0 +1,66 @@
+import json
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ingest import DEFAULT_BATCH_SIZE, ingest_reviews
+
+
+class Command(BaseCommand):
+    help = "Import reviews from a JSON Lines file (one review object per line), streaming it in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL file to import, '-' reads standard input")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Reviews per transaction")
+        parser.add_argument('--user', default=None, help="Username the imported reviews are attributed to")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        self.failed = 0
+        started = time.monotonic()
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            created, _ = ingest_reviews(
+                self.rows(stream),
+                user=user,
+                batch_size=options['batch_size'],
+                on_error=self.report,
+                on_batch=self.progress if options['verbosity'] > 1 else None,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} review(s), skipped {self.failed} invalid line(s) "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+        ))
+
+    def rows(self, stream):
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                self.report({'row': number, 'errors': f"invalid JSON: {exc}"})
+
+    def report(self, error):
+        self.failed += 1
+        self.stderr.write(f"line {error['row']}: {error['errors']}")
+
+    def progress(self, created):
+        self.stdout.write(f"{created} review(s) imported...")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import MovieRatingStats
+
+
+class Command(BaseCommand):
+    help = "Verify or rebuild the per-movie rating aggregates from the review table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only report movies whose aggregates have drifted, do not write anything",
+        )
+
+    def handle(self, *args, **options):
+        drifted = MovieRatingStats.objects.drifted()
+        if options['verify']:
+            self.stdout.write(f"{len(drifted)} movie(s) have drifted rating aggregates")
+            if drifted:
+                self.stdout.write("Drifted movie ids: " + ", ".join(map(str, drifted[:50])))
+                raise SystemExit(1)
+            return
+
+        with transaction.atomic():
+            written = MovieRatingStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rating aggregates for {written} movie(s), {len(drifted)} had drifted"
+        ))
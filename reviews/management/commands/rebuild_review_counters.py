@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews import page_cache
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized likes_count/comments_count columns on Review from the like and comment rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report reviews whose counters have drifted, do not write anything",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Review.objects.drifted().count()
+        if options['check']:
+            self.stdout.write(f"{drifted} review(s) have drifted counters")
+            if drifted:
+                raise SystemExit(1)
+            return
+
+        with transaction.atomic():
+            updated = Review.objects.rebuild_counters()
+        if updated:
+            page_cache.invalidate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt counters for {updated} review(s), {drifted} had drifted"
+        ))
@@ -0,0 +1,235 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reviews import page_cache, recommender
+from reviews.models import Movie, MovieRatingStats, Review, ReviewComment, ReviewLike
+from reviews.omdb_utils import normalize_title
+
+# Share of each star rating, most reviews are favourable
+RATING_WEIGHTS = [0.06, 0.09, 0.18, 0.34, 0.33]
+GENRES = ['Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Fantasy', 'Horror', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller']
+# Review vocabulary, most frequent first: words are drawn Zipf-distributed
+# from these and a few thousand made-up ones, as in real text
+WORDS = (
+    'the a and of it film movie is this story but with cast plot score scene ending director '
+    'performance camera slow tense moving brilliant dull clever twist character dialogue pacing '
+    'visual sound memorable overlong charming dark funny quiet loud bold tender honest messy '
+    'gorgeous flat sharp'
+).split()
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sa', 'tor', 'vel', 'un', 'dra', 'pe', 'quin', 'zo', 'ash', 'bri', 'mor']
+VOCABULARY = WORDS + [
+    SYLLABLES[index % 15] + SYLLABLES[index // 15 % 15] + SYLLABLES[index // 225 % 15]
+    for index in range(3000)
+]
+
+
+def zipf_weights(count, skew):
+    """Cumulative weights of ranks 1..count under a Zipf law of exponent ``skew``"""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def movie_payload(index):
+    """An OMDB style payload for the ``index``-th catalog film, also served by the OMDB stub"""
+    title = f'Benchmark Movie {index:05d}'
+    return {
+        'Title': title,
+        'Year': str(1970 + index % 55),
+        'imdbID': f'tt9{index:07d}',
+        'Type': 'movie',
+        'Plot': f'Plot of {title}.',
+        'Director': f'Director {index % 97}',
+        'Genre': ', '.join(GENRES[(index + step) % len(GENRES)] for step in range(1 + index % 3)),
+        'imdbRating': f'{5 + index % 50 / 10:.1f}',
+        'Poster': f'https://example.com/posters/{index}.jpg',
+        'Response': 'True',
+    }
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk inserts keep the generated dates of auto_now(_add) fields"""
+    fields = [field for model in models for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, movies, reviews, likes and comments for load tests. "
+        "Popularity is Zipf-skewed: a few users write most reviews, a few films get most of them "
+        "and a few reviews collect most likes and comments. The same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--movies', type=int, default=500)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--likes', type=int, default=50000, help="Total likes, at most one per user and review")
+        parser.add_argument('--comments', type=int, default=20000, help="Total comments")
+        parser.add_argument('--skew', type=float, default=0.8, help="Zipf exponent of every popularity distribution")
+        parser.add_argument('--anonymous', type=float, default=0.05, help="Share of reviews without an author")
+        parser.add_argument('--days', type=int, default=365, help="Reviews are spread over this many past days")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per INSERT batch")
+        parser.add_argument('--prefix', default='bench', help="Usernames are <prefix><n>")
+
+    def handle(self, *args, **options):
+        for name in ('users', 'movies', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive")
+        if min(options['reviews'], options['likes'], options['comments'], options['days']) < 0:
+            raise CommandError("Counts and --days cannot be negative")
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f"Users named {options['prefix']}* exist already, pick another --prefix or a fresh database")
+        if Movie.objects.filter(normalized_title__startswith=normalize_title('Benchmark Movie')).exists():
+            raise CommandError("The database holds benchmark movies already, seed a fresh database")
+
+        self.verbosity = options['verbosity']
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        self.now = timezone.now()
+        self.word_weights = zipf_weights(len(VOCABULARY), 1.0)
+        started = time.monotonic()
+
+        with transaction.atomic(), explicit_timestamps(User, Review, ReviewLike, ReviewComment):
+            user_ids = self.create_users(options['users'], options['prefix'], options['days'])
+            movie_ids = self.create_movies(options['movies'])
+            likes, comments = self.spread(options['reviews'], options['likes'], options['comments'], options['users'])
+            reviews = self.create_reviews(user_ids, movie_ids, likes, comments, options['anonymous'], options['days'])
+            self.create_likes(reviews, likes, user_ids)
+            self.create_comments(reviews, comments, user_ids)
+            MovieRatingStats.objects.rebuild()
+        similarities = recommender.rebuild()
+        page_cache.invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(user_ids)} user(s), {len(movie_ids)} movie(s), {len(reviews)} review(s), "
+            f"{sum(likes)} like(s), {sum(comments)} comment(s) and {similarities} similarity row(s) "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def log(self, message):
+        if self.verbosity > 1:
+            self.stdout.write(message)
+
+    def moment(self, days):
+        return self.now - timedelta(seconds=self.random.random() * days * 86400)
+
+    def create_users(self, count, prefix, days):
+        # Hashing a password per user would dominate the run
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            (User(username=f'{prefix}{index}', password=password, date_joined=self.moment(days + 30)) for index in range(count)),
+            batch_size=self.batch_size,
+        )
+        self.log(f"{len(users)} users")
+        return [user.pk for user in users]
+
+    def create_movies(self, count):
+        movies = []
+        for index in range(count):
+            data = movie_payload(index)
+            movies.append(Movie(
+                imdb_id=data['imdbID'], title=data['Title'], normalized_title=normalize_title(data['Title']),
+                year=data['Year'], poster=data['Poster'], plot=data['Plot'], omdb_data=data, fetched_at=self.now,
+            ))
+        movies = Movie.objects.bulk_create(movies, batch_size=self.batch_size)
+        self.log(f"{len(movies)} movies")
+        return [movie.pk for movie in movies]
+
+    def spread(self, reviews, likes, comments, users):
+        """Likes and comments per review, Zipf-skewed over a random popularity order"""
+        if not reviews:
+            return [], []
+        weights = zipf_weights(reviews, self.skew)
+
+        def counts(total, cap=None):
+            order = list(range(reviews))
+            self.random.shuffle(order)
+            per_review = [0] * reviews
+            for rank in self.random.choices(range(reviews), cum_weights=weights, k=total):
+                per_review[order[rank]] += 1
+            if cap is not None:
+                per_review = [min(count, cap) for count in per_review]
+            return per_review
+
+        # One like per user and review
+        return counts(likes, cap=users), counts(comments)
+
+    def create_reviews(self, user_ids, movie_ids, likes, comments, anonymous, days):
+        count = len(likes)
+        authors = self.random.choices(user_ids, cum_weights=zipf_weights(len(user_ids), self.skew), k=count)
+        movies = self.random.choices(movie_ids, cum_weights=zipf_weights(len(movie_ids), self.skew), k=count)
+        ratings = self.random.choices(range(1, 6), weights=RATING_WEIGHTS, k=count)
+        # Ids grow with time, as they would in production
+        dates = sorted(self.moment(days) for _ in range(count))
+        titles = dict(Movie.objects.filter(pk__in=movie_ids).values_list('pk', 'title'))
+
+        reviews = []
+        for start in range(0, count, self.batch_size):
+            batch = [
+                Review(
+                    movie_title=titles[movies[index]], movie_id=movies[index],
+                    review_content=self.text(20, 120), rating=ratings[index],
+                    user_id=None if self.random.random() < anonymous else authors[index],
+                    created_date=dates[index], updated_at=dates[index],
+                    likes_count=likes[index], comments_count=comments[index],
+                )
+                for index in range(start, min(start + self.batch_size, count))
+            ]
+            reviews.extend((review.pk, review.created_date) for review in Review.objects.bulk_create(batch))
+            self.log(f"{len(reviews)}/{count} reviews")
+        return reviews
+
+    def create_likes(self, reviews, likes, user_ids):
+        def rows():
+            for (review_id, created), count in zip(reviews, likes):
+                for user_id in self.random.sample(user_ids, count):
+                    yield ReviewLike(review_id=review_id, user_id=user_id, created_at=self.after(created))
+
+        self.insert(ReviewLike, rows(), 'likes')
+
+    def create_comments(self, reviews, comments, user_ids):
+        def rows():
+            for (review_id, created), count in zip(reviews, comments):
+                for _ in range(count):
+                    yield ReviewComment(
+                        review_id=review_id, user_id=self.random.choice(user_ids),
+                        content=self.text(5, 40), created_at=self.after(created),
+                    )
+
+        self.insert(ReviewComment, rows(), 'comments')
+
+    def insert(self, model, rows, label):
+        batch, inserted = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                inserted += len(model.objects.bulk_create(batch))
+                batch = []
+                self.log(f"{inserted} {label}")
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def after(self, moment):
+        return min(moment + timedelta(seconds=self.random.random() * 7 * 86400), self.now)
+
+    def text(self, shortest, longest):
+        words = self.random.choices(VOCABULARY, cum_weights=self.word_weights, k=self.random.randint(shortest, longest))
+        return ' '.join(words).capitalize() + '.'
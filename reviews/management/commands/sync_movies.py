@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from reviews.models import Movie
+from reviews.omdb_utils import fetch_movie_info
+
+
+class Command(BaseCommand):
+    help = "Fill the local Movie catalog with OMDB metadata for films that have not been resolved yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh-days',
+            type=int,
+            default=None,
+            help="Also re-fetch films whose metadata is older than this many days",
+        )
+        parser.add_argument('--limit', type=int, default=None, help="Process at most this many films")
+
+    def handle(self, *args, **options):
+        pending = Q(fetched_at__isnull=True)
+        if options['refresh_days'] is not None:
+            pending |= Q(fetched_at__lt=timezone.now() - timedelta(days=options['refresh_days']))
+        movies = Movie.objects.filter(pending).order_by('id')
+        if options['limit']:
+            movies = movies[:options['limit']]
+
+        resolved = missing = 0
+        for movie in movies.iterator():
+            data = fetch_movie_info(movie.title)
+            if data:
+                movie.store_omdb(data)
+                resolved += 1
+            else:
+                missing += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Resolved {resolved} film(s), {missing} not found on OMDB or OMDB unavailable"
+        ))
@@ -0,0 +1,401 @@
+"""
+Prometheus metrics shared by every worker process.
+
+Requests, OMDB lookups, cache lookups and throttle rejections are counted in
+memory by the process that sees them: a dict update under a lock, no I/O on
+the request path. A background thread of each process adds what it counted
+since the last round to a small SQLite file every ``METRICS_FLUSH_INTERVAL``
+seconds (one UPSERT per series, in one transaction), so the file holds the
+totals of all workers, across restarts too. ``/metrics`` adds the serving
+process's latest counts and renders the file in the Prometheus text format;
+other workers show up to one flush interval late.
+
+The file lives next to the main database unless ``METRICS_STORE`` names one,
+in BASE_DIR when the main database is not SQLite, and in memory when the main
+database is (the test database), like the rate limit store of
+reviews/throttling.py.
+
+Series:
+
+- ``http_requests_total{route,method,status}`` and
+  ``http_request_duration_seconds{route,method}``, routes being URL names;
+- ``http_request_db_queries_total{route}`` and ``http_request_db_seconds_total{route}``;
+- ``omdb_requests_total{outcome}`` and ``omdb_request_duration_seconds``;
+- ``omdb_cache_events_total{event}`` and ``page_cache_lookups_total{page,result}``,
+  with ``omdb_cache_hit_ratio`` and ``page_cache_hit_ratio`` derived from them;
+- ``throttle_rejections_total{scope}``;
+- ``omdb_circuit_breaker_open``, as seen by the process serving the scrape.
+"""
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.signals import setting_changed
+
+from . import instrumentation
+from .omdb_client import CircuitBreaker, CircuitOpen, get_client
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS metric (name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL, '
+    'value REAL NOT NULL, PRIMARY KEY (name, labels, le)) WITHOUT ROWID'
+)
+ADD_SQL = (
+    'INSERT INTO metric (name, labels, le, value) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value'
+)
+
+# Seconds; request latency, then OMDB latency (which includes retries)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+OMDB_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'})
+
+# name: (type, help, histogram buckets)
+FAMILIES = {
+    'http_requests_total': ('counter', 'Requests served, by URL name, method and status code', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency, by URL name and method', REQUEST_BUCKETS),
+    'http_request_db_queries_total': ('counter', 'SQL queries run while serving requests, by URL name', None),
+    'http_request_db_seconds_total': ('counter', 'Time spent in SQL queries while serving requests, by URL name', None),
+    'omdb_requests_total': ('counter', 'OMDB lookups past the cache, by outcome', None),
+    'omdb_request_duration_seconds': ('histogram', 'OMDB lookup latency, retries included', OMDB_BUCKETS),
+    'omdb_cache_events_total': ('counter', 'OMDB cache hits, misses, fills, waits on a concurrent fill and errors', None),
+    'page_cache_lookups_total': ('counter', 'Lookups of cached pages and page fragments (home, reviews_list, review_detail), by page and result', None),
+    'throttle_rejections_total': ('counter', 'Requests rejected by the rate limits, by scope', None),
+}
+
+
+def label_string(**labels):
+    """``labels`` in the exposition format, keys in the given order"""
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@lru_cache(maxsize=None)
+def _bounds(buckets):
+    return [*map(format_value, buckets), '+Inf']
+
+
+def bucket_bound(value, buckets):
+    """The ``le`` label of the bucket ``value`` falls in"""
+    return _bounds(buckets)[bisect_left(buckets, value)]
+
+
+class SQLiteMetricsStore:
+    """Series totals in a SQLite file, one connection per thread of each process"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False, uri=True)
+        for pragma in ('journal_mode=WAL', 'synchronous=OFF', 'temp_store=MEMORY'):
+            conn.execute(f'PRAGMA {pragma}')
+        conn.execute(SCHEMA)
+        return conn
+
+    @property
+    def conn(self):
+        local = self._local
+        # Connections must not cross a fork
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn, local.pid = self.connect(), os.getpid()
+        return local.conn
+
+    def add(self, deltas):
+        """Add ``{(name, labels, le): value}`` to the totals"""
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(ADD_SQL, [(*key, value) for key, value in deltas.items()])
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def totals(self):
+        return {tuple(row[:3]): row[3] for row in self.conn.execute('SELECT name, labels, le, value FROM metric')}
+
+    def reset(self):
+        self.conn.execute('DELETE FROM metric')
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            self._local.pid = None
+
+
+def store_path():
+    """
+    ``METRICS_STORE``, else next to the main SQLite file, else in BASE_DIR
+    for a server-side database; in memory only with an in-memory database
+    """
+    path = getattr(settings, 'METRICS_STORE', None)
+    if path:
+        return str(path)
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        return str(Path(getattr(settings, 'BASE_DIR', '.')) / 'metrics.sqlite3')
+    name = str(connection.settings_dict['NAME'])
+    if 'mode=memory' in name or name == ':memory:':
+        return 'file:metrics?mode=memory&cache=shared'
+    return str(Path(name).with_suffix('.metrics.sqlite3'))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteMetricsStore(store_path())
+    return _store
+
+
+def reset_store():
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+
+
+def _reset_on_setting_change(setting, **kwargs):
+    if setting in ('METRICS_STORE', 'DATABASES'):
+        reset_store()
+
+
+setting_changed.connect(_reset_on_setting_change)
+
+
+# Counts of this process not yet in the store, and the thread flushing them
+_pending = defaultdict(float)
+_pending_lock = threading.Lock()
+_flusher_pid = None
+
+
+def _start_flusher():
+    """Flush from a daemon thread of the current process; threads do not survive a fork"""
+    global _flusher_pid
+    _flusher_pid = os.getpid()
+    _pending.clear()
+    threading.Thread(target=_flush_periodically, name='metrics-flusher', daemon=True).start()
+
+
+def _flush_periodically():
+    pid = os.getpid()
+    while _flusher_pid == pid:
+        time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0))
+        flush()
+
+
+def flush():
+    """Move this process's counts into the shared store"""
+    with _pending_lock:
+        if not _pending:
+            return
+        deltas = dict(_pending)
+        _pending.clear()
+    try:
+        get_store().add(deltas)
+    except sqlite3.Error as exc:
+        logger.warning("Could not write metrics to %s: %s", get_store().path, exc)
+        with _pending_lock:
+            for key, value in deltas.items():
+                _pending[key] += value
+
+
+atexit.register(flush)
+
+
+def stop():
+    """
+    Flush this process's counts, stop its flusher and close the store, before
+    the store's directory goes away; counting again starts a new flusher
+    """
+    global _flusher_pid
+    with _pending_lock:
+        _flusher_pid = None
+    flush()
+    reset_store()
+
+
+def _add(updates):
+    """Add each (name, labels, le, value) of ``updates`` to the pending counts"""
+    with _pending_lock:
+        if _flusher_pid != os.getpid():
+            _start_flusher()
+        for name, labels, le, value in updates:
+            _pending[(name, labels, le)] += value
+
+
+def _observation(name, labels, value, buckets):
+    return [
+        (f'{name}_bucket', labels, bucket_bound(value, buckets), 1),
+        (f'{name}_sum', labels, '', value),
+        (f'{name}_count', labels, '', 1),
+    ]
+
+
+def increment(name, value=1, **labels):
+    _add([(name, label_string(**labels), '', value)])
+
+
+def observe(name, value, **labels):
+    _add(_observation(name, label_string(**labels), value, FAMILIES[name][2]))
+
+
+@lru_cache(maxsize=4096)
+def _request_labels(route, method, status):
+    return label_string(route=route, method=method, status=status), label_string(route=route, method=method), label_string(route=route)
+
+
+def record_request(request, response, collector, duration):
+    match = request.resolver_match
+    route = match.view_name if match and match.view_name else 'unmatched'
+    method = request.method if request.method in METHODS else 'other'
+    status_labels, latency_labels, route_labels = _request_labels(route, method, response.status_code)
+    _add([
+        ('http_requests_total', status_labels, '', 1),
+        *_observation('http_request_duration_seconds', latency_labels, duration, REQUEST_BUCKETS),
+        ('http_request_db_queries_total', route_labels, '', collector.queries),
+        ('http_request_db_seconds_total', route_labels, '', collector.db_time),
+    ])
+
+
+@contextmanager
+def omdb_call():
+    """Count and time the OMDB lookup run in the block"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    except CircuitOpen:
+        outcome = 'rejected'
+        raise
+    finally:
+        increment('omdb_requests_total', outcome=outcome)
+        if outcome != 'rejected':
+            observe('omdb_request_duration_seconds', time.perf_counter() - started)
+
+
+def _series(totals):
+    """{family: {labels: {le: value}}} of the store's totals"""
+    series = defaultdict(lambda: defaultdict(dict))
+    for (name, labels, le), value in totals.items():
+        for family, (kind, _, _) in FAMILIES.items():
+            if name == family or (kind == 'histogram' and name.startswith(family + '_')):
+                series[family][labels][name[len(family):] + le] = value
+                break
+    return series
+
+
+def _ratio(hits, lookups):
+    return hits / lookups if lookups else 0
+
+
+def render():
+    """All series in the Prometheus text exposition format"""
+    flush()
+    series = _series(get_store().totals())
+    lines = []
+    for family, (kind, help_text, buckets) in FAMILIES.items():
+        lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}']
+        for labels, values in sorted(series[family].items()):
+            if kind == 'counter':
+                lines.append(f'{family}{{{labels}}} {format_value(values[""])}' if labels else f'{family} {format_value(values[""])}')
+                continue
+            prefix = f'{labels},' if labels else ''
+            cumulative = 0
+            for bound in _bounds(buckets):
+                cumulative += values.get(f'_bucket{bound}', 0)
+                lines.append(f'{family}_bucket{{{prefix}le="{bound}"}} {format_value(cumulative)}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{family}_sum{suffix} {format_value(values.get("_sum", 0))}')
+            lines.append(f'{family}_count{suffix} {format_value(values.get("_count", 0))}')
+
+    omdb = {labels: values[''] for labels, values in series['omdb_cache_events_total'].items()}
+    hits = omdb.get(label_string(event='hits'), 0) + omdb.get(label_string(event='negative_hits'), 0)
+    pages = defaultdict(float)
+    for labels, values in series['page_cache_lookups_total'].items():
+        pages['hit' if labels.endswith('result="hit"') else 'miss'] += values['']
+    breaker_open = get_client().breaker.state == CircuitBreaker.OPEN
+    lines += [
+        '# HELP omdb_cache_hit_ratio Share of OMDB lookups answered from the cache',
+        '# TYPE omdb_cache_hit_ratio gauge',
+        f'omdb_cache_hit_ratio {format_value(_ratio(hits, hits + omdb.get(label_string(event="misses"), 0)))}',
+        '# HELP page_cache_hit_ratio Share of cached page and fragment lookups that were hits',
+        '# TYPE page_cache_hit_ratio gauge',
+        f'page_cache_hit_ratio {format_value(_ratio(pages["hit"], pages["hit"] + pages["miss"]))}',
+        '# HELP omdb_circuit_breaker_open Whether the OMDB circuit breaker of the serving worker is open',
+        '# TYPE omdb_circuit_breaker_open gauge',
+        f'omdb_circuit_breaker_open {int(breaker_open)}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget every count, in this process and in the store"""
+    with _pending_lock:
+        _pending.clear()
+    get_store().reset()
+
+
+class MetricsMiddleware:
+    """
+    Counts every request, see the module docstring. Put it first in MIDDLEWARE
+    so the latency covers the other middleware. ``METRICS_ENABLED`` turns it off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+        started = time.perf_counter()
+        with instrumentation.collect() as collector:
+            response = self.get_response(request)
+        record_request(request, response, collector, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with instrumentation.collect() as collector:
+            response = await self.get_response(request)
+        record_request(request, response, collector, time.perf_counter() - started)
+        return response
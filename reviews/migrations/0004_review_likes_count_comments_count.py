@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:24
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ReviewLike = apps.get_model("reviews", "ReviewLike")
+    ReviewComment = apps.get_model("reviews", "ReviewComment")
+
+    def count_of(model):
+        counts = (
+            model.objects.filter(review=OuterRef("pk"))
+            .order_by()
+            .values("review")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Review.objects.update(
+        likes_count=count_of(ReviewLike),
+        comments_count=count_of(ReviewComment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0003_alter_review_user_reviewcomment_userprofile_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
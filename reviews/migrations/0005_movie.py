@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0004_review_likes_count_comments_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Movie",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "imdb_id",
+                    models.CharField(blank=True, max_length=20, null=True, unique=True),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("normalized_title", models.CharField(max_length=255, unique=True)),
+                ("year", models.CharField(blank=True, max_length=20)),
+                ("poster", models.URLField(blank=True, max_length=500)),
+                ("plot", models.TextField(blank=True)),
+                ("omdb_data", models.JSONField(blank=True, null=True)),
+                ("fetched_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="movie",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reviews",
+                to="reviews.movie",
+            ),
+        ),
+    ]
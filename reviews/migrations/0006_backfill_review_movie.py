@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def normalize_title(title):
+    # Frozen copy of reviews.omdb_utils.normalize_title
+    return " ".join(str(title).split()).casefold()
+
+
+def backfill_movies(apps, schema_editor):
+    Movie = apps.get_model("reviews", "Movie")
+    Review = apps.get_model("reviews", "Review")
+
+    titles_by_key = defaultdict(list)
+    for title in Review.objects.values_list("movie_title", flat=True).distinct():
+        titles_by_key[normalize_title(title)].append(title)
+
+    existing = set(Movie.objects.values_list("normalized_title", flat=True))
+    Movie.objects.bulk_create(
+        [
+            Movie(normalized_title=key, title=" ".join(titles[0].split()))
+            for key, titles in titles_by_key.items()
+            if key not in existing
+        ],
+        batch_size=500,
+    )
+    movie_ids = dict(Movie.objects.values_list("normalized_title", "id"))
+    for key, titles in titles_by_key.items():
+        Review.objects.filter(movie_title__in=titles).update(movie_id=movie_ids[key])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0005_movie"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_movies, migrations.RunPython.noop),
+    ]
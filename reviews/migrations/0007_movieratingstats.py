@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_stats(apps, schema_editor):
+    MovieRatingStats = apps.get_model("reviews", "MovieRatingStats")
+    Review = apps.get_model("reviews", "Review")
+    histogram = {
+        f"rating_{value}": Count("id", filter=Q(rating=value)) for value in range(1, 6)
+    }
+    rows = (
+        Review.objects.filter(movie__isnull=False)
+        .order_by()
+        .values("movie")
+        .annotate(review_count=Count("id"), rating_sum=Sum("rating"), **histogram)
+    )
+    MovieRatingStats.objects.bulk_create(
+        [MovieRatingStats(movie_id=row.pop("movie"), **row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0006_backfill_review_movie"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovieRatingStats",
+            fields=[
+                (
+                    "movie",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_stats",
+                        serialize=False,
+                        to="reviews.movie",
+                    ),
+                ),
+                ("review_count", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("rating_1", models.PositiveIntegerField(default=0)),
+                ("rating_2", models.PositiveIntegerField(default=0)),
+                ("rating_3", models.PositiveIntegerField(default=0)),
+                ("rating_4", models.PositiveIntegerField(default=0)),
+                ("rating_5", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
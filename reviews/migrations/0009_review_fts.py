@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:38
+
+from django.db import migrations
+
+# Frozen copy of the statements in reviews.search at the time of this migration
+FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_review_fts USING fts5("
+    "movie_title, review_content, content='reviews_review', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS reviews_review_fts_ai AFTER INSERT ON reviews_review BEGIN "
+    "INSERT INTO reviews_review_fts(rowid, movie_title, review_content) "
+    "VALUES (new.id, new.movie_title, new.review_content); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_review_fts_ad AFTER DELETE ON reviews_review BEGIN "
+    "INSERT INTO reviews_review_fts(reviews_review_fts, rowid, movie_title, review_content) "
+    "VALUES ('delete', old.id, old.movie_title, old.review_content); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_review_fts_au AFTER UPDATE OF movie_title, review_content "
+    "ON reviews_review BEGIN "
+    "INSERT INTO reviews_review_fts(reviews_review_fts, rowid, movie_title, review_content) "
+    "VALUES ('delete', old.id, old.movie_title, old.review_content); "
+    "INSERT INTO reviews_review_fts(rowid, movie_title, review_content) "
+    "VALUES (new.id, new.movie_title, new.review_content); END",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(FTS_TABLE_SQL)
+    for sql in FTS_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute(
+        "INSERT INTO reviews_review_fts(reviews_review_fts) VALUES ('rebuild')"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for suffix in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS reviews_review_fts_{suffix}")
+    schema_editor.execute("DROP TABLE IF EXISTS reviews_review_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0008_moviesimilarity"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0011_review_movie_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reviewcomment",
+            index=models.Index(
+                fields=["review", "created_at"], name="comment_review_created_idx"
+            ),
+        ),
+    ]
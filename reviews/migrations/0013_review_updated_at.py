@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_date(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    Review.objects.update(updated_at=models.F("created_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0012_comment_review_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0013_review_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecommenderBuild",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("built_at", models.DateTimeField(auto_now_add=True)),
+                ("last_review_id", models.BigIntegerField(default=0)),
+                ("similarities", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,18 +1,347 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Lower
+from django.utils import timezone
+
+from .omdb_utils import fetch_movie_info, normalize_title
+
+class MovieQuerySet(models.QuerySet):
+	def for_title(self, title):
+		"""The catalog entry for a free-text title, created on first sight"""
+		normalized = normalize_title(title)
+		movie, created = self.get_or_create(normalized_title=normalized, defaults={'title': ' '.join(title.split())})
+		return movie
+
+	def ids_for_titles(self, titles):
+		"""
+		``{normalized title: movie id}`` for free-text titles, creating the
+		missing catalog entries with one bulk insert
+		"""
+		wanted = {}
+		for title in titles:
+			wanted.setdefault(normalize_title(title), ' '.join(title.split()))
+		ids = dict(self.filter(normalized_title__in=wanted).values_list('normalized_title', 'id'))
+		missing = [normalized for normalized in wanted if normalized not in ids]
+		if missing:
+			# ignore_conflicts: a concurrent writer may have created some meanwhile
+			self.bulk_create(
+				[self.model(normalized_title=normalized, title=wanted[normalized]) for normalized in missing],
+				ignore_conflicts=True,
+			)
+			ids.update(self.filter(normalized_title__in=missing).values_list('normalized_title', 'id'))
+		return ids
+
+# Local catalog of films, keyed by IMDb id once OMDB has resolved them
+class Movie(models.Model):
+	imdb_id = models.CharField(max_length=20, unique=True, null=True, blank=True)
+	title = models.CharField(max_length=255)
+	normalized_title = models.CharField(max_length=255, unique=True)
+	year = models.CharField(max_length=20, blank=True)
+	poster = models.URLField(max_length=500, blank=True)
+	plot = models.TextField(blank=True)
+	# The full OMDB payload, served in place of a live OMDB call
+	omdb_data = models.JSONField(null=True, blank=True)
+	fetched_at = models.DateTimeField(null=True, blank=True)
+
+	objects = MovieQuerySet.as_manager()
+
+	def __str__(self):
+		return f"{self.title} ({self.year})" if self.year else self.title
+
+	def store_omdb(self, data):
+		"""
+		Copy an OMDB payload into the catalog entry. Only the OMDB columns are
+		written: this runs on GET requests, where the instance may be stale.
+		"""
+		poster = data.get('Poster', '')
+		fields = {
+			'year': data.get('Year', ''),
+			'poster': poster if poster and poster != 'N/A' else '',
+			'plot': data.get('Plot', ''),
+			'omdb_data': data,
+			'fetched_at': timezone.now(),
+		}
+		imdb_id = data.get('imdbID') or None
+		movies = Movie.objects.filter(pk=self.pk)
+		try:
+			with transaction.atomic():
+				movies.update(imdb_id=imdb_id, **fields)
+		except IntegrityError:
+			# Another title already resolved to this film, possibly concurrently: keep the first claim
+			imdb_id = self.imdb_id
+			movies.update(**fields)
+		self.imdb_id = imdb_id
+		for name, value in fields.items():
+			setattr(self, name, value)
+
+	def movie_info(self):
+		"""OMDB metadata for this film, fetched from OMDB only the first time"""
+		if self.omdb_data:
+			return self.omdb_data
+		data = fetch_movie_info(self.title)
+		if data:
+			self.store_omdb(data)
+		return data
+
+
+class ReviewQuerySet(models.QuerySet):
+	def with_latest_comments(self, limit=None):
+		"""
+		Prefetch the ``limit`` newest comments of every review, with their
+		authors, into ``latest_comments``: one windowed query per page however
+		long the threads are
+		"""
+		if limit is None:
+			limit = getattr(settings, 'REVIEW_LATEST_COMMENTS', 3)
+		comments = ReviewComment.objects.select_related('user').order_by('-created_at', '-id')[:limit]
+		return self.prefetch_related(models.Prefetch('comments', queryset=comments, to_attr='latest_comments'))
+
+	def title_iexact(self, title):
+		"""
+		Case-insensitive title match written as LOWER(movie_title) = LOWER(%s)
+		so it can use the functional index; ``movie_title__iexact`` compiles
+		to LIKE on SQLite, which no index serves
+		"""
+		return self.alias(title_lower=Lower('movie_title')).filter(title_lower=Lower(Value(title)))
+
+	def with_actual_counts(self):
+		"""Annotate each review with its like/comment counts computed from the related rows"""
+		return self.annotate(
+			actual_likes_count=_related_count(ReviewLike),
+			actual_comments_count=_related_count(ReviewComment),
+		)
+
+	def drifted(self):
+		"""Reviews whose stored counters disagree with the related rows"""
+		return self.with_actual_counts().filter(
+			~Q(likes_count=F('actual_likes_count')) | ~Q(comments_count=F('actual_comments_count'))
+		)
+
+	def rebuild_counters(self):
+		"""Recompute the denormalized counters from the related rows, returns rows updated"""
+		return self.update(
+			likes_count=_related_count(ReviewLike),
+			comments_count=_related_count(ReviewComment),
+			updated_at=timezone.now(),
+		)
+
+def _related_count(model):
+	counts = (
+		model.objects.filter(review=OuterRef('pk'))
+		.order_by()
+		.values('review')
+		.annotate(total=Count('pk'))
+		.values('total')
+	)
+	return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 class Review(models.Model):
 	movie_title = models.CharField(max_length=255)
 	review_content = models.TextField()
 	rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews', null=True, blank=True)  # Make user optional
+	# Resolved from movie_title on save
+	movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, related_name='reviews', null=True, blank=True, editable=False)
 	created_date = models.DateTimeField(auto_now_add=True)
+	# Bumped by every change to what the API shows for the review, including
+	# its counters and comments; the basis of the HTTP validators
+	updated_at = models.DateTimeField(auto_now=True)
+	# Denormalized counters, maintained by the like/comment endpoints and
+	# rebuilt by the ``rebuild_review_counters`` management command
+	likes_count = models.PositiveIntegerField(default=0, editable=False)
+	comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+	objects = ReviewQuerySet.as_manager()
+
+	class Meta:
+		# One index per hot filter/order path of the API and the HTML pages
+		indexes = [
+			# ?movie_title= (case-insensitive), optionally with ?rating=
+			models.Index(Lower('movie_title'), 'rating', name='review_title_lower_rating_idx'),
+			# ?rating= alone and ?ordering=rating
+			models.Index(fields=['rating'], name='review_rating_idx'),
+			# A user's reviews, newest first
+			models.Index(fields=['user', 'created_date'], name='review_user_created_idx'),
+			# Newest reviews first: home page, HTML list, ?ordering=created_date
+			models.Index(fields=['created_date'], name='review_created_idx'),
+			# Keyset pages of one movie's reviews: newest first and most liked
+			models.Index(fields=['movie', 'created_date'], name='review_movie_created_idx'),
+			models.Index(fields=['movie', 'likes_count'], name='review_movie_likes_idx'),
+		]
 
 	def __str__(self):
 		username = self.user.username if self.user else "Anonymous"
 		return f"{self.movie_title} - {self.rating}/5 by {username}"
 
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		instance._loaded_movie_title = instance.__dict__.get('movie_title')
+		return instance
+
+	def save(self, *args, **kwargs):
+		if self.movie_id is None or self.movie_title != getattr(self, '_loaded_movie_title', None):
+			self.movie = Movie.objects.for_title(self.movie_title)
+			if kwargs.get('update_fields') is not None:
+				kwargs['update_fields'] = {*kwargs['update_fields'], 'movie'}
+		super().save(*args, **kwargs)
+		self._loaded_movie_title = self.movie_title
+
+	def movie_info(self):
+		"""OMDB metadata for the reviewed film, from the local catalog when possible"""
+		if self.movie_id:
+			return self.movie.movie_info()
+		return fetch_movie_info(self.movie_title)
+
+	@classmethod
+	def adjust_counters(cls, pk, likes=0, comments=0):
+		"""Atomically shift the denormalized counters of one review, never below zero"""
+		updates = {}
+		if likes:
+			updates['likes_count'] = Greatest(F('likes_count') + likes, 0)
+		if comments:
+			updates['comments_count'] = Greatest(F('comments_count') + comments, 0)
+		if updates:
+			cls.objects.filter(pk=pk).update(updated_at=timezone.now(), **updates)
+
+	@classmethod
+	def touch(cls, *pks):
+		"""Mark reviews as changed when something they embed changed, e.g. a comment edit"""
+		cls.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+RATING_VALUES = range(1, 6)
+
+def _rating_aggregates():
+	aggregates = {'review_count': Count('id'), 'rating_sum': Coalesce(Sum('rating'), 0)}
+	for value in RATING_VALUES:
+		aggregates[f'rating_{value}'] = Count('id', filter=Q(rating=value))
+	return aggregates
+
+class MovieRatingStatsQuerySet(models.QuerySet):
+	def actual(self):
+		"""Per-movie aggregates computed from the review rows, keyed by movie id"""
+		rows = (
+			Review.objects.filter(movie__isnull=False)
+			.order_by()
+			.values('movie')
+			.annotate(**_rating_aggregates())
+		)
+		return {row.pop('movie'): row for row in rows}
+
+	def drifted(self):
+		"""Movie ids whose stored aggregates disagree with the review rows"""
+		actual = self.actual()
+		stored = {
+			row.pop('movie'): row
+			for row in self.values('movie', 'review_count', 'rating_sum', *MovieRatingStats.HISTOGRAM_FIELDS)
+		}
+		empty = dict.fromkeys(['review_count', 'rating_sum', *MovieRatingStats.HISTOGRAM_FIELDS], 0)
+		return sorted(
+			movie_id for movie_id in actual.keys() | stored.keys()
+			if actual.get(movie_id, empty) != stored.get(movie_id, empty)
+		)
+
+	def rebuild(self):
+		"""Recompute every row from the review table, returns the number of rows written"""
+		actual = self.actual()
+		self.exclude(movie__in=actual.keys()).delete()
+		rows = [MovieRatingStats(movie_id=movie_id, **values) for movie_id, values in actual.items()]
+		self.bulk_create(
+			rows, batch_size=500, update_conflicts=True, unique_fields=['movie'],
+			update_fields=['review_count', 'rating_sum', *MovieRatingStats.HISTOGRAM_FIELDS],
+		)
+		return len(rows)
+
+# Rating aggregates per movie, kept in step with review writes
+class MovieRatingStats(models.Model):
+	HISTOGRAM_FIELDS = [f'rating_{value}' for value in RATING_VALUES]
+
+	movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+	review_count = models.PositiveIntegerField(default=0)
+	rating_sum = models.PositiveIntegerField(default=0)
+	rating_1 = models.PositiveIntegerField(default=0)
+	rating_2 = models.PositiveIntegerField(default=0)
+	rating_3 = models.PositiveIntegerField(default=0)
+	rating_4 = models.PositiveIntegerField(default=0)
+	rating_5 = models.PositiveIntegerField(default=0)
+
+	objects = MovieRatingStatsQuerySet.as_manager()
+
+	def __str__(self):
+		return f"Rating stats for movie {self.movie_id}"
+
+	@property
+	def average_rating(self):
+		if not self.review_count:
+			return None
+		return round(self.rating_sum / self.review_count, 2)
+
+	def as_dict(self):
+		return {
+			'review_count': self.review_count,
+			'average_rating': self.average_rating,
+			'histogram': {str(value): getattr(self, f'rating_{value}') for value in RATING_VALUES},
+		}
+
+	@classmethod
+	def empty_dict(cls):
+		return cls().as_dict()
+
+	@classmethod
+	def record(cls, movie_id, rating, delta):
+		"""Add (delta=1) or remove (delta=-1) one review of ``rating`` from a movie's aggregates"""
+		if movie_id is None:
+			return
+		cls.objects.get_or_create(movie_id=movie_id)
+		cls._apply(movie_id, {rating: delta})
+
+	@classmethod
+	def record_batch(cls, deltas):
+		"""
+		Apply ``{movie_id: {rating: delta}}`` in one UPDATE per movie, for bulk
+		writes that bypass ``record``
+		"""
+		deltas = {movie_id: counts for movie_id, counts in deltas.items() if movie_id is not None}
+		if not deltas:
+			return
+		cls.objects.bulk_create([cls(movie_id=movie_id) for movie_id in deltas], ignore_conflicts=True)
+		for movie_id, counts in deltas.items():
+			cls._apply(movie_id, counts)
+
+	@classmethod
+	def _apply(cls, movie_id, counts):
+		updates = {
+			'review_count': Greatest(F('review_count') + sum(counts.values()), 0),
+			'rating_sum': Greatest(F('rating_sum') + sum(rating * delta for rating, delta in counts.items()), 0),
+		}
+		for rating, delta in counts.items():
+			updates[f'rating_{rating}'] = Greatest(F(f'rating_{rating}') + delta, 0)
+		cls.objects.filter(pk=movie_id).update(**updates)
+
+# Precomputed item-to-item similarity, top-K neighbours per movie (see reviews.recommender)
+class MovieSimilarity(models.Model):
+	movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similarities')
+	similar = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+	score = models.FloatField()
+
+	class Meta:
+		unique_together = ('movie', 'similar')
+
+	def __str__(self):
+		return f"{self.movie_id} -> {self.similar_id} ({self.score:.3f})"
+
+# One row per MovieSimilarity rebuild, the reviews after last_review_id are not in it yet
+class RecommenderBuild(models.Model):
+	built_at = models.DateTimeField(auto_now_add=True)
+	last_review_id = models.BigIntegerField(default=0)
+	similarities = models.PositiveIntegerField(default=0)
+
+	def __str__(self):
+		return f"{self.similarities} similarities up to review {self.last_review_id}"
+
 # User Profile for additional info and listing user's reviews
 class UserProfile(models.Model):
 	user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -41,5 +370,9 @@ class ReviewComment(models.Model):
 	content = models.TextField()
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	class Meta:
+		# Latest comments of a review and the keyset pages of its thread
+		indexes = [models.Index(fields=['review', 'created_at'], name='comment_review_created_idx')]
+
 	def __str__(self):
 		return f"Comment by {self.user.username} on review {self.review.id}"
@@ -0,0 +1,318 @@
+"""
+Shared HTTP client for the OMDB API.
+
+One ``requests.Session`` per process keeps connections to OMDB alive and
+bounded, every request has connect/read timeouts, transient failures are
+retried with jittered exponential backoff, and a circuit breaker stops calling
+OMDB altogether for a while once it keeps failing so workers fail fast instead
+of piling up behind a dead upstream.
+
+``AsyncOMDBClient`` is the httpx based counterpart for async views; it applies
+the same timeouts, retry policy and shares the same breaker as the sync client.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import httpx
+import requests
+from django.conf import settings
+from django.test.signals import setting_changed
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = 'http://www.omdbapi.com/'
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class OMDBUnavailable(Exception):
+    """OMDB could not be reached or returned something that is not an answer"""
+
+
+class CircuitOpen(OMDBUnavailable):
+    """The circuit breaker refused the call, OMDB was not contacted"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After ``failure_threshold`` consecutive
+    failures it opens and rejects calls for ``reset_timeout`` seconds, then lets
+    a single probe through (half-open); the probe's outcome closes or re-opens it.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._total_failures = 0
+        self._rejected_calls = 0
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            self._last_error = error
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.error("OMDB circuit breaker opened after %d consecutive failures (%s)",
+                                 self._consecutive_failures, error)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (self._clock() - self._opened_at)), 3)
+            return {
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'total_failures': self._total_failures,
+                'rejected_calls': self._rejected_calls,
+                'last_error': self._last_error,
+                'retry_in_seconds': retry_in,
+            }
+
+
+class OMDBClient:
+    def __init__(self, base_url=DEFAULT_API_URL, connect_timeout=2.0, read_timeout=4.0,
+                 max_retries=1, backoff=0.25, pool_maxsize=10, breaker=None):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_json(self, params):
+        """
+        GET ``base_url`` with ``params`` and return the decoded JSON body.
+        Raises OMDBUnavailable when the breaker is open or all attempts failed.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpen('circuit open')
+        try:
+            return self._get_json(params)
+        except OMDBUnavailable:
+            raise
+        except BaseException as exc:
+            # Every call must report its outcome, or a half-open probe never
+            # comes back and the breaker rejects every call from then on
+            self.breaker.record_failure(type(exc).__name__)
+            raise
+
+    def _get_json(self, params):
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Full jitter keeps retries from many workers from lining up
+                time.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+            # Error messages deliberately leave out the URL, it carries the API key
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = type(exc).__name__
+                continue
+            except requests.RequestException as exc:
+                error = type(exc).__name__
+                break
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                error = f'HTTP {response.status_code}'
+                continue
+            if response.status_code != 200:
+                # OMDB is up and answering, the request itself is wrong (e.g. a bad key)
+                self.breaker.record_success()
+                raise OMDBUnavailable(f'HTTP {response.status_code}')
+            try:
+                data = response.json()
+            except ValueError:
+                error = 'invalid JSON'
+                continue
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure(error)
+        raise OMDBUnavailable(error)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncOMDBClient:
+    def __init__(self, base_url=DEFAULT_API_URL, connect_timeout=2.0, read_timeout=4.0,
+                 max_retries=1, backoff=0.25, pool_maxsize=100, breaker=None):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        )
+
+    async def get_json(self, params):
+        """
+        Async version of ``OMDBClient.get_json``
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpen('circuit open')
+        try:
+            return await self._get_json(params)
+        except OMDBUnavailable:
+            raise
+        except BaseException as exc:
+            # Cancellations included, see OMDBClient.get_json
+            self.breaker.record_failure(type(exc).__name__)
+            raise
+
+    async def _get_json(self, params):
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+            try:
+                response = await self.client.get(self.base_url, params=params)
+            except httpx.TransportError as exc:
+                error = type(exc).__name__
+                continue
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+                break
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                error = f'HTTP {response.status_code}'
+                continue
+            if response.status_code != 200:
+                self.breaker.record_success()
+                raise OMDBUnavailable(f'HTTP {response.status_code}')
+            try:
+                data = response.json()
+            except ValueError:
+                error = 'invalid JSON'
+                continue
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure(error)
+        raise OMDBUnavailable(error)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+# httpx connection pools belong to the event loop they were opened on
+_async_clients = {}
+
+
+def get_client():
+    """
+    The process-wide OMDB client, built from the OMDB_* settings on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OMDBClient(
+                    base_url=getattr(settings, 'OMDB_API_URL', DEFAULT_API_URL),
+                    connect_timeout=getattr(settings, 'OMDB_CONNECT_TIMEOUT', 2.0),
+                    read_timeout=getattr(settings, 'OMDB_READ_TIMEOUT', 4.0),
+                    max_retries=getattr(settings, 'OMDB_MAX_RETRIES', 1),
+                    backoff=getattr(settings, 'OMDB_RETRY_BACKOFF', 0.25),
+                    pool_maxsize=getattr(settings, 'OMDB_POOL_MAXSIZE', 10),
+                    breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, 'OMDB_BREAKER_FAILURE_THRESHOLD', 5),
+                        reset_timeout=getattr(settings, 'OMDB_BREAKER_RESET_TIMEOUT', 30.0),
+                    ),
+                )
+    return _client
+
+
+def get_async_client():
+    """
+    The async OMDB client for the running event loop. It shares the circuit
+    breaker of the sync client so both see the same view of OMDB health.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.client.is_closed:
+        for other in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[other]
+        sync_client = get_client()
+        connect_timeout, read_timeout = sync_client.timeout
+        client = AsyncOMDBClient(
+            base_url=sync_client.base_url,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            max_retries=sync_client.max_retries,
+            backoff=sync_client.backoff,
+            pool_maxsize=getattr(settings, 'OMDB_ASYNC_POOL_MAXSIZE', 100),
+            breaker=sync_client.breaker,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        # Pools on other loops cannot be closed from here; drop them and let
+        # them be garbage collected with their loop
+        _async_clients.clear()
+
+
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith('OMDB_'):
+        reset_client()
+
+
+setting_changed.connect(_reset_on_setting_change)
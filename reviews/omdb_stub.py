@@ -0,0 +1,122 @@
+"""
+A tiny local stand-in for omdbapi.com, used by the tests and benchmarks.
+
+It answers the same ``t=``, ``i=`` and ``s=`` queries as the real API from an
+in-memory catalog, can be slowed down or made to fail, and counts the requests
+it has served so callers can check how often OMDB was actually hit.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_MOVIES = [
+    {'Title': 'Inception', 'Year': '2010', 'imdbID': 'tt1375666', 'Type': 'movie',
+     'Plot': 'A thief who steals corporate secrets through dream-sharing technology.',
+     'Director': 'Christopher Nolan', 'Genre': 'Action, Sci-Fi', 'imdbRating': '8.8',
+     'Poster': 'https://example.com/inception.jpg'},
+    {'Title': 'Interstellar', 'Year': '2014', 'imdbID': 'tt0816692', 'Type': 'movie',
+     'Plot': 'A team of explorers travel through a wormhole in space.',
+     'Director': 'Christopher Nolan', 'Genre': 'Adventure, Drama, Sci-Fi', 'imdbRating': '8.7',
+     'Poster': 'https://example.com/interstellar.jpg'},
+    {'Title': 'Dunkirk', 'Year': '2017', 'imdbID': 'tt5013056', 'Type': 'movie',
+     'Plot': 'Allied soldiers are surrounded by the German army.',
+     'Director': 'Christopher Nolan', 'Genre': 'Action, Drama, History', 'imdbRating': '7.8',
+     'Poster': 'https://example.com/dunkirk.jpg'},
+]
+
+
+class OMDBStubServer:
+    """
+    Run with ``with OMDBStubServer() as stub:`` and point ``OMDB_API_URL`` at
+    ``stub.url``. ``delay`` (seconds) and ``status`` can be changed at any time
+    to simulate a slow or failing upstream, and ``fail_requests`` answers that
+    many upcoming requests with a 503.
+    """
+
+    def __init__(self, movies=None, delay=0.0, status=200, host='127.0.0.1', port=0):
+        self.movies = list(DEFAULT_MOVIES if movies is None else movies)
+        self.delay = delay
+        self.status = status
+        self.fail_requests = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def lookup(self, params):
+        if 'i' in params:
+            for movie in self.movies:
+                if movie['imdbID'] == params['i']:
+                    return dict(movie, Response='True')
+            return {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+        if 't' in params:
+            title = params['t'].strip().lower()
+            for movie in self.movies:
+                if movie['Title'].lower() == title:
+                    return dict(movie, Response='True')
+            return {'Response': 'False', 'Error': 'Movie not found!'}
+        if 's' in params:
+            term = params['s'].strip().lower()
+            found = [
+                {key: movie[key] for key in ('Title', 'Year', 'imdbID', 'Type', 'Poster')}
+                for movie in self.movies if term in movie['Title'].lower()
+            ]
+            if found:
+                return {'Search': found, 'totalResults': str(len(found)), 'Response': 'True'}
+            return {'Response': 'False', 'Error': 'Movie not found!'}
+        return {'Response': 'False', 'Error': 'Incorrect request.'}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    status = stub.status
+                    if stub.fail_requests > 0:
+                        stub.fail_requests -= 1
+                        status = 503
+                if stub.delay:
+                    time.sleep(stub.delay)
+                params = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+                body = json.dumps(stub.lookup(params)).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting (timeout tests)
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,68 +1,350 @@
-import requests
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import weakref
+
 from django.conf import settings
+from django.core.cache import caches
 
-OMDB_API_KEY = getattr(settings, 'OMDB_API_KEY', None)
-OMDB_API_URL = 'http://www.omdbapi.com/'
+from . import metrics
+from .instrumentation import timed
+from .omdb_client import OMDBUnavailable, get_async_client, get_client
 
-def fetch_movie_info(title):
+logger = logging.getLogger(__name__)
+
+# Stored in the cache for lookups OMDB answered with "not found"
+_NOT_FOUND = '__omdb_not_found__'
+_MISSING = object()
+
+
+def _api_key():
+    return getattr(settings, 'OMDB_API_KEY', None)
+
+
+def normalize_title(title):
     """
-    Fetch movie information by title from OMDB API
+    Normalize a movie title or search term for use as a lookup key
+    """
+    return ' '.join(str(title).split()).casefold()
+
+
+def _call_omdb(params):
     """
-    if not OMDB_API_KEY:
+    Perform one OMDB request and return the decoded payload,
+    or None when OMDB answered that nothing matched
+    """
+    with timed('omdb'), metrics.omdb_call():
+        data = get_client().get_json(dict(params, apikey=_api_key()))
+    if data.get('Response') == 'True':
+        return data
+    return None
+
+
+async def _acall_omdb(params):
+    with timed('omdb'), metrics.omdb_call():
+        data = await get_async_client().get_json(dict(params, apikey=_api_key()))
+    if data.get('Response') == 'True':
+        return data
+    return None
+
+
+# Cache
+
+class _KeyLocks:
+    """Per-key locks that are dropped again once nobody holds or waits on them"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def acquire(self, key):
+        with self._guard:
+            lock, users = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, users + 1)
+        lock.acquire()
+        return lock
+
+    def release(self, key, lock):
+        lock.release()
+        with self._guard:
+            _, users = self._locks[key]
+            if users <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+
+_key_locks = _KeyLocks()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'fills': 0, 'waits': 0, 'errors': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+    metrics.increment('omdb_cache_events_total', event=name)
+
+
+def cache_stats():
+    """
+    Hit/miss counters of the OMDB cache for this process
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+    stats['hit_ratio'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) if lookups else None
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _cache():
+    return caches[getattr(settings, 'OMDB_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(kind, key):
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return f'omdb:{kind}:{digest}'
+
+
+def _hit(value):
+    """The answer held by a cache entry read by a lookup, counted as a hit"""
+    if value is _MISSING:
+        return _MISSING
+    _count('negative_hits' if value == _NOT_FOUND else 'hits')
+    return None if value == _NOT_FOUND else value
+
+
+def _from_cache(cache, cache_key):
+    return _hit(cache.get(cache_key, _MISSING))
+
+
+def _cached_lookup(kind, key, ttl, loader):
+    """
+    Return the cached answer for ``key`` or fill it with ``loader()``.
+
+    Only one caller refills a missing key: threads of this process queue on a
+    per-key lock, and other processes sharing the cache back off on a lock entry
+    added with ``cache.add`` and poll for the value instead of calling OMDB too.
+    "Not found" answers are cached for OMDB_NEGATIVE_CACHE_TTL, errors are not
+    cached at all.
+    """
+    cache = _cache()
+    cache_key = _cache_key(kind, key)
+    value = _from_cache(cache, cache_key)
+    if value is not _MISSING:
+        return value
+
+    lock = _key_locks.acquire(cache_key)
+    try:
+        value = _from_cache(cache, cache_key)
+        if value is not _MISSING:
+            return value
+        _count('misses')
+
+        lock_key = cache_key + ':lock'
+        lock_timeout = getattr(settings, 'OMDB_CACHE_LOCK_TIMEOUT', 10)
+        acquired = cache.add(lock_key, 1, lock_timeout)
+        if not acquired:
+            _count('waits')
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = cache.get(cache_key, _MISSING)
+                if value is not _MISSING:
+                    return None if value == _NOT_FOUND else value
+                if cache.get(lock_key) is None:
+                    break
+            # The holder gave up or timed out: take over the lock if it is
+            # free, else load anyway but leave the other process's lock alone
+            acquired = cache.add(lock_key, 1, lock_timeout)
+
+        try:
+            value = loader()
+        except OMDBUnavailable:
+            _count('errors')
+            raise
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+        _store(cache, cache_key, value, ttl)
+        return value
+    finally:
+        _key_locks.release(cache_key, lock)
+
+
+def _entry(value, ttl):
+    """``(cached value, timeout)`` for a loaded answer, counted as a fill"""
+    _count('fills')
+    if value is None:
+        return _NOT_FOUND, getattr(settings, 'OMDB_NEGATIVE_CACHE_TTL', 300)
+    return value, ttl
+
+
+def _store(cache, cache_key, value, ttl):
+    cache.set(cache_key, *_entry(value, ttl))
+
+
+# Async variants: callers on one event loop share a single in-flight fill task
+# per key instead of queueing on a thread lock
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+async def _afrom_cache(cache, cache_key):
+    return _hit(await cache.aget(cache_key, _MISSING))
+
+
+async def _astore(cache, cache_key, value, ttl):
+    await cache.aset(cache_key, *_entry(value, ttl))
+
+
+async def _afill(cache, cache_key, ttl, loader):
+    _count('misses')
+    lock_key = cache_key + ':lock'
+    lock_timeout = getattr(settings, 'OMDB_CACHE_LOCK_TIMEOUT', 10)
+    acquired = await cache.aadd(lock_key, 1, lock_timeout)
+    if not acquired:
+        _count('waits')
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            value = await cache.aget(cache_key, _MISSING)
+            if value is not _MISSING:
+                return None if value == _NOT_FOUND else value
+            if await cache.aget(lock_key) is None:
+                break
+        # See _cached_lookup: only the holder of the lock deletes it
+        acquired = await cache.aadd(lock_key, 1, lock_timeout)
+    try:
+        value = await loader()
+    except OMDBUnavailable:
+        _count('errors')
+        raise
+    finally:
+        if acquired:
+            await cache.adelete(lock_key)
+    await _astore(cache, cache_key, value, ttl)
+    return value
+
+
+async def _acached_lookup(kind, key, ttl, loader):
+    cache = _cache()
+    cache_key = _cache_key(kind, key)
+    value = await _afrom_cache(cache, cache_key)
+    if value is not _MISSING:
+        return value
+
+    loop = asyncio.get_running_loop()
+    inflight = _async_inflight.setdefault(loop, {})
+    task = inflight.get(cache_key)
+    if task is None:
+        task = loop.create_task(_afill(cache, cache_key, ttl, loader))
+        inflight[cache_key] = task
+        task.add_done_callback(lambda _: inflight.pop(cache_key, None))
+    # A cancelled caller must not cancel the fill the other callers wait on
+    return await asyncio.shield(task)
+
+
+def _lookup(kind, key, ttl, params, extract=None):
+    if not _api_key():
+        return None
+
+    def loader():
+        data = _call_omdb(params)
+        if data is not None and extract is not None:
+            return extract(data)
+        return data
+
+    try:
+        return _cached_lookup(kind, key, ttl, loader)
+    except OMDBUnavailable as exc:
+        logger.warning("OMDB %s lookup failed: %s", kind, exc)
         return None
-    params = {
-        't': title,
-        'apikey': OMDB_API_KEY,
-        'plot': 'full'
-    }
+
+
+async def _alookup(kind, key, ttl, params, extract=None):
+    if not _api_key():
+        return None
+
+    async def loader():
+        data = await _acall_omdb(params)
+        if data is not None and extract is not None:
+            return extract(data)
+        return data
+
     try:
-        response = requests.get(OMDB_API_URL, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                return data
-    except Exception:
-        pass
-    return None
+        return await _acached_lookup(kind, key, ttl, loader)
+    except OMDBUnavailable as exc:
+        logger.warning("OMDB %s lookup failed: %s", kind, exc)
+        return None
+
+
+def _title_query(title):
+    return (
+        'title', normalize_title(title), getattr(settings, 'OMDB_CACHE_TTL', 86400),
+        {'t': title, 'plot': 'full'},
+    )
+
+
+def _search_query(search_term):
+    return (
+        'search', normalize_title(search_term), getattr(settings, 'OMDB_SEARCH_CACHE_TTL', 3600),
+        {'s': search_term, 'type': 'movie'}, lambda data: data.get('Search', []),
+    )
+
+
+def _imdb_query(imdb_id):
+    return (
+        'imdb', str(imdb_id).strip().lower(), getattr(settings, 'OMDB_CACHE_TTL', 86400),
+        {'i': imdb_id, 'plot': 'full'},
+    )
+
+
+def fetch_movie_info(title):
+    """
+    Fetch movie information by title from OMDB API
+    """
+    return _lookup(*_title_query(title))
+
 
 def search_movies(search_term):
     """
     Search for movies by term from OMDB API
     """
-    if not OMDB_API_KEY:
-        return None
-    params = {
-        's': search_term,
-        'apikey': OMDB_API_KEY,
-        'type': 'movie'
-    }
-    try:
-        response = requests.get(OMDB_API_URL, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                return data.get('Search', [])
-    except Exception:
-        pass
-    return None
+    return _lookup(*_search_query(search_term))
+
 
 def fetch_movie_by_imdb_id(imdb_id):
     """
     Fetch movie information by IMDB ID from OMDB API
     """
-    if not OMDB_API_KEY:
-        return None
-    params = {
-        'i': imdb_id,
-        'apikey': OMDB_API_KEY,
-        'plot': 'full'
-    }
-    try:
-        response = requests.get(OMDB_API_URL, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                return data
-    except Exception:
-        pass
-    return None
+    return _lookup(*_imdb_query(imdb_id))
+
+
+async def afetch_movie_info(title):
+    """
+    Async version of fetch_movie_info
+    """
+    return await _alookup(*_title_query(title))
+
+
+async def asearch_movies(search_term):
+    """
+    Async version of search_movies
+    """
+    return await _alookup(*_search_query(search_term))
+
+
+async def afetch_movie_by_imdb_id(imdb_id):
+    """
+    Async version of fetch_movie_by_imdb_id
+    """
+    return await _alookup(*_imdb_query(imdb_id))
@@ -0,0 +1,136 @@
+"""
+Cached HTML for the web pages, invalidated by writes.
+
+Pages that look the same to every visitor are cached whole (cached_page()),
+the others cache their shared fragments with the ``{% cache %}`` template tag.
+Either way the cached copy varies on the current version of the data it shows:
+the ``reviews`` scope for pages listing reviews, ``('review', pk)`` for one
+review's page. Model signals replace the version of exactly the scopes a write
+touches, which orphans the stale entries (they age out of the cache) without
+scanning or deleting keys.
+
+Versions are random tokens rather than counters, so a version evicted from the
+cache can never come back with a value an old entry was stored under.
+Every worker must see the same versions: run multi-process deployments with a
+shared cache backend (``CACHE_BACKEND`` / ``CACHE_LOCATION``).
+"""
+import uuid
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.safestring import mark_safe
+
+from . import metrics, replicas
+
+# Bumped by invalidate_all(), part of every cached page's version
+GLOBAL_SCOPE = 'all'
+# Rendered in place of the CSRF token, which is the one per-visitor part of a page
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-5c1e0b7a'
+
+
+def _cache():
+    return caches[alias()]
+
+
+def alias():
+    return getattr(settings, 'PAGE_CACHE_ALIAS', 'default')
+
+
+def timeout():
+    """Lifetime of a cached page or fragment, only bounds how long orphaned entries linger"""
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _version_key(scope):
+    parts = scope if isinstance(scope, tuple) else (scope,)
+    return 'page:v:' + ':'.join(str(part) for part in parts)
+
+
+def version(*scopes):
+    """The combined current version of ``scopes``, one cache round trip when they exist"""
+    cache = _cache()
+    keys = [_version_key(scope) for scope in (GLOBAL_SCOPE, *scopes)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            token = uuid.uuid4().hex
+            # Another worker may have created it meanwhile, theirs wins
+            found[key] = token if cache.add(key, token, None) else cache.get(key, token)
+    return '.'.join(found[key] for key in keys)
+
+
+def bump(*scopes):
+    """Invalidate every fragment depending on one of ``scopes``"""
+    _cache().set_many({_version_key(scope): uuid.uuid4().hex for scope in scopes}, None)
+
+
+def invalidate_all():
+    """Invalidate every cached page and fragment, after writes that bypass model signals"""
+    bump(GLOBAL_SCOPE)
+
+
+def cached_page(request, name, version, render):
+    """
+    The response of ``render(extra_context)`` for a page that only varies with
+    ``version``, from the cache when possible. The visitor's CSRF token is put
+    into the cached copy; requests with flash messages to show render normally.
+    """
+    if request.method != 'GET' or get_messages(request):
+        return render({})
+    cache = _cache()
+    key = f'page:{name}:{version}'
+    content = cache.get(key)
+    metrics.increment('page_cache_lookups_total', page=name, result='miss' if content is None else 'hit')
+    if content is None:
+        with replicas.use_primary():
+            response = render({'csrf_token': CSRF_PLACEHOLDER})
+        if response.status_code != 200:
+            return response
+        content = response.content
+        cache.set(key, content, timeout())
+    return HttpResponse(content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode()))
+
+
+def cached_fragment(fragment_name, *vary_on):
+    """
+    What ``{% cache ... fragment_name vary_on... %}`` stored, or None. Render
+    the page from this value rather than checking is_cached() first: the entry
+    may expire in between and the tag would cache a page rendered without data.
+    """
+    content = _cache().get(make_template_fragment_key(fragment_name, vary_on))
+    metrics.increment('page_cache_lookups_total', page=fragment_name, result='miss' if content is None else 'hit')
+    return None if content is None else mark_safe(content)
+
+
+def is_cached(fragment_name, *vary_on):
+    """Whether ``{% cache ... fragment_name vary_on... %}`` would be a hit"""
+    cached = _cache().has_key(make_template_fragment_key(fragment_name, vary_on))
+    metrics.increment('page_cache_lookups_total', page=fragment_name, result='hit' if cached else 'miss')
+    return cached
+
+
+def reads_for(cached):
+    """
+    Context to render a page in: what gets cached is read from the primary, a
+    lagging replica would otherwise be frozen into the cache until the next write
+    """
+    return nullcontext() if cached else replicas.use_primary()
+
+
+def context(**extra):
+    """Template context the ``{% cache %}`` tags of the pages read their settings from"""
+    return {'page_cache_alias': alias(), 'page_cache_timeout': timeout(), **extra}
+
+
+def review_saved(sender, instance, **kwargs):
+    bump('reviews', ('review', instance.pk))
+
+
+def review_activity(sender, instance, **kwargs):
+    # Likes and comments show on the review's page only, listings stay cached
+    bump(('review', instance.review_id))
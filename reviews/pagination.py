@@ -0,0 +1,210 @@
+import base64
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a fixed tuple of ordering fields.
+
+    The cursor is an opaque token holding the ordering values of the last row
+    that was returned, and the next page is fetched with a ``WHERE (a, b) < (x, y)``
+    style filter instead of an OFFSET, so page N costs the same as page one and
+    no COUNT(*) is run. The last ordering field must be unique (normally ``id``)
+    so that the position is unambiguous.
+    """
+    ordering = ('-created_date', '-id')
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                return self.page_size
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.current_ordering = tuple(self.get_ordering(request, queryset, view))
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self._reversed(self.current_ordering) if reverse else self.current_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    # Cursor encoding
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'p': [self._dump(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.current_ordering):
+                raise ValueError('cursor does not match ordering')
+            position = [
+                self._load(name.lstrip('-'), value)
+                for name, value in zip(self.current_ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def _link(self, item, reverse):
+        position = [self._value(item, name.lstrip('-')) for name in self.current_ordering]
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def _dump(self, value):
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return value
+
+    def _load(self, name, value):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        if value is not None and field.get_internal_type() == 'DateTimeField':
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError('invalid datetime in cursor')
+            return parsed
+        return field.to_python(value)
+
+    @staticmethod
+    def _value(item, name):
+        if isinstance(item, dict):
+            return item[name]
+        if name == 'pk':
+            return item.pk
+        return getattr(item, name)
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(name[1:] if name.startswith('-') else '-' + name for name in ordering)
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """
+        Build ``a >= x AND ((a > x) OR (a = x AND b > y) OR ...)`` for the given
+        ordering, flipping the comparisons for descending fields. The redundant
+        leading bound lets the database seek into an index on the first field.
+        """
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]})
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return bound & condition
+
+
+class ReviewCursorPagination(KeysetPagination):
+    """
+    Default pagination of the review listings. Pages follow ``?ordering=``
+    for the fields the view lists in ``ordering_fields``, relevance when a
+    full-text search annotated ``search_rank``, and newest first otherwise;
+    ``id`` is appended as the tie breaker so every ordering is a valid keyset.
+    """
+    ordering = ('-created_date', '-id')
+    ordering_param = 'ordering'
+
+    def get_ordering(self, request, queryset, view):
+        allowed = getattr(view, 'ordering_fields', None) or ()
+        requested = request.query_params.get(self.ordering_param, '')
+        fields = [term.strip() for term in requested.split(',') if term.strip().lstrip('-') in allowed]
+        if fields:
+            # The tie breaker runs in the direction of the first field so the
+            # whole ordering can be read off one index, forwards or backwards
+            return (*fields, '-id' if fields[0].startswith('-') else 'id')
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', '-id')
+        return self.ordering
@@ -0,0 +1,158 @@
+"""
+Item-to-item movie recommender.
+
+Offline, the users x movies "liked" matrix (a review rated LIKED_RATING or
+higher) is built as a SciPy sparse matrix, its cosine item-item similarity is
+computed with one sparse product, and the top-K neighbours of every movie are
+stored in MovieSimilarity. Online, a user's recommendations are the neighbours
+of the movies they liked, summed by score, minus what they already reviewed:
+one indexed query whose cost depends on the user's likes, not on the size of
+the review table.
+
+The table is rebuilt by ``manage.py build_recommendations``, never on a web
+request. Each rebuild records the last review it covered (RecommenderBuild),
+so the reviews it misses are counted from the shared database, and a cron
+job running ``build_recommendations --if-stale`` only rebuilds once
+RECOMMENDER_REBUILD_EVERY of them have arrived.
+"""
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from scipy import sparse
+
+from .models import MovieSimilarity, RecommenderBuild, Review
+
+LIKED_RATING = 4
+
+
+def liked_matrix(pairs):
+    """
+    Binary users x movies CSR matrix from ``(user_id, movie_id)`` pairs,
+    together with the movie id of every column
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    movie_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(movie_ids)),
+    )
+    # A user reviewing the same film twice still counts once
+    matrix.data[:] = 1
+    return matrix, movie_ids
+
+
+def cosine_similarity(matrix):
+    """
+    Item-item cosine similarity of the columns of ``matrix`` as a sparse
+    matrix, with the diagonal removed
+    """
+    co_occurrence = (matrix.T @ matrix).tocsr()
+    norms = np.sqrt(co_occurrence.diagonal())
+    norms[norms == 0] = 1
+    inverse = sparse.diags(1 / norms)
+    similarity = (inverse @ co_occurrence @ inverse).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_k_neighbours(similarity, top_k):
+    """
+    For every row of ``similarity`` yield ``(row, neighbour_columns, scores)``
+    with its ``top_k`` highest scoring columns, best first
+    """
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        scores = similarity.data[start:end]
+        neighbours = similarity.indices[start:end]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, neighbours = scores[best], neighbours[best]
+        order = np.argsort(-scores, kind='stable')
+        yield row, neighbours[order], scores[order]
+
+
+def rebuild(top_k=None, batch_size=5000):
+    """
+    Recompute the MovieSimilarity table from the review table, returns the
+    number of similarity rows written
+    """
+    top_k = top_k or getattr(settings, 'RECOMMENDER_TOP_K', 20)
+    # Taken first: reviews written while the matrix is built count as pending
+    last_review_id = Review.objects.aggregate(last=Max('id'))['last'] or 0
+    liked = (
+        Review.objects.filter(rating__gte=LIKED_RATING, user__isnull=False, movie__isnull=False)
+        .values_list('user_id', 'movie_id')
+        .distinct()
+        .iterator(chunk_size=batch_size)
+    )
+    # Flat int64 buffer: 16 bytes per pair instead of a tuple object each
+    pairs = np.fromiter((value for pair in liked for value in pair), dtype=np.int64)
+    if len(pairs):
+        matrix, movie_ids = liked_matrix(pairs)
+        # The heavy lifting happens before the write transaction is opened
+        similarity = cosine_similarity(matrix)
+    else:
+        similarity, movie_ids = sparse.csr_matrix((0, 0)), np.empty(0, dtype=np.int64)
+
+    def similarity_rows():
+        for row, neighbours, scores in top_k_neighbours(similarity, top_k):
+            movie_id = int(movie_ids[row])
+            for neighbour, score in zip(neighbours, scores):
+                yield MovieSimilarity(movie_id=movie_id, similar_id=int(movie_ids[neighbour]), score=float(score))
+
+    written = 0
+    rows = similarity_rows()
+    with transaction.atomic():
+        MovieSimilarity.objects.all().delete()
+        while batch := list(islice(rows, batch_size)):
+            MovieSimilarity.objects.bulk_create(batch)
+            written += len(batch)
+        RecommenderBuild.objects.create(last_review_id=last_review_id, similarities=written)
+    return written
+
+
+def pending_reviews():
+    """Reviews written since the last rebuild, none of which it accounts for"""
+    build = RecommenderBuild.objects.order_by('-id').first()
+    return Review.objects.filter(pk__gt=build.last_review_id if build else 0).count()
+
+
+def is_stale(every=None):
+    """
+    Whether ``every`` (RECOMMENDER_REBUILD_EVERY) reviews have arrived since
+    the last rebuild, always when there was none; never when ``every`` is 0
+    """
+    every = getattr(settings, 'RECOMMENDER_REBUILD_EVERY', 0) if every is None else every
+    if not every:
+        return False
+    if not RecommenderBuild.objects.exists():
+        return True
+    return pending_reviews() >= every
+
+
+def recommend_for_user(user, limit=10):
+    """
+    ``[{'movie_id', 'title', 'score'}, ...]`` ranked by summed similarity to the
+    movies ``user`` liked, excluding every movie the user has reviewed
+    """
+    liked = Review.objects.filter(user=user, rating__gte=LIKED_RATING, movie__isnull=False).values('movie_id')
+    reviewed = Review.objects.filter(user=user, movie__isnull=False).values('movie_id')
+    rows = (
+        MovieSimilarity.objects.filter(movie__in=liked)
+        .exclude(similar__in=reviewed)
+        .values('similar_id', 'similar__title')
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'similar_id')[:limit]
+    )
+    return [
+        {'movie_id': row['similar_id'], 'title': row['similar__title'], 'score': round(row['total'], 4)}
+        for row in rows
+    ]
+
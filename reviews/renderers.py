@@ -0,0 +1,58 @@
+"""
+orjson based JSON renderer.
+
+A drop-in for DRF's JSONRenderer with the same media type and equivalent
+output: compact separators, UTF-8 without escaping, datetimes in ISO 8601
+with ``Z`` for UTC, U+2028/U+2029 escaped, and everything orjson does not
+know (Decimal, lazy strings, querysets, numpy values...) converted by DRF's
+own encoder. Encoding
+runs in C and datetimes no longer go through a Python callback.
+
+Falls back to DRF's renderer when orjson is not installed, for indented output
+(``Accept: application/json; indent=4``) or non-default UNICODE_JSON /
+COMPACT_JSON settings, and for values orjson refuses (integers beyond 64 bits).
+Unlike the stdlib encoder, NaN and infinite floats render as ``null`` (DRF
+refuses them under STRICT_JSON) and float exponents have no ``+`` sign
+(``1e16`` rather than ``1e+16``).
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib renderer takes over
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj, _encoder=JSONEncoder()):
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    """``data`` as compact UTF-8 JSON bytes, formatted like JSONRenderer's"""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    try:
+        content = orjson.dumps(data, default=_default, option=OPTIONS)
+    except orjson.JSONEncodeError:
+        return JSONRenderer().render(data)
+    # Keep the output a strict JavaScript subset, like DRF
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,144 @@
+"""
+Read/write splitting between the primary database and read replicas.
+
+ReplicaRouter sends every write to ``default`` and, inside requests that
+ReplicaMiddleware marked as replica-safe, reads to one of the aliases listed
+in ``DATABASE_REPLICAS``. Everything else reads from the primary: management
+commands, background threads, transactions, and a request as soon as it has
+written something (read-after-write).
+
+A client that just wrote gets a short-lived cookie that keeps its reads on the
+primary until the replicas have caught up (``REPLICA_STICKY_SECONDS``). A
+request can also pick its side with the ``X-Read-From: primary|replica``
+header, ``replica`` ignoring the cookie.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+STICKY_COOKIE = 'primary_until'
+READ_FROM_HEADER = 'HTTP_X_READ_FROM'
+
+# Where reads go in the current request or task, PRIMARY unless a middleware
+# or use_replica() said otherwise
+_read_from = ContextVar('read_from', default=PRIMARY)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def reading_from_replica():
+    """Whether a read made now would be sent to a replica"""
+    return (
+        _read_from.get() == REPLICA
+        and bool(replica_aliases())
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. to render a page that gets cached"""
+    token = _read_from.set(PRIMARY)
+    try:
+        yield
+    finally:
+        _read_from.reset(token)
+
+
+@contextmanager
+def use_replica():
+    """Let reads inside the block go to a replica, outside of requests too"""
+    token = _read_from.set(REPLICA)
+    try:
+        yield
+    finally:
+        _read_from.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(replica_aliases())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Later reads of this request must see the write
+        _read_from.set(PRIMARY)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Sends the reads of GET/HEAD/OPTIONS requests to the replicas, unless the
+    client wrote recently or asked for the primary. Runs natively in sync and
+    async stacks so async views stay concurrent.
+    """
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_from.set(self.read_from(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = _read_from.set(self.read_from(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_from.reset(token)
+        return self.process_response(request, response)
+
+    def read_from(self, request):
+        if request.method not in self.safe_methods:
+            return PRIMARY
+        requested = request.META.get(READ_FROM_HEADER, '').lower()
+        if requested in (PRIMARY, REPLICA):
+            return requested
+        try:
+            sticky = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        return PRIMARY if sticky else REPLICA
+
+    def process_response(self, request, response):
+        if request.method not in self.safe_methods and replica_aliases() and sticky_seconds():
+            until = int(time.time() + sticky_seconds())
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=sticky_seconds(), httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,143 @@
+"""
+Full-text search over review titles and bodies.
+
+The engine is pluggable through the REVIEW_SEARCH_BACKEND setting (a dotted
+path to a SearchBackend subclass). The default picks SQLite FTS5 when running
+on SQLite and falls back to plain ``icontains`` matching elsewhere, which is
+where a Postgres ``SearchVector``/GIN backend would slot in.
+
+The FTS5 index is an external-content table over ``reviews_review`` kept in
+sync by triggers, so every write path (ORM saves, ``bulk_create``,
+``update()``, raw SQL) updates it in the same transaction.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+FTS_TABLE = 'reviews_review_fts'
+
+FTS_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "movie_title, review_content, content='reviews_review', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+FTS_TRIGGERS_SQL = {
+    f'{FTS_TABLE}_ai': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON reviews_review BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, movie_title, review_content) "
+        "VALUES (new.id, new.movie_title, new.review_content); END"
+    ),
+    f'{FTS_TABLE}_ad': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON reviews_review BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, movie_title, review_content) "
+        "VALUES ('delete', old.id, old.movie_title, old.review_content); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF movie_title, review_content "
+        f"ON reviews_review BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, movie_title, review_content) "
+        "VALUES ('delete', old.id, old.movie_title, old.review_content); "
+        f"INSERT INTO {FTS_TABLE}(rowid, movie_title, review_content) "
+        "VALUES (new.id, new.movie_title, new.review_content); END"
+    ),
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_fts_index(using='default'):
+    """
+    Create the FTS5 table and its triggers if they are missing and rebuild the
+    index when a trigger had to be recreated. Django rebuilds SQLite tables on
+    some schema changes, which silently drops their triggers, so this runs
+    after every ``migrate``. Returns True when the index was rebuilt.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+        table_missing = cursor.fetchone() is None
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+            list(FTS_TRIGGERS_SQL),
+        )
+        missing = set(FTS_TRIGGERS_SQL) - {row[0] for row in cursor.fetchall()}
+        if not (table_missing or missing):
+            return False
+        cursor.execute(FTS_TABLE_SQL)
+        for sql in FTS_TRIGGERS_SQL.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query or '')
+
+
+class SearchBackend:
+    """
+    ``filter()`` narrows a Review queryset to the matches of ``query`` and
+    annotates ``search_rank``, where lower is more relevant
+    """
+    def filter(self, queryset, query):
+        raise NotImplementedError
+
+
+class BasicSearchBackend(SearchBackend):
+    """Portable fallback: every term must appear in the title or the body, unranked"""
+
+    def filter(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(Q(movie_title__icontains=term) | Q(review_content__icontains=term))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Ranked with FTS5's bm25, titles weighted above review bodies. The last
+    term matches as a prefix so partial words typed into a search box match.
+    """
+    title_weight = 5.0
+    content_weight = 1.0
+
+    @staticmethod
+    def match_expression(query):
+        terms = tokenize(query)
+        if not terms:
+            return None
+        quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        # One MATCH joined on the rowid: the planner drives the query from the
+        # index and bm25() reads the rank of the row being matched, instead of
+        # a correlated subquery re-running the MATCH for every candidate
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        )
+        rank = RawSQL(f'bm25({FTS_TABLE}, %s, %s)', (self.title_weight, self.content_weight), output_field=FloatField())
+        return queryset.annotate(search_rank=rank)
+
+def get_search_backend(using='default'):
+    path = getattr(settings, 'REVIEW_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connections[using].vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return BasicSearchBackend()
@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .instrumentation import TimedSerializerMixin
 from .models import Review, UserProfile, ReviewLike, ReviewComment
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'password']
@@ -14,36 +16,42 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # User Profile Serializer
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = ['bio', 'avatar']
 
 # Review Like Serializer
-class ReviewLikeSerializer(serializers.ModelSerializer):
+class ReviewLikeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
     class Meta:
         model = ReviewLike
-        fields = ['id', 'user', 'created_at']
+        fields = ['id', 'user', 'review', 'created_at']
 
 # Review Comment Serializer
-class ReviewCommentSerializer(serializers.ModelSerializer):
+class ReviewCommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
     class Meta:
         model = ReviewComment
-        fields = ['id', 'user', 'content', 'created_at']
+        fields = ['id', 'user', 'review', 'content', 'created_at']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
-    likes_count = serializers.SerializerMethodField()
-    comments = ReviewCommentSerializer(many=True, read_only=True)
+    # Only the newest few; the full thread is paginated at /api/reviews/<id>/comments/
+    comments = serializers.SerializerMethodField()
 
     class Meta:
         model = Review
-        fields = ['id', 'movie_title', 'review_content', 'rating', 'user', 'created_date', 'likes_count', 'comments']
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
+        fields = ['id', 'movie_title', 'review_content', 'rating', 'user', 'created_date', 'likes_count', 'comments_count', 'comments']
+        read_only_fields = ['likes_count', 'comments_count']
+
+    def get_comments(self, review):
+        comments = getattr(review, 'latest_comments', None)
+        if comments is None:
+            # Not prefetched with Review.objects.with_latest_comments(), e.g. a single review
+            limit = getattr(settings, 'REVIEW_LATEST_COMMENTS', 3)
+            comments = review.comments.select_related('user').order_by('-created_at', '-id')[:limit]
+        return ReviewCommentSerializer(comments, many=True, context=self.context).data
 
     def create(self, validated_data):
         # Handle creation for both authenticated and anonymous users
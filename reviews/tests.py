@@ -1,7 +1,42 @@
+import asyncio
+import csv
+import datetime
+import decimal
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.test import APITestCase
+from moviereviewapi.db import sqlite_database
 from django.contrib.auth.models import User
-from .models import Review
+from .models import Movie, MovieRatingStats, Review, ReviewLike, ReviewComment
+from . import filters, instrumentation, metrics, omdb_utils, page_cache, projections, recommender, replicas, search, throttling, views
+from .instrumentation import InstrumentationMiddleware, QueryBudgetMixin, query_budget, timed
+from .omdb_client import AsyncOMDBClient, CircuitBreaker, OMDBClient, OMDBUnavailable, get_client
+from .omdb_stub import OMDBStubServer
+from .parsers import NDJSONParser, ORJSONParser
+from .renderers import ORJSONRenderer
+from .serializers import ReviewSerializer
 
 class ReviewAPITestCase(APITestCase):
 	def setUp(self):
@@ -38,3 +73,1460 @@ class ReviewAPITestCase(APITestCase):
 		}
 		response = self.client.post(url, data)
 		self.assertEqual(response.status_code, 401)
+
+
+class ReviewCounterTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='liker', password='testpass')
+		self.review = Review.objects.create(movie_title='Inception', review_content='Great movie!', rating=5)
+		self.client.force_authenticate(user=self.user)
+
+	def test_like_and_unlike_maintain_likes_count(self):
+		response = self.client.post(reverse('like-list'), {'review': self.review.pk})
+		self.assertEqual(response.status_code, 201)
+		self.review.refresh_from_db()
+		self.assertEqual(self.review.likes_count, 1)
+
+		response = self.client.post(reverse('like-list'), {'review': self.review.pk})
+		self.assertEqual(response.status_code, 400)
+		self.review.refresh_from_db()
+		self.assertEqual(self.review.likes_count, 1)
+
+		response = self.client.delete(reverse('like-detail', args=[ReviewLike.objects.get().pk]))
+		self.assertEqual(response.status_code, 204)
+		self.review.refresh_from_db()
+		self.assertEqual(self.review.likes_count, 0)
+
+	def test_moving_a_like_onto_a_liked_review_is_rejected(self):
+		other = Review.objects.create(movie_title='Dunkirk', review_content='Tense', rating=4)
+		self.client.post(reverse('like-list'), {'review': self.review.pk})
+		second = self.client.post(reverse('like-list'), {'review': other.pk}).data['id']
+		response = self.client.patch(reverse('like-detail', args=[second]), {'review': self.review.pk})
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(response.data['detail'], 'You have already liked this review.')
+		self.assertEqual(
+			list(Review.objects.filter(pk__in=[self.review.pk, other.pk]).order_by('pk').values_list('likes_count', flat=True)),
+			[1, 1],
+		)
+
+	def test_comment_maintains_comments_count(self):
+		response = self.client.post(reverse('comment-list'), {'review': self.review.pk, 'content': 'Agreed'})
+		self.assertEqual(response.status_code, 201)
+		self.review.refresh_from_db()
+		self.assertEqual(self.review.comments_count, 1)
+
+		response = self.client.delete(reverse('comment-detail', args=[response.data['id']]))
+		self.assertEqual(response.status_code, 204)
+		self.review.refresh_from_db()
+		self.assertEqual(self.review.comments_count, 0)
+
+	def test_serializer_reads_stored_counters(self):
+		Review.objects.filter(pk=self.review.pk).update(likes_count=7, comments_count=3)
+		response = self.client.get(reverse('review-list'))
+		result = response.data['results'][0]
+		self.assertEqual(result['likes_count'], 7)
+		self.assertEqual(result['comments_count'], 3)
+
+	def test_rebuild_review_counters_command(self):
+		ReviewLike.objects.create(user=self.user, review=self.review)
+		ReviewComment.objects.create(user=self.user, review=self.review, content='Nice')
+		self.assertEqual(Review.objects.drifted().count(), 1)
+
+		out = StringIO()
+		call_command('rebuild_review_counters', stdout=out)
+		self.review.refresh_from_db()
+		self.assertEqual((self.review.likes_count, self.review.comments_count), (1, 1))
+		self.assertEqual(Review.objects.drifted().count(), 0)
+
+
+class MostLikedReviewsTestCase(APITestCase):
+	def setUp(self):
+		self.reviews = [
+			Review.objects.create(movie_title='Inception', review_content=f'Review {i}', rating=4)
+			for i in range(5)
+		]
+		for review, likes in zip(self.reviews, [2, 5, 0, 5, 1]):
+			Review.objects.filter(pk=review.pk).update(likes_count=likes)
+		Review.objects.create(movie_title='Tenet', review_content='Other film', rating=3)
+
+	def test_ranked_by_likes_with_stable_keyset_pages(self):
+		url = reverse('review-most-liked-reviews', args=['inception'])
+		seen = []
+		response = self.client.get(url, {'page_size': 2})
+		self.assertIsNone(response.data['previous'])
+		while True:
+			self.assertEqual(response.status_code, 200)
+			self.assertNotIn('count', response.data)
+			seen.extend((r['likes_count'], r['id']) for r in response.data['results'])
+			if not response.data['next']:
+				break
+			response = self.client.get(response.data['next'])
+
+		expected = sorted(((r.likes_count, r.id) for r in Review.objects.filter(movie_title='Inception')), reverse=True)
+		self.assertEqual(seen, expected)
+
+		previous = self.client.get(response.data['previous'])
+		self.assertEqual([r['id'] for r in previous.data['results']], [rid for _, rid in expected[2:4]])
+
+	def test_page_cost_is_constant(self):
+		url = reverse('review-most-liked-reviews', args=['inception'])
+		# Movie lookup, the page, and one prefetch for the latest comments
+		with self.assertNumQueries(3):
+			self.client.get(url, {'page_size': 2})
+
+	def test_invalid_cursor_returns_404(self):
+		url = reverse('review-most-liked-reviews', args=['inception'])
+		response = self.client.get(url, {'cursor': 'not-a-cursor'})
+		self.assertEqual(response.status_code, 404)
+
+
+class OMDBCacheTestCase(SimpleTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.stub = OMDBStubServer().start()
+		cls.settings_override = override_settings(OMDB_API_KEY='test-key', OMDB_API_URL=cls.stub.url)
+		cls.settings_override.enable()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings_override.disable()
+		cls.stub.stop()
+		super().tearDownClass()
+
+	def setUp(self):
+		cache.clear()
+		omdb_utils.reset_cache_stats()
+		self.stub.requests = 0
+		self.stub.delay = 0
+		self.stub.status = 200
+		self.stub.fail_requests = 0
+
+	def test_lookups_are_cached_by_normalized_key(self):
+		self.assertEqual(omdb_utils.fetch_movie_info('Inception')['imdbID'], 'tt1375666')
+		self.assertEqual(omdb_utils.fetch_movie_info('  inception ')['imdbID'], 'tt1375666')
+		self.assertEqual(omdb_utils.fetch_movie_by_imdb_id('tt0816692')['Title'], 'Interstellar')
+		self.assertEqual(omdb_utils.fetch_movie_by_imdb_id('TT0816692')['Title'], 'Interstellar')
+		self.assertEqual(len(omdb_utils.search_movies('Dunk')), 1)
+		self.assertEqual(len(omdb_utils.search_movies('dunk')), 1)
+		self.assertEqual(self.stub.requests, 3)
+		stats = omdb_utils.cache_stats()
+		self.assertEqual((stats['hits'], stats['misses']), (3, 3))
+
+	def test_not_found_is_cached_but_errors_are_not(self):
+		self.assertIsNone(omdb_utils.fetch_movie_info('No Such Film'))
+		self.assertIsNone(omdb_utils.fetch_movie_info('no such film'))
+		self.assertEqual(self.stub.requests, 1)
+		self.assertEqual(omdb_utils.cache_stats()['negative_hits'], 1)
+
+		self.stub.status = 404
+		with self.assertLogs('reviews.omdb_utils', 'WARNING') as logs:
+			self.assertIsNone(omdb_utils.fetch_movie_info('Dunkirk'))
+		self.assertNotIn('test-key', logs.output[0])
+		self.stub.status = 200
+		self.assertEqual(omdb_utils.fetch_movie_info('Dunkirk')['Title'], 'Dunkirk')
+
+	@override_settings(OMDB_CACHE_LOCK_TIMEOUT=0.2)
+	def test_waiter_leaves_another_process_lock_alone(self):
+		for fetch in (omdb_utils.fetch_movie_info, async_to_sync(omdb_utils.afetch_movie_info)):
+			cache.clear()
+			# Held by a slow fill in another process
+			lock_key = omdb_utils._cache_key('title', 'inception') + ':lock'
+			cache.add(lock_key, 1, 60)
+			self.assertEqual(fetch('Inception')['imdbID'], 'tt1375666')
+			self.assertEqual(cache.get(lock_key), 1)
+
+	def test_async_lookups_share_the_cache_entries(self):
+		self.assertIsNone(async_to_sync(omdb_utils.afetch_movie_info)('No Such Film'))
+		self.assertEqual(async_to_sync(omdb_utils.afetch_movie_info)('Inception')['imdbID'], 'tt1375666')
+		# Entries filled by the async path serve the sync one, "not found" included
+		self.assertIsNone(omdb_utils.fetch_movie_info('no such film'))
+		self.assertEqual(omdb_utils.fetch_movie_info('inception')['imdbID'], 'tt1375666')
+		self.assertEqual(self.stub.requests, 2)
+		stats = omdb_utils.cache_stats()
+		self.assertEqual((stats['fills'], stats['hits'], stats['negative_hits']), (2, 1, 1))
+
+	def test_concurrent_misses_trigger_a_single_fill(self):
+		self.stub.delay = 0.2
+		results = []
+		threads = [
+			threading.Thread(target=lambda: results.append(omdb_utils.fetch_movie_info('Interstellar')))
+			for _ in range(8)
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(self.stub.requests, 1)
+		self.assertEqual([movie['Title'] for movie in results], ['Interstellar'] * 8)
+
+	def test_status_endpoint_exposes_cache_counters(self):
+		omdb_utils.fetch_movie_info('Inception')
+		omdb_utils.fetch_movie_info('Inception')
+		response = self.client.get(reverse('omdb-status'))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['cache']['hit_ratio'], 0.5)
+
+
+class OMDBClientTestCase(SimpleTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.stub = OMDBStubServer().start()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.stub.stop()
+		super().tearDownClass()
+
+	def setUp(self):
+		self.stub.requests = 0
+		self.stub.delay = 0
+		self.stub.fail_requests = 0
+		self.clock = [0.0]
+		self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: self.clock[0])
+		self.client_ = OMDBClient(
+			base_url=self.stub.url, read_timeout=0.2, max_retries=2, backoff=0.01, breaker=self.breaker
+		)
+
+	def tearDown(self):
+		self.client_.close()
+
+	def test_retries_transient_failures(self):
+		self.stub.fail_requests = 2
+		self.assertEqual(self.client_.get_json({'t': 'Inception'})['Title'], 'Inception')
+		self.assertEqual(self.stub.requests, 3)
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+	def test_read_timeout_bounds_a_slow_upstream(self):
+		self.stub.delay = 1
+		started = time.monotonic()
+		with self.assertRaises(OMDBUnavailable):
+			self.client_.get_json({'t': 'Inception'})
+		self.assertLess(time.monotonic() - started, 1.5)
+
+	def test_breaker_opens_fails_fast_and_recovers(self):
+		self.stub.fail_requests = 6
+		for _ in range(2):
+			with self.assertRaises(OMDBUnavailable):
+				self.client_.get_json({'t': 'Inception'})
+		self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+		self.assertEqual(self.stub.requests, 6)
+
+		with self.assertRaisesMessage(OMDBUnavailable, 'circuit open'):
+			self.client_.get_json({'t': 'Inception'})
+		self.assertEqual(self.stub.requests, 6)
+		self.assertEqual(self.breaker.snapshot()['rejected_calls'], 1)
+
+		self.clock[0] += 30
+		self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+		self.assertEqual(self.client_.get_json({'t': 'Inception'})['Title'], 'Inception')
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+	def test_cancelled_probe_does_not_wedge_the_breaker(self):
+		self.breaker.record_failure('HTTP 503')
+		self.breaker.record_failure('HTTP 503')
+		self.clock[0] += 30
+		self.stub.delay = 1
+
+		async def cancelled_probe():
+			client = AsyncOMDBClient(base_url=self.stub.url, breaker=self.breaker)
+			try:
+				probe = asyncio.ensure_future(client.get_json({'t': 'Inception'}))
+				await asyncio.sleep(0.1)
+				probe.cancel()
+				with self.assertRaises(asyncio.CancelledError):
+					await probe
+			finally:
+				await client.aclose()
+
+		async_to_sync(cancelled_probe)()
+		# The probe counts as failed: open again, then the next probe gets through
+		self.assertEqual(self.breaker.snapshot()['last_error'], 'CancelledError')
+		self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+		self.stub.delay = 0
+		self.clock[0] += 30
+		self.assertEqual(self.client_.get_json({'t': 'Inception'})['Title'], 'Inception')
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+	def test_status_endpoint_reports_open_breaker(self):
+		with override_settings(OMDB_API_KEY='test-key', OMDB_API_URL=self.stub.url, OMDB_MAX_RETRIES=0,
+		                       OMDB_BREAKER_FAILURE_THRESHOLD=1):
+			cache.clear()
+			self.stub.fail_requests = 1
+			with self.assertLogs('reviews', 'WARNING'):
+				self.assertIsNone(omdb_utils.fetch_movie_info('Inception'))
+			response = self.client.get(reverse('omdb-status'))
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(response.json()['circuit_breaker']['state'], 'open')
+
+
+class AsyncOMDBViewsTestCase(TestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.stub = OMDBStubServer().start()
+		cls.settings_override = override_settings(OMDB_API_KEY='test-key', OMDB_API_URL=cls.stub.url)
+		cls.settings_override.enable()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings_override.disable()
+		cls.stub.stop()
+		super().tearDownClass()
+
+	def setUp(self):
+		cache.clear()
+		self.stub.delay = 0
+		self.review = Review.objects.create(movie_title='Inception', review_content='Great movie!', rating=5)
+
+	async def test_async_views_match_sync_views(self):
+		pairs = [
+			(reverse('async-movie-info') + '?title=Inception', reverse('movie-info') + '?title=Inception'),
+			(reverse('async-movie-details', args=['tt0816692']), reverse('movie-details', args=['tt0816692'])),
+			(reverse('async-search-movies-public') + '?search=in', reverse('search-movies-public') + '?search=in'),
+			(reverse('async-review-detail', args=[self.review.pk]), reverse('review-detail', args=[self.review.pk])),
+			(reverse('async-reviews-by-movie', args=['inception']), reverse('review-reviews-by-movie', args=['inception'])),
+		]
+		for async_url, sync_url in pairs:
+			async_response = await self.async_client.get(async_url)
+			sync_response = await sync_to_async(self.client.get)(sync_url)
+			self.assertEqual(async_response.status_code, 200, async_url)
+			self.assertEqual(async_response.json(), sync_response.json(), async_url)
+
+	async def test_concurrent_requests_overlap_on_omdb(self):
+		self.stub.delay = 0.3
+		started = time.monotonic()
+		responses = await asyncio.gather(*[
+			self.async_client.get(reverse('async-search-movies'), {'q': f'term {i}'})
+			for i in range(10)
+		])
+		self.assertLess(time.monotonic() - started, 2)
+		self.assertEqual({response.status_code for response in responses}, {404})
+
+
+class MovieCatalogTestCase(TestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.stub = OMDBStubServer().start()
+		cls.settings_override = override_settings(OMDB_API_KEY='test-key', OMDB_API_URL=cls.stub.url)
+		cls.settings_override.enable()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings_override.disable()
+		cls.stub.stop()
+		super().tearDownClass()
+
+	def setUp(self):
+		cache.clear()
+		self.stub.requests = 0
+
+	def test_reviews_share_one_movie_per_normalized_title(self):
+		first = Review.objects.create(movie_title='Inception', review_content='Great', rating=5)
+		second = Review.objects.create(movie_title='  inception ', review_content='Fine', rating=3)
+		other = Review.objects.create(movie_title='Dunkirk', review_content='Loud', rating=4)
+		self.assertEqual(first.movie_id, second.movie_id)
+		self.assertNotEqual(first.movie_id, other.movie_id)
+
+		other.movie_title = 'Inception'
+		other.save()
+		self.assertEqual(other.movie_id, first.movie_id)
+
+	def test_metadata_is_fetched_once_then_served_locally(self):
+		review = Review.objects.create(movie_title='Inception', review_content='Great', rating=5)
+		response = self.client.get(reverse('review-reviews-by-movie', args=['INCEPTION']))
+		self.assertEqual(response.data['results']['movie_info']['imdbID'], 'tt1375666')
+		self.assertEqual(len(response.data['results']['reviews']), 1)
+
+		movie = Movie.objects.get(pk=review.movie_id)
+		self.assertEqual((movie.imdb_id, movie.year), ('tt1375666', '2010'))
+		self.assertIsNotNone(movie.fetched_at)
+
+		cache.clear()
+		self.client.get(reverse('review-detail', args=[review.pk]))
+		self.client.get(reverse('review_detail', args=[review.pk]))
+		self.assertEqual(self.stub.requests, 1)
+
+	def test_two_titles_resolving_to_one_film(self):
+		first, second = Movie.objects.for_title('Inception'), Movie.objects.for_title('Inception (2010)')
+		# Loaded before either claim, as two concurrent requests would
+		stale = Movie.objects.get(pk=second.pk)
+		Movie.objects.filter(pk=second.pk).update(title='Inception (2010 cut)')
+		payload = {'Title': 'Inception', 'imdbID': 'tt1375666', 'Year': '2010'}
+		first.store_omdb(payload)
+		stale.store_omdb(payload)
+		second.refresh_from_db()
+		self.assertEqual(Movie.objects.get(pk=first.pk).imdb_id, 'tt1375666')
+		# The metadata is stored, the claim and the other columns are left alone
+		self.assertEqual((second.imdb_id, second.year, second.title), (None, '2010', 'Inception (2010 cut)'))
+
+	def test_sync_movies_command(self):
+		Review.objects.create(movie_title='Dunkirk', review_content='Loud', rating=4)
+		Review.objects.create(movie_title='Unknown Film', review_content='?', rating=2)
+		out = StringIO()
+		call_command('sync_movies', stdout=out)
+		self.assertIn('Resolved 1 film(s), 1 not found', out.getvalue())
+		self.assertEqual(Movie.objects.get(normalized_title='dunkirk').imdb_id, 'tt5013056')
+
+
+class MovieRatingStatsTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='critic', password='testpass')
+		self.client.force_authenticate(user=self.user)
+
+	def create(self, title, rating):
+		response = self.client.post(reverse('review-list'), {'movie_title': title, 'review_content': 'x', 'rating': rating})
+		self.assertEqual(response.status_code, 201)
+		return response.data['id']
+
+	def test_aggregates_follow_create_update_destroy(self):
+		first = self.create('Inception', 5)
+		self.create('inception', 3)
+		second = self.create('Tenet', 2)
+		self.client.patch(reverse('review-detail', args=[first]), {'rating': 4})
+		self.client.patch(reverse('review-detail', args=[second]), {'movie_title': 'Inception'})
+		self.client.delete(reverse('review-detail', args=[first]))
+
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse('review-movie-stats', args=['Inception']))
+		self.assertEqual(response.data['review_count'], 2)
+		self.assertEqual(response.data['average_rating'], 2.5)
+		self.assertEqual(response.data['histogram'], {'1': 0, '2': 1, '3': 1, '4': 0, '5': 0})
+		self.assertEqual(self.client.get(reverse('review-movie-stats', args=['tenet'])).data['review_count'], 0)
+		self.assertEqual(MovieRatingStats.objects.drifted(), [])
+
+	def test_reviews_by_movie_embeds_stats(self):
+		self.create('Inception', 5)
+		response = self.client.get(reverse('review-reviews-by-movie', args=['inception']))
+		self.assertEqual(response.data['results']['stats']['average_rating'], 5.0)
+
+	def test_unknown_movie_is_404(self):
+		self.assertEqual(self.client.get(reverse('review-movie-stats', args=['nothing'])).status_code, 404)
+
+	def test_verify_and_rebuild_command(self):
+		self.create('Inception', 5)
+		Review.objects.create(movie_title='Inception', review_content='bypassed the API', rating=1)
+		with self.assertRaises(SystemExit):
+			call_command('rebuild_movie_stats', '--verify', stdout=StringIO())
+
+		call_command('rebuild_movie_stats', stdout=StringIO())
+		stats = Movie.objects.get(normalized_title='inception').rating_stats
+		self.assertEqual((stats.review_count, stats.rating_1, stats.rating_5), (2, 1, 1))
+		call_command('rebuild_movie_stats', '--verify', stdout=StringIO())
+
+
+class RecommenderTestCase(APITestCase):
+	def setUp(self):
+		likes = {
+			'alice': ['Inception', 'Interstellar'],
+			'bob': ['Inception', 'Interstellar', 'Tenet'],
+			'carol': ['Inception', 'Memento'],
+			'me': ['Inception'],
+		}
+		for username, titles in likes.items():
+			user = User.objects.create(username=username)
+			for title in titles:
+				Review.objects.create(movie_title=title, review_content='x', rating=5, user=user)
+		self.me = User.objects.get(username='me')
+		Review.objects.create(movie_title='Memento', review_content='meh', rating=2, user=self.me)
+
+	def test_cosine_similarity_matches_dense_computation(self):
+		matrix, _ = recommender.liked_matrix([(1, 10), (1, 20), (2, 10), (2, 30), (3, 20), (3, 20)])
+		dense = matrix.toarray()
+		norms = (dense ** 2).sum(axis=0) ** 0.5
+		expected = (dense.T @ dense) / norms[:, None] / norms[None, :]
+		for row in range(3):
+			expected[row, row] = 0
+		self.assertTrue((abs(recommender.cosine_similarity(matrix).toarray() - expected) < 1e-6).all())
+
+	def test_recommendations_are_ranked_and_precomputed(self):
+		self.assertGreater(recommender.rebuild(top_k=5), 0)
+		self.client.force_authenticate(user=self.me)
+		with self.assertNumQueries(1):
+			response = self.client.get(reverse('review-recommendations'))
+		self.assertEqual(response.status_code, 200)
+		# Memento is excluded because "me" already reviewed it
+		self.assertEqual(response.data['recommended_movies'], ['Interstellar', 'Tenet'])
+		scores = [item['score'] for item in response.data['recommendations']]
+		self.assertEqual(scores, sorted(scores, reverse=True))
+
+	def test_anonymous_users_need_to_log_in(self):
+		self.assertEqual(self.client.get(reverse('review-recommendations')).status_code, 401)
+
+	def test_build_recommendations_command(self):
+		out = StringIO()
+		call_command('build_recommendations', '--top-k', '1', stdout=out)
+		self.assertIn('similarity row(s)', out.getvalue())
+		self.assertEqual(set(recommender.MovieSimilarity.objects.values_list('movie', flat=True).distinct()),
+		                 set(Movie.objects.values_list('id', flat=True)))
+
+	@override_settings(RECOMMENDER_REBUILD_EVERY=2)
+	def test_rebuild_when_stale(self):
+		out = StringIO()
+		call_command('build_recommendations', '--if-stale', stdout=out)
+		self.assertIn('similarity row(s)', out.getvalue())
+		# Counted in the database, whichever worker wrote the review
+		self.client.post(reverse('review-list'), {'movie_title': 'Tenet', 'review_content': 'x', 'rating': 5})
+		self.assertEqual(recommender.pending_reviews(), 1)
+		out = StringIO()
+		call_command('build_recommendations', '--if-stale', stdout=out)
+		self.assertIn('Up to date, 1 new review(s)', out.getvalue())
+		Review.objects.create(movie_title='Dunkirk', review_content='x', rating=4, user=self.me)
+		self.assertTrue(recommender.is_stale())
+		recommender.rebuild()
+		self.assertEqual(recommender.pending_reviews(), 0)
+
+
+class ReviewSearchTestCase(APITestCase):
+	def setUp(self):
+		self.dream = Review.objects.create(movie_title='Inception', review_content='A heist inside layered dreams', rating=5)
+		self.space = Review.objects.create(movie_title='Interstellar', review_content='Dreams of wormholes and docking', rating=4)
+		Review.objects.create(movie_title='Dunkirk', review_content='Tense beach evacuation', rating=3)
+
+	def ids(self, response):
+		return [review['id'] for review in response.data['results']]
+
+	def test_search_endpoint_ranks_title_matches_first(self):
+		Review.objects.create(movie_title='Dreamgirls', review_content='Musical', rating=3)
+		response = self.client.get(reverse('review-search'), {'q': 'dream'})
+		self.assertEqual(response.status_code, 200)
+		# Prefix match on the last term, the title hit outranks body mentions
+		self.assertEqual(len(response.data['results']), 3)
+		self.assertEqual(response.data['results'][0]['movie_title'], 'Dreamgirls')
+		self.assertEqual(self.client.get(reverse('review-search')).status_code, 400)
+
+	def test_index_follows_updates_and_deletes(self):
+		Review.objects.filter(pk=self.space.pk).update(review_content='Black holes')
+		self.dream.delete()
+		self.assertEqual(self.ids(self.client.get(reverse('review-search'), {'q': 'dreams'})), [])
+		self.assertEqual(self.ids(self.client.get(reverse('review-search'), {'q': 'black holes'})), [self.space.pk])
+
+	def test_search_param_and_explicit_ordering(self):
+		response = self.client.get(reverse('review-list'), {'search': 'dreams', 'ordering': 'rating'})
+		self.assertEqual(self.ids(response), [self.space.pk, self.dream.pk])
+		# Query syntax is not passed through to FTS5
+		self.assertEqual(self.client.get(reverse('review-list'), {'search': '"unbalanced AND ('}).status_code, 200)
+
+	@override_settings(REVIEW_SEARCH_BACKEND='reviews.search.BasicSearchBackend')
+	def test_fallback_backend(self):
+		self.assertIsInstance(search.get_search_backend(), search.BasicSearchBackend)
+		response = self.client.get(reverse('review-search'), {'q': 'wormholes'})
+		self.assertEqual(self.ids(response), [self.space.pk])
+
+	def test_ranked_from_one_match(self):
+		Review.objects.bulk_create(
+			Review(movie_title=f'Film {index}', review_content='brilliant twist' if index % 50 == 0 else 'dull', rating=3)
+			for index in range(2000)
+		)
+		for url, params in ((reverse('review-search'), {'q': 'brilliant twist'}), (reverse('review-list'), {'search': 'brilliant twist'})):
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.get(url, params)
+			self.assertEqual({review['review_content'] for review in response.data['results']}, {'brilliant twist'})
+			searches = [query['sql'] for query in queries if 'reviews_review_fts' in query['sql']]
+			self.assertTrue(searches)
+			for sql in searches:
+				with connection.cursor() as cursor:
+					cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+					plan = [row[-1] for row in cursor.fetchall()]
+				# Driven by the index, the reviews read by id, no MATCH re-run per row
+				self.assertTrue(any('reviews_review_fts VIRTUAL TABLE INDEX' in line for line in plan), plan)
+				self.assertFalse([line for line in plan if 'SUBQUERY' in line or line.startswith('SCAN reviews_review ')], plan)
+
+	def test_backend_follows_the_queryset_database(self):
+		for module, url, params in ((views, 'review-search', {'q': 'dreams'}), (filters, 'review-list', {'search': 'dreams'})):
+			with mock.patch.object(module, 'get_search_backend', wraps=search.get_search_backend) as backend:
+				self.assertEqual(self.client.get(reverse(url), params).status_code, 200)
+			backend.assert_called_once_with('default')
+
+	def test_triggers_are_restored_after_migrate(self):
+		with connection.cursor() as cursor:
+			cursor.execute("DROP TRIGGER reviews_review_fts_ai")
+		Review.objects.create(movie_title='Memento', review_content='Backwards', rating=5)
+		self.assertTrue(search.ensure_fts_index())
+		self.assertFalse(search.ensure_fts_index())
+		self.assertEqual(len(self.client.get(reverse('review-search'), {'q': 'memento'}).data['results']), 1)
+
+
+class ReviewIndexPlanTestCase(APITestCase):
+	"""Every hot review query is answered from an index, never a table scan or a sort"""
+
+	def setUp(self):
+		self.user = User.objects.create(username='critic')
+		for rating in (1, 3, 5):
+			Review.objects.create(movie_title='Inception', review_content='x', rating=rating, user=self.user)
+			Review.objects.create(movie_title='Dunkirk', review_content='x', rating=rating)
+
+	def assertPlansUseIndex(self, url, index, params=None, allow_sort=False):
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.client.get(url, params).status_code, 200)
+		review_queries = [query['sql'] for query in queries if 'FROM "reviews_review"' in query['sql']]
+		self.assertTrue(review_queries)
+		used = False
+		for sql in review_queries:
+			with connection.cursor() as cursor:
+				cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+				plan = [row[-1] for row in cursor.fetchall()]
+			for line in plan:
+				if 'reviews_review ' in line or line.endswith('reviews_review'):
+					self.assertIn('USING', line, f'{sql}\n{plan}')
+				if not allow_sort:
+					self.assertNotIn('TEMP B-TREE', line, f'{sql}\n{plan}')
+			used = used or any(index in line for line in plan)
+		self.assertTrue(used, f'{index} not used by {review_queries}')
+
+	def test_case_insensitive_title_filter(self):
+		response = self.client.get(reverse('review-list'), {'movie_title': 'INCEPTION'})
+		self.assertEqual(len(response.data['results']), 3)
+		# Filtered pages sort only the rows matching the filter
+		self.assertPlansUseIndex(reverse('review-list'), 'review_title_lower_rating_idx', {'movie_title': 'inception'}, allow_sort=True)
+
+	def test_title_and_rating_filter(self):
+		params = {'movie_title': 'inception', 'rating': 5}
+		self.assertEqual(len(self.client.get(reverse('review-list'), params).data['results']), 1)
+		self.assertPlansUseIndex(reverse('review-list'), 'review_title_lower_rating_idx', params, allow_sort=True)
+
+	def test_rating_filter_and_ordering(self):
+		self.assertPlansUseIndex(reverse('review-list'), 'review_rating_idx', {'rating': 5}, allow_sort=True)
+		self.assertPlansUseIndex(reverse('review-list'), 'review_rating_idx', {'ordering': 'rating'})
+
+	def test_newest_first(self):
+		self.assertPlansUseIndex(reverse('review-list'), 'review_created_idx', {'ordering': '-created_date'})
+		self.assertPlansUseIndex(reverse('home'), 'review_created_idx')
+		self.assertPlansUseIndex(reverse('reviews_list'), 'review_created_idx')
+
+	def test_user_reviews(self):
+		self.assertPlansUseIndex(reverse('user-reviews', args=[self.user.pk]), 'review_user_created_idx')
+
+	def test_movie_pages(self):
+		self.assertPlansUseIndex(reverse('review-reviews-by-movie', args=['inception']), 'review_movie_created_idx')
+		self.assertPlansUseIndex(reverse('review-most-liked-reviews', args=['inception']), 'review_movie_likes_idx')
+
+
+class ReviewCursorPaginationTestCase(APITestCase):
+	def setUp(self):
+		for index in range(7):
+			Review.objects.create(movie_title='Inception', review_content=f'take {index}', rating=index % 5 + 1)
+		# Same timestamp on every row so the id tie breaker decides
+		Review.objects.update(created_date=Review.objects.first().created_date)
+
+	def walk(self, url, params):
+		response = self.client.get(url, params)
+		ids = []
+		while True:
+			self.assertEqual(response.status_code, 200)
+			self.assertNotIn('count', response.data)
+			results = response.data['results']
+			ids.extend(review['id'] for review in (results['reviews'] if 'reviews' in results else results))
+			if not response.data['next']:
+				return ids
+			response = self.client.get(response.data['next'])
+
+	def test_list_walks_every_ordering_without_gaps(self):
+		url = reverse('review-list')
+		newest = list(Review.objects.order_by('-created_date', '-id').values_list('id', flat=True))
+		self.assertEqual(self.walk(url, {'page_size': 3}), newest)
+		by_rating = list(Review.objects.order_by('rating', 'id').values_list('id', flat=True))
+		self.assertEqual(self.walk(url, {'page_size': 2, 'ordering': 'rating'}), by_rating)
+		self.assertEqual(self.walk(url, {'page_size': 2, 'ordering': '-rating'}), by_rating[::-1])
+
+	def test_movie_listing_is_cursor_paginated(self):
+		ids = self.walk(reverse('review-reviews-by-movie', args=['inception']), {'page_size': 4})
+		self.assertEqual(ids, list(Review.objects.order_by('-id').values_list('id', flat=True)))
+
+	def test_deep_pages_skip_count_and_offset(self):
+		response = self.client.get(reverse('review-list'), {'page_size': 2})
+		response = self.client.get(response.data['next'])
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(response.data['next'])
+		sql = ' '.join(query['sql'] for query in queries)
+		self.assertNotIn('COUNT(', sql)
+		self.assertNotIn('OFFSET', sql)
+
+	def test_html_list_cursor_option(self):
+		for index in range(6):
+			Review.objects.create(movie_title='Dunkirk', review_content='x', rating=3)
+		self.assertContains(self.client.get(reverse('reviews_list')), '?paging=cursor')
+		response = self.client.get(reverse('reviews_list'), {'paging': 'cursor'})
+		self.assertTrue(response.context['cursor_paging'])
+		self.assertIsNone(response.context['cursor_previous'])
+		self.assertEqual(len(response.context['reviews']), 12)
+		response = self.client.get(response.context['cursor_next'])
+		self.assertEqual(len(response.context['reviews']), 1)
+		self.assertIsNotNone(response.context['cursor_previous'])
+
+
+class ReviewCommentsEmbeddingTestCase(APITestCase):
+	def setUp(self):
+		self.users = [User.objects.create(username=f'fan{index}') for index in range(3)]
+		self.busy = Review.objects.create(movie_title='Inception', review_content='x', rating=5)
+		self.quiet = Review.objects.create(movie_title='Tenet', review_content='y', rating=3)
+		ReviewComment.objects.bulk_create([
+			ReviewComment(review=self.busy, user=self.users[index % 3], content=f'comment {index}')
+			for index in range(25)
+		])
+		Review.objects.rebuild_counters()
+
+	@override_settings(REVIEW_LATEST_COMMENTS=2)
+	def test_list_embeds_a_bounded_number_of_comments(self):
+		# The page (with users) and one windowed prefetch of comments with their authors
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('review-list'))
+		reviews = {review['id']: review for review in response.data['results']}
+		busy = reviews[self.busy.pk]
+		self.assertEqual(busy['comments_count'], 25)
+		self.assertEqual([comment['content'] for comment in busy['comments']], ['comment 24', 'comment 23'])
+		self.assertEqual(reviews[self.quiet.pk]['comments'], [])
+		# The key existing clients read
+		self.assertNotIn('latest_comments', busy)
+
+	def test_comments_endpoint_pages_the_whole_thread(self):
+		url = reverse('review-comments', args=[self.busy.pk])
+		contents = []
+		response = self.client.get(url, {'page_size': 10})
+		while True:
+			self.assertEqual(response.status_code, 200)
+			contents.extend(comment['content'] for comment in response.data['results'])
+			if not response.data['next']:
+				break
+			with self.assertNumQueries(2):
+				response = self.client.get(response.data['next'])
+		self.assertEqual(contents, [f'comment {index}' for index in range(25)])
+		self.assertEqual(self.client.get(reverse('review-comments', args=[999])).status_code, 404)
+
+
+class UserReviewHistoryTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create(username='prolific')
+		other = User.objects.create(username='other')
+		start = timezone.now() - datetime.timedelta(days=30)
+		for day in range(30):
+			review = Review.objects.create(movie_title=f'Film {day}', review_content='x', rating=day % 5 + 1, user=self.user)
+			Review.objects.filter(pk=review.pk).update(created_date=start + datetime.timedelta(days=day))
+			ReviewComment.objects.create(review=review, user=other, content='reply')
+		Review.objects.create(movie_title='Film 0', review_content='not mine', rating=5, user=other)
+		self.url = reverse('user-reviews', args=[self.user.pk])
+		self.start = start
+
+	def test_history_is_paginated_with_a_fixed_query_count(self):
+		seen = []
+		response = self.client.get(self.url, {'page_size': 7})
+		while True:
+			self.assertEqual(response.status_code, 200)
+			seen.extend(review['id'] for review in response.data['results'])
+			self.assertTrue(all(review['user'] == 'prolific' for review in response.data['results']))
+			if not response.data['next']:
+				break
+			# The user, the page, the latest comments
+			with self.assertNumQueries(3):
+				response = self.client.get(response.data['next'])
+		self.assertEqual(seen, list(self.user.reviews.order_by('-created_date', '-id').values_list('id', flat=True)))
+
+	def test_rating_and_date_range_filters(self):
+		first_day = timezone.localdate(self.start + datetime.timedelta(days=10)).isoformat()
+		last_day = timezone.localdate(self.start + datetime.timedelta(days=19)).isoformat()
+		response = self.client.get(self.url, {'created_after': first_day, 'created_before': last_day, 'page_size': 50})
+		self.assertEqual(len(response.data['results']), 10)
+		response = self.client.get(self.url, {'rating': [1, 2], 'page_size': 50})
+		self.assertEqual({review['rating'] for review in response.data['results']}, {1, 2})
+		self.assertEqual(len(response.data['results']), 12)
+
+	def test_invalid_filters_are_rejected(self):
+		self.assertEqual(self.client.get(self.url, {'created_after': 'last week'}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {'rating': 'five'}).status_code, 400)
+		self.assertEqual(self.client.get(reverse('review-list'), {'rating': 'five'}).status_code, 400)
+		self.assertEqual(self.client.get(self.url, {'rating': [5, 6]}).status_code, 400)
+
+
+class BulkReviewIngestTestCase(APITestCase):
+	def rows(self, count, title='Inception'):
+		return [{'movie_title': title, 'review_content': f'take {index}', 'rating': index % 5 + 1} for index in range(count)]
+
+	def test_bulk_endpoint_inserts_valid_rows_and_reports_the_rest(self):
+		user = User.objects.create(username='partner')
+		self.client.force_authenticate(user=user)
+		rows = self.rows(3) + [{'movie_title': 'Tenet', 'rating': 9}] + self.rows(2, title='tenet ')
+		response = self.client.post(reverse('review-bulk-create'), rows, format='json')
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.data['created'], 5)
+		self.assertEqual([error['row'] for error in response.data['errors']], [3])
+		self.assertEqual(set(response.data['errors'][0]['errors']), {'review_content', 'rating'})
+
+		self.assertEqual(Review.objects.filter(user=user).count(), 5)
+		self.assertEqual(Review.objects.filter(movie__isnull=True).count(), 0)
+		self.assertEqual(Movie.objects.get(normalized_title='tenet').reviews.count(), 2)
+		self.assertEqual(MovieRatingStats.objects.drifted(), [])
+		self.assertEqual(len(self.client.get(reverse('review-search'), {'q': 'take'}).data['results']), 5)
+
+	def test_query_count_does_not_grow_with_the_body(self):
+		url = reverse('review-bulk-create')
+		# Catalog entry and aggregates row created up front
+		self.client.post(url, self.rows(1), format='json')
+		with CaptureQueriesContext(connection) as small:
+			self.client.post(url, self.rows(5), format='json')
+		with CaptureQueriesContext(connection) as large:
+			self.client.post(url, self.rows(200), format='json')
+		# bulk_create splits a batch into a few INSERTs to respect SQLite's cap on
+		# bound parameters, everything else is one query per batch
+		self.assertLessEqual(len(large), len(small) + 2)
+
+	def test_ndjson_body(self):
+		body = '\n'.join(json.dumps(row) for row in self.rows(4)) + '\n\n'
+		response = self.client.post(reverse('review-bulk-create'), body, content_type='application/x-ndjson')
+		self.assertEqual(response.data['created'], 4)
+		response = self.client.post(reverse('review-bulk-create'), '{"movie_title": \n', content_type='application/x-ndjson')
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(self.client.post(reverse('review-bulk-create'), [], format='json').status_code, 400)
+
+	def test_import_reviews_command_streams_jsonl(self):
+		User.objects.create(username='partner')
+		with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as handle:
+			for row in self.rows(25):
+				handle.write(json.dumps(row) + '\n')
+			handle.write('not json\n')
+			handle.write(json.dumps({'movie_title': 'Dunkirk', 'review_content': 'x', 'rating': 0}) + '\n')
+		self.addCleanup(os.unlink, handle.name)
+		out, err = StringIO(), StringIO()
+		call_command('import_reviews', handle.name, '--batch-size', '10', '--user', 'partner', stdout=out, stderr=err)
+		self.assertIn('Imported 25 review(s), skipped 2 invalid line(s)', out.getvalue())
+		self.assertIn('rows/s', out.getvalue())
+		self.assertIn('line 26: invalid JSON', err.getvalue())
+		self.assertIn('line 27:', err.getvalue())
+		self.assertEqual(Review.objects.filter(user__username='partner').count(), 25)
+		self.assertEqual(MovieRatingStats.objects.drifted(), [])
+
+
+class ReviewExportTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create(username='critic')
+		self.inception = Review.objects.create(movie_title='Inception', review_content='Dreams, "layered"\nnicely', rating=5, user=self.user)
+		Review.objects.create(movie_title='Inception', review_content='Anonymous', rating=2)
+		Review.objects.create(movie_title='Dunkirk', review_content='Beach', rating=4, user=self.user)
+		Review.objects.filter(pk=self.inception.pk).update(likes_count=3, comments_count=1)
+
+	def export(self, **params):
+		response = self.client.get(reverse('reviews-export'), params)
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		return b''.join(response.streaming_content).decode('utf-8')
+
+	def test_ndjson_with_counts_and_filters(self):
+		rows = [json.loads(line) for line in self.export(movie='inception').splitlines()]
+		self.assertEqual([row['id'] for row in rows], sorted(row['id'] for row in rows))
+		self.assertEqual(len(rows), 2)
+		self.assertEqual((rows[0]['likes_count'], rows[0]['comments_count'], rows[0]['user']), (3, 1, 'critic'))
+		self.assertEqual(len(self.export(user='critic', rating=4).splitlines()), 1)
+		today = timezone.localdate().isoformat()
+		self.assertEqual(len(self.export(created_after=today, created_before=today).splitlines()), 3)
+
+	def test_csv_round_trips_awkward_text(self):
+		rows = list(csv.DictReader(StringIO(self.export(format='csv'))))
+		self.assertEqual(len(rows), 3)
+		self.assertEqual(rows[0]['review_content'], 'Dreams, "layered"\nnicely')
+
+	def test_export_runs_one_query(self):
+		with self.assertNumQueries(1):
+			self.export()
+
+	def test_bad_parameters(self):
+		self.assertEqual(self.client.get(reverse('reviews-export'), {'format': 'xml'}).status_code, 400)
+		self.assertEqual(self.client.get(reverse('reviews-export'), {'created_after': 'soon'}).status_code, 400)
+
+	def test_export_is_throttled(self):
+		with mock.patch.dict(throttling.SharedAnonRateThrottle.THROTTLE_RATES, anon='1/min'):
+			self.export()
+			self.assertEqual(self.client.get(reverse('reviews-export'), {'format': 'csv'}).status_code, 429)
+
+	def test_export_reviews_command(self):
+		out = StringIO()
+		call_command('export_reviews', '--movie', 'Inception', '--rating', '5', stdout=out)
+		self.assertEqual([json.loads(line)['id'] for line in out.getvalue().splitlines()], [self.inception.pk])
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'reviews.csv')
+			out = StringIO()
+			call_command('export_reviews', '--format', 'csv', '--output', path, stdout=out)
+			self.assertIn('Exported 3 review(s)', out.getvalue())
+			with open(path, newline='', encoding='utf-8') as handle:
+				self.assertEqual(len(list(csv.DictReader(handle))), 3)
+
+
+class ConditionalGetTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create(username='critic')
+		self.review = Review.objects.create(movie_title='Inception', review_content='Dreams', rating=5, user=self.user)
+		self.review.movie.store_omdb({'Title': 'Inception', 'imdbID': 'tt1375666', 'Year': '2010'})
+		Review.objects.create(movie_title='Inception', review_content='Again', rating=4)
+
+	def revalidate(self, url, response, **params):
+		return self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+	def test_list_answers_304_until_a_row_on_the_page_changes(self):
+		url = reverse('review-list')
+		first = self.client.get(url)
+		self.assertEqual(first.status_code, 200)
+		self.assertIn('no-cache', first['Cache-Control'])
+		# One narrow query for the validator, nothing serialized
+		with self.assertNumQueries(1):
+			self.assertEqual(self.revalidate(url, first).status_code, 304)
+
+		commenter = User.objects.create(username='fan')
+		self.client.force_authenticate(user=commenter)
+		self.client.post(reverse('comment-list'), {'review': self.review.pk, 'content': 'Agreed'})
+		self.assertEqual(self.revalidate(url, first).status_code, 200)
+		self.assertNotEqual(self.client.get(url, {'rating': 5})['ETag'], first['ETag'])
+
+	def test_retrieve_validators(self):
+		url = reverse('review-detail', args=[self.review.pk])
+		first = self.client.get(url)
+		self.assertEqual(first.status_code, 200)
+		with self.assertNumQueries(1):
+			self.assertEqual(self.revalidate(url, first).status_code, 304)
+		response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+		self.assertEqual(response.status_code, 304)
+
+		self.client.force_authenticate(user=self.user)
+		self.client.patch(url, {'review_content': 'Dreams within dreams'})
+		self.assertEqual(self.revalidate(url, first).status_code, 200)
+		self.assertEqual(self.client.get(reverse('review-detail', args=[999])).status_code, 404)
+
+	def test_reviews_by_movie_tracks_reviews_and_stats(self):
+		url = reverse('review-reviews-by-movie', args=['inception'])
+		first = self.client.get(url)
+		self.assertEqual(self.revalidate(url, first).status_code, 304)
+		Review.objects.filter(pk=self.review.pk).delete()
+		self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+	def test_movie_endpoints_serve_the_catalog_without_omdb(self):
+		with override_settings(OMDB_API_URL='http://127.0.0.1:9/'):
+			url = reverse('movie-info')
+			first = self.client.get(url, {'title': 'INCEPTION'})
+			self.assertEqual(first.data['imdbID'], 'tt1375666')
+			with self.assertNumQueries(1):
+				self.assertEqual(self.client.get(url, {'title': 'inception'}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+			url = reverse('movie-details', args=['tt1375666'])
+			first = self.client.get(url)
+			self.assertEqual(first.status_code, 200)
+			self.assertEqual(self.revalidate(url, first).status_code, 304)
+
+
+class PageCacheTestCase(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create(username='critic')
+		self.review = Review.objects.create(movie_title='Inception', review_content='Dreams', rating=5, user=self.user)
+		self.review.movie.store_omdb({'Title': 'Inception', 'imdbID': 'tt1375666', 'Plot': 'A thief in dreams'})
+
+	def test_home_and_list_are_served_from_cache_until_reviews_change(self):
+		for url in (reverse('home'), reverse('reviews_list')):
+			self.assertContains(self.client.get(url), 'Inception')
+			with self.assertNumQueries(0):
+				self.assertContains(self.client.get(url), 'Inception')
+
+		Review.objects.create(movie_title='Dunkirk', review_content='Loud', rating=4)
+		self.assertContains(self.client.get(reverse('home')), 'Dunkirk')
+		self.assertContains(self.client.get(reverse('reviews_list')), 'Dunkirk')
+		Review.objects.filter(movie_title='Dunkirk').delete()
+		self.assertNotContains(self.client.get(reverse('reviews_list')), 'Dunkirk')
+
+	def test_list_rendered_from_the_fragment_it_read(self):
+		url = reverse('reviews_list')
+		self.client.get(url)
+		# The entry expires between the view's lookup and the {% cache %} tag's
+		fragment = page_cache.cached_fragment('reviews_list', page_cache.version('reviews'), url)
+		with mock.patch.object(page_cache, 'cached_fragment', return_value=fragment):
+			cache.clear()
+			self.assertContains(self.client.get(url), 'Inception')
+		self.assertContains(self.client.get(url), 'Inception')
+
+	def test_cached_home_page_keeps_csrf_tokens_per_visitor(self):
+		first = self.client.get(reverse('home'))
+		second = self.client_class().get(reverse('home'))
+		self.assertNotContains(second, page_cache.CSRF_PLACEHOLDER)
+		token = re.search(rb'name="csrf-token" content="([^"]+)"', second.content).group(1)
+		self.assertNotIn(token, first.content)
+
+	def test_bulk_ingest_refreshes_the_list(self):
+		self.client.get(reverse('reviews_list'))
+		self.client.force_authenticate(user=self.user)
+		self.client.post(reverse('review-bulk-create'), [{'movie_title': 'Dunkirk', 'review_content': 'Loud', 'rating': 4}], format='json')
+		self.assertContains(self.client.get(reverse('reviews_list')), 'Dunkirk')
+
+	def test_review_page_follows_likes_and_comments(self):
+		url = reverse('review_detail', args=[self.review.pk])
+		self.assertContains(self.client.get(url), '0 likes')
+		# One narrow lookup, no OMDB and no rendering of the cached body
+		with override_settings(OMDB_API_URL='http://127.0.0.1:9/'), self.assertNumQueries(1):
+			response = self.client.get(url)
+		self.assertContains(response, 'A thief in dreams')
+		self.assertContains(response, 'By critic')
+
+		self.client.force_authenticate(user=User.objects.create(username='fan'))
+		self.client.post(reverse('like-list'), {'review': self.review.pk})
+		self.assertContains(self.client.get(url), '1 like ')
+		self.client.post(reverse('comment-list'), {'review': self.review.pk, 'content': 'Agreed'})
+		self.assertContains(self.client.get(url), '1 comment')
+		self.client.delete(reverse('like-detail', args=[ReviewLike.objects.get().pk]))
+		self.client.delete(reverse('comment-detail', args=[ReviewComment.objects.get().pk]))
+		self.assertContains(self.client.get(url), '0 likes')
+
+		self.review.review_content = 'Dreams within dreams'
+		self.review.save()
+		self.assertContains(self.client.get(url), 'Dreams within dreams')
+		self.review.delete()
+		self.assertEqual(self.client.get(url).status_code, 404)
+
+	def test_owner_actions_stay_per_user(self):
+		url = reverse('review_detail', args=[self.review.pk])
+		self.assertNotContains(self.client.get(url), 'Delete Review')
+		self.client.force_login(self.user)
+		self.assertContains(self.client.get(url), 'Delete Review')
+
+
+class SQLiteProfileTestCase(SimpleTestCase):
+	def test_tuned_profile_connections(self):
+		with tempfile.TemporaryDirectory() as directory:
+			handler = ConnectionHandler({
+				'default': sqlite_database(os.path.join(directory, 'plain.sqlite3'), tuned=False),
+				'tuned': sqlite_database(os.path.join(directory, 'tuned.sqlite3'), busy_timeout=2.5),
+			})
+			tuned = handler['tuned']
+			try:
+				with tuned.cursor() as cursor:
+					pragmas = {}
+					for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store'):
+						cursor.execute(f'PRAGMA {name}')
+						pragmas[name] = cursor.fetchone()[0]
+				# NORMAL and MEMORY
+				self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 2500, 'temp_store': 2})
+				self.assertEqual(tuned.transaction_mode, 'IMMEDIATE')
+				self.assertEqual(tuned.settings_dict['CONN_MAX_AGE'], 600)
+			finally:
+				handler.close_all()
+
+	def test_untuned_profile_keeps_sqlite_defaults(self):
+		self.assertEqual(sqlite_database('db.sqlite3', tuned=False), {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'db.sqlite3'})
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTestCase(SimpleTestCase):
+	# Outside TestCase's transaction, which pins reads to the primary
+	databases = {'default'}
+
+	def setUp(self):
+		self.factory = RequestFactory()
+		self.router = replicas.ReplicaRouter()
+
+	def route(self, request, write=False):
+		"""Where the view's reads go, and its response"""
+		seen = []
+
+		def view(request):
+			if write:
+				self.router.db_for_write(Review)
+			seen.append(self.router.db_for_read(Review))
+			return HttpResponse()
+
+		response = replicas.ReplicaMiddleware(view)(request)
+		return seen[0], response
+
+	def test_reads_of_safe_requests_go_to_a_replica(self):
+		self.assertEqual(self.route(self.factory.get('/'))[0], 'replica1')
+		database, response = self.route(self.factory.post('/'))
+		self.assertEqual(database, 'default')
+		self.assertIn(replicas.STICKY_COOKIE, response.cookies)
+		with override_settings(DATABASE_REPLICAS=[]):
+			self.assertEqual(self.route(self.factory.get('/'))[0], 'default')
+
+	def test_read_after_write(self):
+		# In the same request
+		self.assertEqual(self.route(self.factory.get('/'), write=True)[0], 'default')
+		# And for the client that wrote, until the cookie expires
+		request = self.factory.get('/')
+		request.COOKIES[replicas.STICKY_COOKIE] = str(time.time() + 5)
+		self.assertEqual(self.route(request)[0], 'default')
+		request.COOKIES[replicas.STICKY_COOKIE] = str(time.time() - 1)
+		self.assertEqual(self.route(request)[0], 'replica1')
+
+	def test_per_request_choice(self):
+		self.assertEqual(self.route(self.factory.get('/', HTTP_X_READ_FROM='primary'))[0], 'default')
+		request = self.factory.get('/', HTTP_X_READ_FROM='replica')
+		request.COOKIES[replicas.STICKY_COOKIE] = str(time.time() + 5)
+		self.assertEqual(self.route(request)[0], 'replica1')
+
+	def test_primary_outside_requests_and_in_transactions(self):
+		self.assertEqual(self.router.db_for_read(Review), 'default')
+		with replicas.use_replica():
+			self.assertEqual(self.router.db_for_read(Review), 'replica1')
+			with transaction.atomic():
+				self.assertEqual(self.router.db_for_read(Review), 'default')
+			with replicas.use_primary():
+				self.assertEqual(self.router.db_for_read(Review), 'default')
+		self.assertFalse(self.router.allow_migrate('replica1', 'reviews'))
+		self.assertIsNone(self.router.allow_migrate('default', 'reviews'))
+
+
+class SharedThrottleTestCase(SimpleTestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.store = throttling.SQLiteRateLimitStore(os.path.join(self.directory.name, 'ratelimit.sqlite3'))
+
+	def tearDown(self):
+		self.store.close()
+		self.directory.cleanup()
+
+	def test_bucket_refills_continuously(self):
+		self.assertEqual([self.store.hit('client', 3, 60, now=100)[0] for _ in range(4)], [True, True, True, False])
+		self.assertEqual(self.store.hit('client', 3, 60, now=110), (False, 10))
+		self.assertTrue(self.store.hit('client', 3, 60, now=120)[0])
+		self.assertFalse(self.store.hit('client', 3, 60, now=120)[0])
+		# Other clients have their own bucket
+		self.assertTrue(self.store.hit('other', 3, 60, now=120)[0])
+
+	def test_store_is_a_file_unless_the_database_is_in_memory(self):
+		def path(vendor, name):
+			database = mock.Mock(vendor=vendor, settings_dict={'NAME': name})
+			with mock.patch.object(throttling, 'connections', {'default': database}), override_settings(BASE_DIR=self.directory.name):
+				return throttling.store_path()
+
+		self.assertIn('mode=memory', path('sqlite', 'file:memorydb_default?mode=memory&cache=shared'))
+		self.assertEqual(path('sqlite', '/srv/db.sqlite3'), '/srv/db.ratelimit.sqlite3')
+		# Shared by the workers of a server-side database too
+		self.assertEqual(path('postgresql', 'movies'), os.path.join(self.directory.name, 'ratelimit.sqlite3'))
+
+	def test_limit_is_shared_across_processes(self):
+		context = multiprocessing.get_context('fork')
+		results = context.Queue()
+
+		def hammer():
+			results.put(sum(self.store.hit('client', 20, 3600)[0] for _ in range(20)))
+
+		self.store.hit('client', 20, 3600)
+		processes = [context.Process(target=hammer) for _ in range(3)]
+		for process in processes:
+			process.start()
+		allowed = sum(results.get() for _ in processes)
+		for process in processes:
+			process.join()
+		self.assertEqual(allowed, 19)
+
+	def test_each_test_starts_with_empty_buckets(self):
+		# Set by moviereviewapi.test_runner, whatever earlier tests requested
+		self.assertEqual(throttling.get_store().conn.execute('SELECT COUNT(*) FROM rate_limit').fetchone()[0], 0)
+
+	def test_throttle_reports_retry_after(self):
+		throttle_class = type('Throttle', (throttling.SharedAnonRateThrottle,), {'rate': '2/min'})
+		request = Request(RequestFactory().get('/', REMOTE_ADDR='10.1.2.3'))
+		with override_settings(RATE_LIMIT_STORE=self.store.path):
+			self.assertTrue(throttle_class().allow_request(request, None))
+			self.assertTrue(throttle_class().allow_request(request, None))
+			throttle = throttle_class()
+			self.assertFalse(throttle.allow_request(request, None))
+			self.assertAlmostEqual(throttle.wait(), 30, delta=1)
+
+
+	def test_store_errors_let_requests_through(self):
+		request = Request(RequestFactory().get('/', REMOTE_ADDR='10.1.2.3'))
+		locked = mock.Mock(side_effect=sqlite3.OperationalError('database is locked'))
+		with mock.patch.object(throttling.SQLiteRateLimitStore, 'hit', locked), self.assertLogs('reviews.throttling', 'WARNING') as logs:
+			self.assertTrue(throttling.SharedAnonRateThrottle().allow_request(request, None))
+		self.assertIn('database is locked', logs.output[0])
+
+class ORJSONRendererTestCase(TestCase):
+	data = {
+		'id': 7,
+		'movie_title': 'Amélie \u2028 "quoted"',
+		'created_at': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+		'local': datetime.datetime(2024, 5, 1, 14, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+		'day': datetime.date(2024, 5, 1),
+		'average': decimal.Decimal('4.50'),
+		'rating': 4.25,
+		'tags': ['a', None, True],
+		'nested': {'empty': [], 'count': 0},
+	}
+
+	def test_same_bytes_as_drf(self):
+		self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+		self.assertEqual(ORJSONRenderer().render([]), b'[]')
+		self.assertEqual(ORJSONRenderer().render(None), b'')
+
+	def test_falls_back_for_indent_and_big_integers(self):
+		accepted = 'application/json; indent=2'
+		self.assertEqual(ORJSONRenderer().render(self.data, accepted), JSONRenderer().render(self.data, accepted))
+		self.assertEqual(ORJSONRenderer().render({'n': 2 ** 70}), b'{"n":1180591620717411303424}')
+
+	def test_documented_differences_from_drf(self):
+		# Listed in the README and the renderer's docstring
+		self.assertEqual(ORJSONRenderer().render({'n': float('nan'), 'big': 1e16}), b'{"n":null,"big":1e16}')
+		with self.assertRaises(ValueError):
+			JSONRenderer().render({'n': float('nan')})
+		self.assertEqual(JSONRenderer().render({'big': 1e16}), b'{"big":1e+16}')
+
+	def test_parser_matches_drf(self):
+		body = '{"movie_title": "Amélie", "rating": 4.5, "tags": [1, null]}'.encode()
+		context = {'encoding': 'utf-8'}
+		self.assertEqual(ORJSONParser().parse(BytesIO(body), parser_context=context), JSONParser().parse(BytesIO(body), parser_context=context))
+		for invalid in (b'{"rating": ', b'{"rating": NaN}'):
+			with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+				ORJSONParser().parse(BytesIO(invalid), parser_context=context)
+		with self.assertRaisesMessage(ParseError, 'line 2'):
+			NDJSONParser().parse(BytesIO(b'{"a": 1}\n{"a": \n'), parser_context=context)
+
+	def test_api_responses(self):
+		response = self.client.get(reverse('review-list'), HTTP_ACCEPT='application/json')
+		self.assertEqual(response['Content-Type'], 'application/json')
+		self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class ReviewProjectionTestCase(APITestCase):
+	def setUp(self):
+		self.users = [User.objects.create(username=f'critic{index}') for index in range(3)]
+		Movie.objects.create(title='Inception', fetched_at=timezone.now(), omdb_data={'Title': 'Inception'})
+		for index in range(8):
+			review = Review.objects.create(
+				movie_title='Inception' if index % 2 else 'Amélie', review_content=f'Review \u2028 {index}',
+				rating=index % 5 + 1, user=self.users[index % 3] if index % 4 else None,
+			)
+			ReviewComment.objects.bulk_create([
+				ReviewComment(review=review, user=self.users[number % 3], content=f'comment {number}')
+				for number in range(index)
+			])
+		Review.objects.filter(pk=review.pk).update(created_date=datetime.datetime(2024, 1, 1, 12, 0, 0, 5, tzinfo=datetime.timezone.utc))
+		Review.objects.rebuild_counters()
+
+	def serialized(self, queryset):
+		return ReviewSerializer(queryset.select_related('user').with_latest_comments(), many=True).data
+
+	def assertMatchesSerializer(self, queryset):
+		expected = json.loads(JSONRenderer().render(self.serialized(queryset)))
+		projected = projections.represent_reviews(projections.review_rows(queryset))
+		self.assertEqual(JSONRenderer().render(projected), JSONRenderer().render(expected))
+
+	def test_same_output_as_review_serializer(self):
+		queryset = Review.objects.order_by('-created_date', '-id')
+		self.assertMatchesSerializer(queryset)
+		with override_settings(REVIEW_LATEST_COMMENTS=1, TIME_ZONE='Asia/Kolkata'), timezone.override('Asia/Kolkata'):
+			self.assertMatchesSerializer(queryset)
+		self.assertEqual(projections.represent_reviews(projections.review_rows(Review.objects.none())), [])
+
+	def test_list_endpoints_match_review_serializer(self):
+		ordered = Review.objects.order_by('-created_date', '-id')
+		user = self.users[1]
+		for url, queryset in (
+			(reverse('review-list'), ordered),
+			(reverse('user-reviews', args=[user.pk]), ordered.filter(user=user)),
+		):
+			response = self.client.get(url, {'page_size': 100})
+			self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(self.serialized(queryset))))
+		response = self.client.get(reverse('review-reviews-by-movie', args=['inception']), {'page_size': 100})
+		expected = self.serialized(ordered.filter(movie_title='Inception'))
+		self.assertEqual(response.json()['results']['reviews'], json.loads(JSONRenderer().render(expected)))
+
+	def test_search_pages_keep_their_rank(self):
+		response = self.client.get(reverse('review-list'), {'search': 'review', 'page_size': 3})
+		self.assertEqual(response.status_code, 200)
+		seen = [review['id'] for review in response.data['results']]
+		seen += [review['id'] for review in self.client.get(response.data['next']).data['results']]
+		self.assertEqual(len(set(seen)), 6)
+
+
+class SeedBenchmarkTestCase(TestCase):
+	options = {'users': 30, 'movies': 8, 'reviews': 300, 'likes': 600, 'comments': 200, 'stdout': StringIO()}
+
+	def seeded(self):
+		call_command('seed_benchmark', **self.options)
+		return (
+			list(Review.objects.order_by('id').values_list('movie_title', 'rating', 'user__username', 'likes_count', 'comments_count')),
+			list(ReviewComment.objects.order_by('id').values_list('review__movie_title', 'user__username', 'content')),
+		)
+
+	def test_consistent_and_skewed(self):
+		self.seeded()
+		self.assertEqual(Review.objects.count(), 300)
+		self.assertEqual(ReviewComment.objects.count(), 200)
+		self.assertLessEqual(ReviewLike.objects.count(), 600)
+		# Counters and aggregates agree with the rows, films carry their OMDB payload
+		self.assertEqual(Review.objects.drifted().count(), 0)
+		self.assertEqual(MovieRatingStats.objects.drifted(), [])
+		self.assertFalse(Movie.objects.filter(fetched_at=None).exists())
+		# Ids follow the creation dates, which spread over the past
+		dates = list(Review.objects.order_by('id').values_list('created_date', flat=True))
+		self.assertEqual(dates, sorted(dates))
+		self.assertGreater(dates[-1] - dates[0], datetime.timedelta(days=30))
+		# The most reviewed film has several times its fair share
+		counts = sorted(MovieRatingStats.objects.values_list('review_count', flat=True), reverse=True)
+		self.assertGreater(counts[0], 2 * 300 / 8)
+		with self.assertRaises(CommandError):
+			call_command('seed_benchmark', **self.options)
+
+	def test_same_seed_same_data(self):
+		with transaction.atomic():
+			first = self.seeded()
+			transaction.set_rollback(True)
+		self.assertEqual(self.seeded(), first)
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True)
+class InstrumentationTestCase(QueryBudgetMixin, APITestCase):
+	def setUp(self):
+		cache.clear()
+		self.users = [User.objects.create(username=f'critic{index}') for index in range(3)]
+		for index in range(6):
+			review = Review.objects.create(movie_title='Inception', review_content=f'Review {index}', rating=4, user=self.users[index % 3])
+			ReviewComment.objects.create(review=review, user=self.users[0], content='Agreed')
+
+	def test_server_timing_and_log_line(self):
+		with self.assertLogs('reviews.instrumentation', 'INFO') as logs:
+			response = self.client.get(reverse('review-detail', args=[Review.objects.first().pk]))
+		self.assertEqual(response.status_code, 200)
+		timing = response['Server-Timing']
+		self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+$')
+		record = logs.records[0].instrumentation
+		self.assertEqual((record['view'], record['status']), ('review-detail', 200))
+		self.assertIn(f'queries={record["queries"]} ', logs.output[0])
+		self.assertGreater(record['queries'], 0)
+		self.assertGreater(record['serializer_ms'], 0)
+
+	def test_repeated_queries_logged(self):
+		def view(request):
+			return HttpResponse(', '.join(review.user.username for review in Review.objects.all()))
+
+		with self.assertLogs('reviews.instrumentation', 'INFO') as logs:
+			response = InstrumentationMiddleware(view)(RequestFactory().get('/n-plus-one/'))
+		self.assertIn('7 queries, 6 repeated', response['Server-Timing'])
+		warnings = [record for record in logs.records if record.levelname == 'WARNING']
+		self.assertEqual(len(warnings), 1)
+		self.assertIn('Query ran 6 times in GET /n-plus-one/', warnings[0].getMessage())
+
+	def test_omdb_calls_and_nested_timings(self):
+		stub = OMDBStubServer().start()
+		try:
+			with override_settings(OMDB_API_KEY='test-key', OMDB_API_URL=stub.url), instrumentation.collect() as collector:
+				omdb_utils.fetch_movie_info('Inception')
+				omdb_utils.fetch_movie_info('Inception')
+		finally:
+			stub.stop()
+		# The second lookup is served from the cache
+		self.assertEqual(collector.counts['omdb'], 1)
+		with instrumentation.collect() as collector:
+			ReviewSerializer(Review.objects.select_related('user').with_latest_comments(), many=True).data
+			with timed('serializer'):
+				pass
+		# One per review, the nested comment serializers are not counted again
+		self.assertEqual(collector.counts['serializer'], 7)
+
+	def test_disabled_and_sampling(self):
+		url = reverse('review-list')
+		with override_settings(REQUEST_INSTRUMENTATION=False):
+			self.assertNotIn('Server-Timing', self.client.get(url))
+		with override_settings(INSTRUMENTATION_SAMPLE_RATE=0):
+			self.assertNotIn('Server-Timing', self.client.get(url))
+		with override_settings(INSTRUMENTATION_SERVER_TIMING=False), self.assertLogs('reviews.instrumentation', 'INFO'):
+			self.assertNotIn('Server-Timing', self.client.get(url))
+
+	def test_endpoint_query_budgets(self):
+		user = self.users[0]
+		for url, budget in (
+			(reverse('review-list'), 3),
+			(reverse('review-detail', args=[Review.objects.first().pk]), 3),
+			(reverse('review-reviews-by-movie', args=['inception']), 4),
+			(reverse('user-reviews', args=[user.pk]), 4),
+			(reverse('review-comments', args=[Review.objects.first().pk]), 2),
+		):
+			response = self.assertEndpointQueryBudget(url, budget, max_repeated=1)
+			self.assertEqual(response.status_code, 200, url)
+		with self.assertRaisesRegex(AssertionError, r'6 queries, over the budget of 5 and statements run more than 1'):
+			with query_budget(5, max_repeated=1):
+				[review.user.username for review in Review.objects.all()[:5]]
+
+
+class MetricsTestCase(APITestCase):
+	def setUp(self):
+		cache.clear()
+		metrics.reset()
+		self.review = Review.objects.create(movie_title='Inception', review_content='Great movie!', rating=5)
+		self.review.movie.store_omdb({'Title': 'Inception', 'imdbID': 'tt1375666', 'Plot': 'A thief in dreams'})
+
+	def test_store_is_a_file_unless_the_database_is_in_memory(self):
+		def path(vendor, name):
+			database = mock.Mock(vendor=vendor, settings_dict={'NAME': name})
+			with mock.patch.object(metrics, 'connections', {'default': database}), override_settings(BASE_DIR='/srv/app'):
+				return metrics.store_path()
+
+		self.assertIn('mode=memory', path('sqlite', ':memory:'))
+		self.assertEqual(path('sqlite', '/srv/db.sqlite3'), '/srv/db.metrics.sqlite3')
+		# Aggregated across the workers of a server-side database too
+		self.assertEqual(path('postgresql', 'movies'), os.path.join('/srv/app', 'metrics.sqlite3'))
+
+	def scrape(self, **headers):
+		response = self.client.get(reverse('metrics'), **headers)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+		return dict(line.rsplit(' ', 1) for line in response.content.decode().splitlines() if not line.startswith('#'))
+
+	def test_request_counts_latency_and_queries(self):
+		for url in (reverse('review-list'), reverse('review-list'), reverse('review-detail', args=[self.review.pk]), '/no-such-page/'):
+			self.client.get(url)
+		samples = self.scrape()
+		self.assertEqual(samples['http_requests_total{route="review-list",method="GET",status="200"}'], '2')
+		self.assertEqual(samples['http_requests_total{route="review-detail",method="GET",status="200"}'], '1')
+		self.assertEqual(samples['http_requests_total{route="unmatched",method="GET",status="404"}'], '1')
+		buckets = [int(samples[f'http_request_duration_seconds_bucket{{route="review-list",method="GET",le="{bound}"}}']) for bound in ('0.005', '0.1', '10', '+Inf')]
+		self.assertEqual(buckets, sorted(buckets))
+		self.assertEqual(buckets[-1], 2)
+		self.assertEqual(samples['http_request_duration_seconds_count{route="review-list",method="GET"}'], '2')
+		self.assertGreater(float(samples['http_request_duration_seconds_sum{route="review-list",method="GET"}']), 0)
+		self.assertGreater(int(samples['http_request_db_queries_total{route="review-list"}']), 2)
+
+	def test_omdb_cache_and_throttle_series(self):
+		with override_settings(OMDB_API_KEY='test-key', OMDB_API_URL='http://127.0.0.1:9/', OMDB_MAX_RETRIES=0):
+			with self.assertLogs('reviews', 'WARNING'):
+				self.assertIsNone(omdb_utils.fetch_movie_info('Inception'))
+		for url in (reverse('home'), reverse('reviews_list'), reverse('review_detail', args=[self.review.pk])):
+			self.client.get(url)
+			self.client.get(url)
+		# An open breaker refuses the lookup without calling OMDB
+		breaker = CircuitBreaker(failure_threshold=1)
+		breaker.record_failure('test')
+		with override_settings(OMDB_API_KEY='test-key'), mock.patch.object(get_client(), 'breaker', breaker):
+			self.assertIsNone(omdb_utils.fetch_movie_by_imdb_id('tt0000001'))
+		throttle_class = type('Throttle', (throttling.SharedAnonRateThrottle,), {'rate': '1/min'})
+		request = Request(RequestFactory().get('/', REMOTE_ADDR='10.9.8.7'))
+		self.assertEqual([throttle_class().allow_request(request, None) for _ in range(3)], [True, False, False])
+		samples = self.scrape()
+		self.assertEqual(samples['omdb_requests_total{outcome="error"}'], '1')
+		self.assertEqual(samples['omdb_requests_total{outcome="rejected"}'], '1')
+		self.assertEqual(samples['omdb_request_duration_seconds_count'], '1')
+		self.assertEqual(samples['omdb_cache_events_total{event="misses"}'], '2')
+		self.assertEqual(samples['omdb_cache_hit_ratio'], '0')
+		for page in ('home', 'reviews_list', 'review_detail'):
+			self.assertEqual(samples[f'page_cache_lookups_total{{page="{page}",result="hit"}}'], '1', page)
+			self.assertEqual(samples[f'page_cache_lookups_total{{page="{page}",result="miss"}}'], '1', page)
+		self.assertEqual(samples['page_cache_hit_ratio'], '0.5')
+		self.assertEqual(samples['throttle_rejections_total{scope="anon"}'], '2')
+		self.assertEqual(samples['omdb_circuit_breaker_open'], '0')
+
+	def test_counts_add_up_across_processes(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		context = multiprocessing.get_context('fork')
+
+		def worker():
+			for _ in range(5):
+				metrics.increment('throttle_rejections_total', scope='worker')
+			metrics.flush()
+
+		with override_settings(METRICS_STORE=os.path.join(directory.name, 'metrics.sqlite3')):
+			metrics.increment('throttle_rejections_total', scope='worker')
+			processes = [context.Process(target=worker) for _ in range(3)]
+			for process in processes:
+				process.start()
+			for process in processes:
+				process.join()
+			self.assertIn('throttle_rejections_total{scope="worker"} 16\n', metrics.render())
+
+	def test_token(self):
+		with override_settings(METRICS_TOKEN='s3cret'):
+			self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+			self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+			samples = self.scrape(HTTP_AUTHORIZATION='Bearer s3cret')
+		self.assertEqual(samples['http_requests_total{route="metrics",method="GET",status="403"}'], '2')
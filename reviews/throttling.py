@@ -0,0 +1,179 @@
+"""
+Rate limiting shared by every worker process.
+
+DRF's stock throttles keep a list of request timestamps per client in the
+Django cache: with the default per-process cache every worker enforces its own
+limit, and every check reads, trims and rewrites the whole list.
+
+The throttles here keep one number per client, its theoretical arrival time
+(GCRA, the generic cell rate algorithm: a token bucket that refills
+continuously, stored as the time the bucket will be full again), in a small
+SQLite database that all workers open. A check is a single UPSERT that
+accepts and records the request or leaves the row alone, O(1) whatever the
+rate. The store lives next to the main database file unless
+``RATE_LIMIT_STORE`` names one, in BASE_DIR when the main database is not
+SQLite, and in memory when the main database is (the test database); the
+test runner empties it before every test.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.signals import setting_changed
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID'
+# Accept the request when the bucket has room: the new arrival time may run
+# ahead of now by at most the period. A rejected request matches no row.
+HIT_SQL = (
+    'INSERT INTO rate_limit (key, tat) VALUES (:key, :now + :interval) '
+    'ON CONFLICT (key) DO UPDATE SET tat = MAX(tat, :now) + :interval '
+    'WHERE MAX(tat, :now) + :interval - :now <= :period '
+    'RETURNING tat'
+)
+# Rows whose bucket is full again carry no information
+PURGE_SQL = 'DELETE FROM rate_limit WHERE tat < ?'
+PURGE_EVERY = 1000
+
+
+class SQLiteRateLimitStore:
+    """GCRA buckets in a SQLite file, one connection per thread of each process"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False, uri=True)
+        # Losing the last updates in a crash only forgets a few requests
+        for pragma in ('journal_mode=WAL', 'synchronous=OFF', 'temp_store=MEMORY'):
+            conn.execute(f'PRAGMA {pragma}')
+        conn.execute(SCHEMA)
+        return conn
+
+    @property
+    def conn(self):
+        local = self._local
+        # Connections must not cross a fork
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn, local.pid = self.connect(), os.getpid()
+        return local.conn
+
+    def hit(self, key, limit, period, now=None):
+        """
+        Count a request of ``key`` against ``limit`` requests per ``period``
+        seconds. Returns ``(allowed, retry_after)``, in seconds.
+        """
+        now = time.time() if now is None else now
+        interval = period / limit
+        conn = self.conn
+        # fetchall() steps the statement to its end, which commits it
+        accepted = conn.execute(HIT_SQL, {'key': key, 'now': now, 'interval': interval, 'period': period}).fetchall()
+        if random.randrange(PURGE_EVERY) == 0:
+            conn.execute(PURGE_SQL, (now,))
+        if accepted:
+            return True, 0.0
+        tat = conn.execute('SELECT tat FROM rate_limit WHERE key = ?', (key,)).fetchone()[0]
+        # The bucket has room again once the arrival time is back within the period
+        return False, max(tat + interval - now - period, 0.0)
+
+    def reset(self):
+        self.conn.execute('DELETE FROM rate_limit')
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            self._local.pid = None
+
+
+def store_path():
+    """
+    ``RATE_LIMIT_STORE``, else next to the main SQLite file, else in BASE_DIR
+    for a server-side database; in memory only with an in-memory database
+    """
+    path = getattr(settings, 'RATE_LIMIT_STORE', None)
+    if path:
+        return str(path)
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        return str(Path(getattr(settings, 'BASE_DIR', '.')) / 'ratelimit.sqlite3')
+    name = str(connection.settings_dict['NAME'])
+    if 'mode=memory' in name or name == ':memory:':
+        # One process only: the test database
+        return 'file:rate_limit?mode=memory&cache=shared'
+    return str(Path(name).with_suffix('.ratelimit.sqlite3'))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteRateLimitStore(store_path())
+    return _store
+
+
+def reset_store():
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+
+
+def _reset_on_setting_change(setting, **kwargs):
+    if setting in ('RATE_LIMIT_STORE', 'DATABASES'):
+        reset_store()
+
+
+setting_changed.connect(_reset_on_setting_change)
+
+
+class SharedRateThrottleMixin:
+    """
+    Replaces the cache-backed history of a SimpleRateThrottle with the shared
+    GCRA store; rates, scopes and client keys are DRF's
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        try:
+            allowed, self.retry_after = get_store().hit(self.key, self.num_requests, self.duration, self.timer())
+        except sqlite3.OperationalError as exc:
+            # A locked or unavailable store must not take the API down: let the request through
+            logger.warning("Rate limit check failed, allowing the request: %s", exc)
+            return True
+        if not allowed:
+            metrics.increment('throttle_rejections_total', scope=self.scope)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'retry_after', None)
+
+
+class SharedAnonRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     UserViewSet, ReviewViewSet, RegisterView, UserProfileViewSet, 
     ReviewLikeViewSet, ReviewCommentViewSet, search_movies_view, 
     movie_details_view, movie_info_view, home_view, movie_search_view,
-    ReviewsListView, search_movies_public, review_detail_view
+    ReviewsListView, search_movies_public, review_detail_view, omdb_status_view,
+    ReviewExportView, metrics_view
 )
 
 router = DefaultRouter()
@@ -27,5 +29,17 @@ urlpatterns = [
     path('api/search-movies-auth/', search_movies_view, name='search-movies'),
     path('api/movie-details/<str:imdb_id>/', movie_details_view, name='movie-details'),
     path('api/movie-info/', movie_info_view, name='movie-info'),
+    path('api/omdb-status/', omdb_status_view, name='omdb-status'),
+    path('metrics', metrics_view, name='metrics'),
+    # Ahead of the router, which would read "export" as a review id
+    path('api/reviews/export/', ReviewExportView.as_view(), name='reviews-export'),
+
+    # Async variants of the OMDB-bound endpoints (ASGI)
+    path('api/async/search-movies/', async_views.search_movies_public_async, name='async-search-movies-public'),
+    path('api/async/search-movies-auth/', async_views.search_movies_async, name='async-search-movies'),
+    path('api/async/movie-details/<str:imdb_id>/', async_views.movie_details_async, name='async-movie-details'),
+    path('api/async/movie-info/', async_views.movie_info_async, name='async-movie-info'),
+    path('api/async/reviews/<int:pk>/', async_views.review_detail_async, name='async-review-detail'),
+    path('api/async/reviews/movie/<str:title>/', async_views.reviews_by_movie_async, name='async-reviews-by-movie'),
     path('api/', include(router.urls)),
 ]
@@ -1,16 +1,34 @@
-from .omdb_utils import fetch_movie_info, search_movies, fetch_movie_by_imdb_id
+import hmac
+
+from .omdb_utils import fetch_movie_info, search_movies, fetch_movie_by_imdb_id, cache_stats, normalize_title
+from .omdb_client import CircuitBreaker, get_client
 from rest_framework import viewsets, permissions, filters, generics
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Review, UserProfile, ReviewLike, ReviewComment
+from .models import Movie, MovieRatingStats, Review, UserProfile, ReviewLike, ReviewComment
 from .serializers import UserSerializer, ReviewSerializer, UserProfileSerializer, ReviewLikeSerializer, ReviewCommentSerializer
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
-from django.shortcuts import render
+from rest_framework.negotiation import DefaultContentNegotiation
+from .pagination import KeysetPagination, ReviewCursorPagination
+from .filters import FullTextSearchFilter, filter_reviews
+from .conditional import add_validators, conditional, make_etag, not_modified
+from .export import FORMATS, export_lines, export_queryset
+from .ingest import ingest_reviews
+from .parsers import NDJSONParser, ORJSONParser
+from .search import get_search_backend
+from . import metrics, page_cache, projections, recommender
+from rest_framework.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404, render
 from django.views.generic import ListView
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import require_GET
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -26,10 +44,15 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
+        """
+        A user's reviews, newest first, keyset paginated; filter with ?rating=,
+        ?created_after= and ?created_before=. Three queries per page.
+        """
         user = self.get_object()
-        reviews = user.reviews.all()
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        reviews = filter_reviews(user.reviews.all(), request.query_params)
+        paginator = ReviewCursorPagination()
+        page = paginator.paginate_queryset(projections.review_rows(reviews), request, view=self)
+        return paginator.get_paginated_response(projections.represent_reviews(page))
 class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
@@ -57,7 +80,29 @@ class ReviewLikeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
             raise permissions.PermissionDenied("Authentication required to like a review.")
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                like = serializer.save(user=self.request.user)
+                Review.adjust_counters(like.review_id, likes=1)
+        except IntegrityError:
+            raise ValidationError({'detail': 'You have already liked this review.'})
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                old_review_id = serializer.instance.review_id
+                like = serializer.save()
+                if like.review_id != old_review_id:
+                    Review.adjust_counters(old_review_id, likes=-1)
+                    Review.adjust_counters(like.review_id, likes=1)
+        except IntegrityError:
+            # Moved onto a review the user already likes
+            raise ValidationError({'detail': 'You have already liked this review.'})
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Review.adjust_counters(instance.review_id, likes=-1)
 
 class ReviewCommentViewSet(viewsets.ModelViewSet):
     queryset = ReviewComment.objects.all()
@@ -67,7 +112,25 @@ class ReviewCommentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
             raise permissions.PermissionDenied("Authentication required to comment.")
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(user=self.request.user)
+            Review.adjust_counters(comment.review_id, comments=1)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old_review_id = serializer.instance.review_id
+            comment = serializer.save()
+            if comment.review_id != old_review_id:
+                Review.adjust_counters(old_review_id, comments=-1)
+                Review.adjust_counters(comment.review_id, comments=1)
+            else:
+                # The review embeds its latest comments
+                Review.touch(comment.review_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Review.adjust_counters(instance.review_id, comments=-1)
 
 # Registration endpoint
 class RegisterView(generics.CreateAPIView):
@@ -78,28 +141,77 @@ class RegisterView(generics.CreateAPIView):
 class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['movie_title', 'rating']
+    # ?search= goes through the full-text index instead of LIKE '%term%' scans
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     ordering_fields = ['rating', 'created_date']
+    # Seek pagination: no COUNT(*) and no OFFSET, deep pages cost as much as the first
+    pagination_class = ReviewCursorPagination
     permission_classes = [permissions.AllowAny]  # Allow anonymous users
 
     def get_queryset(self):
-        queryset = Review.objects.all()
+        queryset = Review.objects.select_related('user').with_latest_comments()
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('movie')
         movie_title = self.request.query_params.get('movie_title')
-        ratings = self.request.query_params.getlist('rating')
         if movie_title:
-            queryset = queryset.filter(movie_title__iexact=movie_title)
-        if ratings:
-            queryset = queryset.filter(rating__in=ratings)
-        return queryset
+            queryset = queryset.title_iexact(movie_title)
+        return filter_reviews(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # Read-only pages skip the serializer, see reviews/projections.py
+        queryset = projections.review_rows(self.filter_queryset(self.get_queryset()))
+        return self.conditional_page(
+            queryset, lambda paginator, page: paginator.get_paginated_response(projections.represent_reviews(page))
+        )
+
+    def conditional_page(self, queryset, respond, *extra):
+        """
+        Serve one cursor page of ``queryset`` with an ETag over the ids and
+        update times of its rows (plus ``extra``). A request carrying
+        If-None-Match is first checked with a narrow keyset query, so a match
+        costs neither serialization nor prefetches; otherwise the ETag comes
+        from the page itself. ``respond(paginator, page)`` builds the response.
+        """
+        if self.request.headers.get('If-None-Match'):
+            paginator = self.pagination_class()
+            rows = paginator.paginate_queryset(
+                queryset.prefetch_related(None).values('id', 'updated_at'), self.request, view=self
+            )
+            response = not_modified(self.request, self.page_etag(paginator, rows, extra))
+            if response is not None:
+                return response
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return add_validators(respond(paginator, page), self.page_etag(paginator, page, extra))
+
+    def page_etag(self, paginator, rows, extra):
+        fingerprint = [
+            (row['id'], row['updated_at']) if isinstance(row, dict) else (row.id, row.updated_at) for row in rows
+        ]
+        return make_etag(self.request.get_full_path(), fingerprint, paginator.has_next, *extra)
 
     def perform_create(self, serializer):
-        # Save with user if authenticated, otherwise save without user
-        if self.request.user.is_authenticated:
-            serializer.save(user=self.request.user)
-        else:
-            # For anonymous users, we need to handle the user field
-            serializer.save()
+        with transaction.atomic():
+            # Save with user if authenticated, otherwise save without user
+            if self.request.user.is_authenticated:
+                review = serializer.save(user=self.request.user)
+            else:
+                # For anonymous users, we need to handle the user field
+                review = serializer.save()
+            MovieRatingStats.record(review.movie_id, review.rating, 1)
+
+    def perform_update(self, serializer):
+        old_movie_id, old_rating = serializer.instance.movie_id, serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            if (review.movie_id, review.rating) != (old_movie_id, old_rating):
+                MovieRatingStats.record(old_movie_id, old_rating, -1)
+                MovieRatingStats.record(review.movie_id, review.rating, 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            MovieRatingStats.record(instance.movie_id, instance.rating, -1)
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -121,47 +233,142 @@ class ReviewViewSet(viewsets.ModelViewSet):
         # Allow anonymous users, but return empty for non-authenticated
         if not request.user.is_authenticated:
             return Response({'detail': 'Login required for recommendations.'}, status=status.HTTP_401_UNAUTHORIZED)
-        # Step 1: Get movies the user rated 4 or 5
-        user_high_rated = Review.objects.filter(user=request.user, rating__gte=4)
-        high_rated_titles = user_high_rated.values_list('movie_title', flat=True)
-        # Step 2: Find other users who also rated these movies highly
-        similar_reviews = Review.objects.filter(movie_title__in=high_rated_titles, rating__gte=4).exclude(user=request.user)
-        similar_users = similar_reviews.values_list('user', flat=True).distinct()
-        # Step 3: Find other movies these users rated highly, excluding movies the current user has already reviewed
-        recommended_reviews = Review.objects.filter(user__in=similar_users, rating__gte=4).exclude(movie_title__in=high_rated_titles)
-        recommended_titles = recommended_reviews.values_list('movie_title', flat=True).distinct()
-        # Step 4: Return a list of recommended movie titles
-        return Response({'recommended_movies': list(recommended_titles)})
+        # Served from the precomputed item-to-item table, see reviews.recommender
+        recommendations = recommender.recommend_for_user(request.user)
+        return Response({
+            'recommended_movies': [item['title'] for item in recommendations],
+            'recommendations': recommendations,
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[ORJSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        """
+        Create many reviews from a JSON array or an NDJSON body. Valid rows are
+        inserted in batches, invalid ones are skipped and reported by index.
+        Example: POST /api/reviews/bulk/ [{"movie_title": ..., "review_content": ..., "rating": 5}, ...]
+        """
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Expected a non-empty list of reviews'}, status=status.HTTP_400_BAD_REQUEST)
+        max_rows = getattr(settings, 'REVIEW_BULK_MAX_ROWS', 5000)
+        if len(rows) > max_rows:
+            return Response({'error': f'At most {max_rows} reviews per request'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user if request.user.is_authenticated else None
+        created, errors = ingest_reviews(enumerate(rows), user=user, context=self.get_serializer_context())
+        return Response(
+            {'created': created, 'errors': errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Reviews matching ?q= in their movie title or text, most relevant first
+        Example: /api/reviews/search/?q=nolan dream
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset()
+        # The backend of the database the reads are routed to, like FullTextSearchFilter
+        queryset = get_search_backend(queryset.db).filter(queryset, query).order_by('search_rank', '-id')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='movie/(?P<title>[^/.]+)')
     def reviews_by_movie(self, request, title=None):
-        queryset = self.get_queryset().filter(movie_title__iexact=title)
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
-        page = paginator.paginate_queryset(queryset, request)
-        serializer = self.get_serializer(page, many=True)
-        # Fetch OMDB info for the movie
-        movie_info = fetch_movie_info(title)
-        return paginator.get_paginated_response({
-            'movie_info': movie_info,
-            'reviews': serializer.data
-        })
+        movie = self.get_movie(title)
+        if movie is None or movie.fetched_at is None:
+            # The answer depends on OMDB, nothing local to validate against
+            paginator, reviews = self.movie_reviews_page(movie)
+            # Local catalog first, OMDB only for films it has not resolved yet
+            movie_info = movie.movie_info() if movie else fetch_movie_info(title)
+            return paginator.get_paginated_response({
+                'movie_info': movie_info,
+                'stats': self.stats_for(movie),
+                'reviews': reviews
+            })
+
+        stats = self.stats_for(movie)
+        return self.conditional_page(
+            projections.review_rows(self.get_queryset().filter(movie=movie)),
+            lambda paginator, page: paginator.get_paginated_response({
+                'movie_info': movie.omdb_data,
+                'stats': stats,
+                'reviews': projections.represent_reviews(page),
+            }),
+            movie.pk, movie.fetched_at, stats,
+        )
+
+    @action(detail=False, methods=['get'], url_path='movie/(?P<title>[^/.]+)/stats')
+    def movie_stats(self, request, title=None):
+        """Average rating, review count and star histogram for a movie, one indexed lookup"""
+        movie = self.get_movie(title)
+        if movie is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(dict(self.stats_for(movie), movie=movie.title))
+
+    def get_movie(self, title):
+        # The aggregates ride along on the same query
+        return Movie.objects.select_related('rating_stats').filter(normalized_title=normalize_title(title)).first()
+
+    @staticmethod
+    def stats_for(movie):
+        try:
+            return movie.rating_stats.as_dict()
+        except (AttributeError, MovieRatingStats.DoesNotExist):
+            return MovieRatingStats.empty_dict()
+
+    def movie_reviews_page(self, movie):
+        """The database half of reviews_by_movie, shared with the async view"""
+        queryset = self.get_queryset().filter(movie=movie) if movie else Review.objects.none()
+        paginator = ReviewCursorPagination()
+        page = paginator.paginate_queryset(projections.review_rows(queryset), self.request, view=self)
+        return paginator, projections.represent_reviews(page)
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        movie_info = fetch_movie_info(instance.movie_title)
-        data = serializer.data
-        data['movie_info'] = movie_info
-        return Response(data)
+        def build():
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+            movie_info = instance.movie_info()
+            data = serializer.data
+            data['movie_info'] = movie_info
+            return Response(data)
+
+        try:
+            validators = Review.objects.filter(pk=kwargs['pk']).values_list('updated_at', 'movie__fetched_at').first()
+        except (TypeError, ValueError):
+            validators = None
+        if validators is None or validators[1] is None:
+            # Missing review (404) or movie_info still to come from OMDB
+            return build()
+        updated_at, fetched_at = validators
+        return conditional(
+            request, build, etag=make_etag(updated_at, fetched_at), last_modified=max(updated_at, fetched_at)
+        )
+
+    @action(detail=True, methods=['get'], url_path='comments')
+    def comments(self, request, pk=None):
+        """
+        The full comment thread of a review, oldest first, keyset paginated
+        Example: /api/reviews/1/comments/?page_size=50
+        """
+        review = get_object_or_404(Review.objects.only('pk'), pk=pk)
+        queryset = review.comments.select_related('user')
+        paginator = KeysetPagination(ordering=('created_at', 'id'))
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ReviewCommentSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='most-liked/(?P<title>[^/.]+)')
     def most_liked_reviews(self, request, title=None):
-        queryset = self.get_queryset().filter(movie_title__iexact=title)
-        queryset = sorted(queryset, key=lambda r: r.likes.count(), reverse=True)
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
-        page = paginator.paginate_queryset(queryset, request)
+        # Ranked in SQL on the stored counter; the (likes_count, id) keyset keeps
+        # every page a single indexed range scan however many reviews a title has
+        movie = self.get_movie(title)
+        queryset = self.get_queryset().filter(movie=movie) if movie else Review.objects.none()
+        paginator = KeysetPagination(ordering=('-likes_count', '-id'))
+        page = paginator.paginate_queryset(queryset, request, view=self)
         serializer = self.get_serializer(page, many=True)
         return paginator.get_paginated_response(serializer.data)
 
@@ -185,6 +392,20 @@ def search_movies_view(request):
         return Response({'error': 'No movies found or API error'}, 
                        status=status.HTTP_404_NOT_FOUND)
 
+def catalog_movie_response(request, movie):
+    """
+    OMDB metadata of a film from the local catalog, validated by the time it
+    was fetched; the payload itself is only loaded when the client's copy is stale
+    """
+    def build():
+        if not movie.omdb_data:
+            return Response({'error': 'Movie not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(movie.omdb_data, status=status.HTTP_200_OK)
+
+    return conditional(
+        request, build, etag=make_etag(movie.pk, movie.fetched_at), last_modified=movie.fetched_at
+    )
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def movie_details_view(request, imdb_id):
@@ -192,6 +413,9 @@ def movie_details_view(request, imdb_id):
     Get detailed movie information by IMDB ID
     Example: /api/movie-details/tt3896198/
     """
+    movie = Movie.objects.defer('omdb_data').filter(imdb_id=imdb_id, fetched_at__isnull=False).first()
+    if movie is not None:
+        return catalog_movie_response(request, movie)
     movie_info = fetch_movie_by_imdb_id(imdb_id)
     if movie_info:
         return Response(movie_info, status=status.HTTP_200_OK)
@@ -210,7 +434,14 @@ def movie_info_view(request):
     if not title:
         return Response({'error': 'Title parameter is required'}, 
                        status=status.HTTP_400_BAD_REQUEST)
-    
+
+    movie = (
+        Movie.objects.defer('omdb_data')
+        .filter(normalized_title=normalize_title(title), fetched_at__isnull=False)
+        .first()
+    )
+    if movie is not None:
+        return catalog_movie_response(request, movie)
     movie_info = fetch_movie_info(title)
     if movie_info:
         return Response(movie_info, status=status.HTTP_200_OK)
@@ -218,38 +449,134 @@ def movie_info_view(request):
         return Response({'error': 'Movie not found'}, 
                        status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def omdb_status_view(request):
+    """
+    OMDB integration health for monitoring (counters are per worker process).
+    Answers 503 while the circuit breaker is open so plain HTTP checks can alert.
+    Example: /api/omdb-status/
+    """
+    breaker = get_client().breaker.snapshot()
+    healthy = breaker['state'] != CircuitBreaker.OPEN
+    return Response(
+        {'cache': cache_stats(), 'circuit_breaker': breaker},
+        status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus metrics of all worker processes, see reviews/metrics.py.
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when that setting is set.
+    Example: /metrics
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+class ExportNegotiation(DefaultContentNegotiation):
+    """Leaves ?format= to the export: errors render as JSON whatever it says"""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+class ReviewExportView(APIView):
+    """
+    Stream every matching review as NDJSON (default) or CSV in constant memory.
+    Filters: ?movie=, ?user=, ?rating=, ?created_after=, ?created_before=
+    Example: /api/reviews/export/?format=csv&movie=inception
+    """
+    permission_classes = [permissions.AllowAny]
+    content_negotiation_class = ExportNegotiation
+
+    def get(self, request):
+        format = request.query_params.get('format', 'ndjson')
+        if format not in FORMATS:
+            return Response({'error': f"format must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = export_queryset(request.query_params)
+        response = StreamingHttpResponse(export_lines(queryset, format), content_type=FORMATS[format])
+        response['Content-Disposition'] = f'attachment; filename="reviews.{format}"'
+        return response
+
 # Template Views for Web Interface
 def home_view(request):
-    """Home page with recent reviews"""
-    recent_reviews = Review.objects.order_by('-created_date')[:6]
-    return render(request, 'reviews/home.html', {
-        'recent_reviews': recent_reviews
-    })
+    """Home page with recent reviews, rendered once per change to the reviews"""
+    def render_home(extra_context):
+        recent_reviews = Review.objects.select_related('user').order_by('-created_date')[:6]
+        return render(request, 'reviews/home.html', {'recent_reviews': recent_reviews, **extra_context})
+
+    return page_cache.cached_page(request, 'home', page_cache.version('reviews'), render_home)
 
 def movie_search_view(request):
     """Movie search page"""
     return render(request, 'reviews/movie_search.html')
 
 class ReviewsListView(ListView):
-    """Reviews list page with pagination"""
-    model = Review
+    """
+    Reviews list page with pagination. ``?paging=cursor`` switches to
+    next/previous seek pagination, which skips the COUNT(*) and OFFSET.
+    Pages are cached per URL until the reviews change, a cached page is
+    served without querying or paginating anything.
+    """
+    queryset = Review.objects.select_related('user')
     template_name = 'reviews/reviews_list.html'
     context_object_name = 'reviews'
     paginate_by = 12
     ordering = ['-created_date']
+    cursor_paginator = None
+
+    def get(self, request, *args, **kwargs):
+        self.reviews_version = page_cache.version('reviews')
+        fragment = page_cache.cached_fragment('reviews_list', self.reviews_version, request.get_full_path())
+        if fragment is not None:
+            return render(request, self.template_name, self.cache_context(reviews_list_html=fragment))
+        with page_cache.reads_for(cached=False):
+            return super().get(request, *args, **kwargs).render()
+
+    def cache_context(self, **extra):
+        return page_cache.context(reviews_version=self.reviews_version, **extra)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.request.GET.get('paging') != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        self.cursor_paginator = ReviewCursorPagination(page_size=page_size)
+        page = self.cursor_paginator.paginate_queryset(queryset, Request(self.request))
+        return None, None, page, False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.cache_context())
+        if self.cursor_paginator is not None:
+            context['cursor_paging'] = True
+            context['cursor_next'] = self.cursor_paginator.get_next_link()
+            context['cursor_previous'] = self.cursor_paginator.get_previous_link()
+        return context
 
 def review_detail_view(request, pk):
-    """Individual review detail page"""
-    try:
-        review = Review.objects.get(pk=pk)
-        movie_info = fetch_movie_info(review.movie_title)
-        return render(request, 'reviews/review_detail.html', {
-            'review': review,
-            'movie_info': movie_info
-        })
-    except Review.DoesNotExist:
-        from django.http import Http404
+    """
+    Individual review detail page. The review body and OMDB block are cached
+    until the review, its likes or comments or the film's catalog entry change;
+    a cached page costs one narrow lookup and never calls OMDB. Until the film's
+    metadata is in the catalog the page is rendered uncached, so it picks the
+    metadata up later.
+    """
+    summary = Review.objects.filter(pk=pk).values('pk', 'movie_title', 'user_id', 'movie__fetched_at').first()
+    if summary is None:
         raise Http404("Review not found")
+    review = SimpleLazyObject(lambda: Review.objects.select_related('user', 'movie').get(pk=pk))
+    context = page_cache.context(
+        summary=summary,
+        review=review,
+        movie_info=SimpleLazyObject(lambda: review.movie_info()),
+        review_version=page_cache.version(('review', pk)),
+    )
+    if summary['movie__fetched_at'] is None:
+        context['page_cache_timeout'] = 0
+    cached = page_cache.is_cached('review_detail', context['review_version'], summary['movie__fetched_at'])
+    with page_cache.reads_for(cached):
+        return render(request, 'reviews/review_detail.html', context)
 
 # API endpoint for the frontend search (without authentication)
 @api_view(['GET'])